@@ -0,0 +1,994 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : bench.py
+
+    Benchmarks; usage :
+        python3 bench.py                        # all benchmarks
+        python3 bench.py serialization ...      # only some benchmarks
+"""
+
+import bisect
+import collections
+import functools
+import heapq
+import itertools
+import operator
+import os
+import pickle
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from hlevel.hlevel import HLevel
+from hlevel.bulk import parse_positional
+from hlevel import corpus
+from hlevel.cache import ParseCache
+from hlevel import numberformat
+from hlevel.compare import compare_strings, string_key
+from hlevel.errors import RenderError
+from hlevel.extsort import sort_file
+from hlevel import serialization
+from hlevel.index import build_index, HeadingIndex
+from hlevel.merge import merge_levels
+from hlevel.node import LevelTree
+from hlevel.outline import OutlineBuilder
+from hlevel.rollup import iter_rollup, HashRollup, SUM
+from hlevel.scanner import MultiFormatScanner
+from hlevel.shared import attach_levels, publish_levels, SharedLevels
+from hlevel.sortedlevels import SortedLevels
+from hlevel.sortkey import levels_to_array, pack_array, sort_levels, subtree_bounds, \
+    unpack_array
+from hlevel.sqlite import register_sqlite
+
+################################################################################
+class PlainHLevel(HLevel):
+    """
+        class PlainHLevel
+
+        HLevel pickled the default way, i.e. with its whole __dict__.
+    """
+    __reduce__ = object.__reduce__
+
+#///////////////////////////////////////////////////////////////////////////////
+def chrono(function, *args):
+    """
+        chrono
+
+        Return ((float)seconds spent in function(*args), value returned by function).
+    """
+    start = time.perf_counter()
+    res = function(*args)
+    return (time.perf_counter() - start, res)
+
+#///////////////////////////////////////////////////////////////////////////////
+def shared_worker(levels):
+    """
+        shared_worker
+
+        levels  : list of HLevel objects or SharedLevels object
+
+        Task of a process of bench_shared() : return (sum of the first numbers of
+        the levels, RSS of the process in bytes).
+    """
+    if isinstance(levels, SharedLevels):
+        values, _ = levels.getValues()
+        res = sum(values[::levels.depth]) if levels.depth else 0
+        del values
+    else:
+        res = sum(level[0] for level in levels)
+    with open("/proc/self/statm") as statm:     # Linux only
+        return res, int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_bulk(number_of_levels=2000000):
+    """
+        bench_bulk
+
+        Reading a buffer of <number_of_levels> levels (one per line) :
+        HLevel.try_parse() line by line vs. parse_positional() (NumPy).
+    """
+    try:
+        import numpy
+    except ImportError:
+        print("NumPy is not installed")
+        return
+
+    print("{0} levels, one per line :".format(number_of_levels))
+    for formatstr in (".1.1.1.1.1.1", ".(１.１.１.１.１.１)", ".¹.¹.¹.¹.¹.¹"):
+        levels = corpus.iter_levels(number_of_levels, fanout=1000)
+        buffer = "\n".join(str(HLevel.fromValues(level, formatstr)) for level in levels)
+        data = buffer.encode("utf-8")
+
+        seconds1, res1 = chrono(lambda: [HLevel.try_parse(src, formatstr)
+                                         for src in buffer.split("\n")])
+        seconds2, res2 = chrono(parse_positional, data, formatstr)
+        assert res2.valid.all()
+        assert [list(level) for level in res1[:1000]] == \
+               [row[:depth].tolist() for row, depth in zip(res2.values[:1000], res2.depths)]
+
+        tracemalloc.start()
+        parse_positional(data, formatstr)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print("  {0:20} : {1:5.1f} MiB, try_parse {2:6.2f} s, parse_positional {3:6.2f} s "
+              "(x{4:.1f}, peak {5:.0f} MiB)".format(formatstr, len(data) / 1024**2,
+                                                   seconds1, seconds2, seconds1 / seconds2,
+                                                   peak / 1024**2))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_cache(number_of_items=1000000, number_of_distinct=20000):
+    """
+        bench_cache
+
+        Reading <number_of_items> level strings drawn from <number_of_distinct>
+        strings (Zipfian distribution) : HLevel.try_parse() vs. ParseCache, all the
+        levels being kept.
+    """
+    print("{0} level strings, {1} distinct ones (Zipf) :".format(number_of_items,
+                                                               number_of_distinct))
+    for formatstr in (".(I.a.1.1)", ".1.1.1.1"):
+        population = sorted(set(corpus.iter_references(formatstr, 4*number_of_distinct,
+                                                       duplicates=0)))[:number_of_distinct]
+        random.Random(0).shuffle(population)
+        strings = list(corpus.iter_zipf(population, number_of_items))
+
+        for maxsize in (None, 1000, 65536):
+            if maxsize is None:
+                name = "try_parse"
+                function = lambda: [HLevel.try_parse(src, formatstr) for src in strings]
+            else:
+                name = "ParseCache({0})".format(maxsize)
+                cache = ParseCache(formatstr, maxsize=maxsize)
+                function = lambda: [cache.tryParseFrozen(src) for src in strings]
+            seconds, res = chrono(function)
+            del res
+            hit_rate = "" if maxsize is None else ", hit rate {0:.1%}".format(cache.getHitRate())
+
+            # memory : levels + cache
+            if maxsize is not None:
+                cache.clear()
+            tracemalloc.start()
+            res = function()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del res
+
+            print("  {0:10} {1:17} : {2:9.0f} items/s, {3:7.1f} MiB kept{4}".format(
+                formatstr, name, number_of_items / seconds, size / 1024**2, hit_rate))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_compare(number_of_pairs=200000):
+    """
+        bench_compare
+
+        Comparison of <number_of_pairs> pairs of deep level strings sharing their
+        first numbers : compare_strings() vs. parse-then-compare; sort.
+    """
+    print("{0} pairs of level strings :".format(number_of_pairs))
+
+    rand = random.Random(0)
+    for formatstr in (".1.1.1.1.1.1.1.1", ".I.I.I.I.I.I.I.I"):
+        parents = [HLevel.fromValues([rand.randint(1, 300) for _ in range(6)], formatstr)
+                   for _ in range(100)]
+        strings = []
+        for _ in range(number_of_pairs):
+            hlevel = HLevel.fromValues(rand.choice(parents), formatstr)
+            hlevel.extend(rand.randint(1, 300) for _ in range(2))
+            strings.append(str(hlevel))
+        pairs = list(zip(strings, strings[1:] + strings[:1]))
+
+        def parse_then_compare(pairs=pairs, formatstr=formatstr):
+            """
+                parse_then_compare
+            """
+            return [(hlevel1 > hlevel2) - (hlevel1 < hlevel2)
+                    for hlevel1, hlevel2 in ((HLevel(src=src1, formatstr=formatstr),
+                                              HLevel(src=src2, formatstr=formatstr))
+                                             for src1, src2 in pairs)]
+
+        seconds1, res1 = chrono(parse_then_compare)
+        seconds2, res2 = chrono(lambda: [compare_strings(src1, src2, formatstr)
+                                         for src1, src2 in pairs])
+        assert res1 == res2
+        print("  {0} : parse then compare {1:6.3f} s, "
+              "compare_strings {2:6.3f} s".format(formatstr, seconds1, seconds2))
+
+        seconds1, res1 = chrono(lambda: sorted(strings,
+                                               key=lambda src: HLevel(src=src,
+                                                                      formatstr=formatstr)))
+        seconds2, res2 = chrono(lambda: sorted(strings, key=string_key(formatstr)))
+        assert res1 == res2
+        print("  {0} : sort, parse once {1:6.3f} s, "
+              "string_key {2:6.3f} s".format(formatstr, seconds1, seconds2))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_endtoend(size_per_format=16*1024**2, depth=4, noise=0.01):
+    """
+        bench_endtoend
+
+        For each of corpus.CLASSIC_SYMBOLS, a synthetic document of
+        <size_per_format> characters (references "§IV.2.1.3"...) is scanned, the
+        references are read, sorted, deduplicated and written again.
+    """
+    import resource     # Unix only
+
+    print("scan -> parse -> sort -> dedup -> render, {0} MiB per format "
+          "(items/s) :".format(size_per_format // 1024**2))
+    print("  {0:12} {1:>7} {2:>8} {3:>8} {4:>8} {5:>8} {6:>8} {7:>9}".format(
+        "format", "MiB/s", "items", "scan", "parse", "sort", "render", "peak RSS"))
+
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        for symbol in corpus.CLASSIC_SYMBOLS:
+            formatstr = corpus.make_formatstr(symbol, depth, prefix="§")
+            size = corpus.write_document(path, formatstr, size_per_format, seed=0, noise=noise)
+            regex = re.compile(HLevel(formatstr=formatstr).getSearchPattern())
+
+            def scan():
+                """
+                    scan : list of the strings matching the search pattern
+                """
+                res = []
+                with open(path, encoding="utf-8") as document:
+                    while True:
+                        chunk = "".join(document.readlines(1024**2))
+                        if not chunk:
+                            return res
+                        res.extend(regex.findall(chunk))
+
+            seconds_scan, strings = chrono(scan)
+            seconds_parse, hlevels = chrono(lambda: [hlevel for hlevel in
+                                                     (HLevel.try_parse(src, formatstr)
+                                                      for src in strings)
+                                                     if hlevel is not None])
+            seconds_sort, _ = chrono(hlevels.sort)
+            seconds_dedup, unique = chrono(lambda: [hlevel for hlevel, _
+                                                    in itertools.groupby(hlevels)])
+
+            def render():
+                """
+                    render : number of levels which can't be written ("0" read with
+                             the format "1"...)
+                """
+                errors = 0
+                for hlevel in unique:
+                    try:
+                        hlevel.getRepr()
+                    except RenderError:
+                        errors += 1
+                return errors
+
+            seconds_render, _ = chrono(render)
+
+            seconds = seconds_scan + seconds_parse + seconds_sort + seconds_dedup + \
+                      seconds_render
+            print("  {0:12} {1:7.1f} {2:8} {3:8.0f} {4:8.0f} {5:8.0f} {6:8.0f} "
+                  "{7:5.0f} MiB".format(formatstr,
+                                        size / 1024**2 / seconds,
+                                        len(strings),
+                                        len(strings) / seconds_scan,
+                                        len(strings) / seconds_parse,
+                                        len(hlevels) / seconds_sort,
+                                        len(unique) / seconds_render,
+                                        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+    finally:
+        os.remove(path)
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_extsort(number_of_lines=2000000, memory_limit=64*1024**2):
+    """
+        bench_extsort
+
+        External sort (sort_file(), <memory_limit>) of a file of <number_of_lines>
+        references ("(IV.2.b)\tline 123") vs. an in-memory sort.
+    """
+    formatstr = ".(I.1.a)"
+    handle, src_path = tempfile.mkstemp()
+    os.close(handle)
+    dest_path = src_path + ".sorted"
+    try:
+        with open(src_path, "w", encoding="utf-8") as src:
+            for line_number, reference in enumerate(corpus.iter_references(formatstr,
+                                                                           number_of_lines,
+                                                                           noise=0.001)):
+                src.write("{0}\tline {1}\n".format(reference, line_number))
+        size = os.path.getsize(src_path)
+        print("{0} lines, {1:.1f} MiB :".format(number_of_lines, size / 1024**2))
+
+        def in_memory():
+            """
+                in_memory : the whole file is read and sorted in memory
+            """
+            with open(src_path, encoding="utf-8") as src:
+                lines = [(HLevel.try_parse(line.split("\t", 1)[0], formatstr), line)
+                         for line in src]
+            lines = [item for item in lines if item[0] is not None]
+            lines.sort(key=operator.itemgetter(0))
+            with open(dest_path, "w", encoding="utf-8") as dest:
+                dest.writelines(line for _, line in lines)
+
+        seconds, _ = chrono(in_memory)
+        print("  in memory (sort())    : {0:6.2f} s".format(seconds))
+
+        for limit in (memory_limit, memory_limit // 8):
+            seconds, stats = chrono(functools.partial(sort_file, delimiter="\t",
+                                                      memory_limit=limit),
+                                    src_path, dest_path, formatstr)
+            print("  sort_file(), {0:4} MiB : {1:6.2f} s, {2} runs, "
+                  "{3:.1f} MiB written, {4:.1f} MiB read".format(limit // 1024**2, seconds,
+                                                                 stats.runs,
+                                                                 stats.bytes_written / 1024**2,
+                                                                 stats.bytes_read / 1024**2))
+
+        seconds, stats = chrono(functools.partial(sort_file, delimiter="\t",
+                                                  memory_limit=memory_limit // 8, fan_in=4),
+                                src_path, dest_path, formatstr)
+        print("  idem, fan_in=4        : {0:6.2f} s, {1} runs, "
+              "{2:.1f} MiB written, {3:.1f} MiB read".format(seconds, stats.runs,
+                                                             stats.bytes_written / 1024**2,
+                                                             stats.bytes_read / 1024**2))
+        seconds, stats = chrono(functools.partial(sort_file, binary=True, delimiter="\t",
+                                                  memory_limit=memory_limit),
+                                src_path, dest_path, formatstr)
+        print("  binary output         : {0:6.2f} s, {1:.1f} MiB".format(
+            seconds, os.path.getsize(dest_path) / 1024**2))
+    finally:
+        for path in (src_path, dest_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_index(document_size=2*1024**3, number_of_lookups=10000, number_of_updates=1000):
+    """
+        bench_index
+
+        Sidecar index of the headings (format ".I.1.a") of a synthetic document of
+        <document_size> bytes : build time, lookup latency and incremental updates.
+    """
+    print("heading index, document of {0} MiB :".format(document_size // 1024**2))
+
+    rand = random.Random(0)
+    words = ["".join(rand.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rand.randint(2, 9)))
+             for _ in range(1000)]
+    paragraphs = [(" ".join(rand.choice(words) for _ in range(30)) + "\n").encode("utf-8")
+                  for _ in range(200)]
+
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        levels = []
+        with open(path, "wb") as document:
+            size = 0
+            hlevel = HLevel(formatstr=".I.1.a")
+            while size < document_size:
+                # next heading : a new part, section or subsection
+                depth = 1 if rand.random() < 0.001 else 2 if rand.random() < 0.1 else 3
+                if depth > len(hlevel) or not hlevel:
+                    depth = len(hlevel) + 1
+                    hlevel.append(1)
+                else:
+                    del hlevel[depth:]
+                    hlevel[-1] += 1
+                levels.append(list(hlevel))
+                chunk = [str(hlevel).encode("utf-8"), b" Heading\n"]
+                chunk.extend(rand.choice(paragraphs) for _ in range(rand.randint(1, 8)))
+                chunk = b"".join(chunk)
+                document.write(chunk)
+                size += len(chunk)
+
+        seconds, number_of_headings = chrono(build_index, path, None, ".I.1.a")
+        print("  build_index    : {0:8.3f} s, {1:.1f} MiB/s, "
+              "{2} headings, index of {3} MiB".format(seconds,
+                                                      size / 1024**2 / seconds,
+                                                      number_of_headings,
+                                                      os.path.getsize(path + ".hli") // 1024**2))
+
+        sample = [rand.choice(levels) for _ in range(number_of_lookups)]
+        with HeadingIndex(path + ".hli") as index:
+            seconds, _ = chrono(lambda: [index.heading(level) for level in sample])
+            print("  heading()      : {0:8.1f} µs per lookup "
+                  "(binary search + seek + read)".format(seconds / number_of_lookups * 1e6))
+            seconds, _ = chrono(lambda: [index.lookup(level) for level in sample])
+            print("  lookup()       : {0:8.1f} µs per lookup "
+                  "(binary search only)".format(seconds / number_of_lookups * 1e6))
+            seconds, count = chrono(lambda: sum(1 for _ in index.subtree(levels[-1][:1])))
+            print("  subtree()      : {0:8.3f} s for the last part "
+                  "({1} headings)".format(seconds, count))
+
+        # small edits of the document, written in place (same length) :
+        positions = [rand.randrange(size - 100) for _ in range(number_of_updates)]
+        with HeadingIndex(path + ".hli") as index, open(path, "r+b") as document:
+            def edit_and_update():
+                """
+                    edit_and_update
+                """
+                for position in positions:
+                    document.seek(position)
+                    document.write(b"\nIII.2 ")
+                    document.flush()
+                    index.update(position, 7, b"\nIII.2 ")
+
+            seconds, _ = chrono(edit_and_update)
+            print("  update()       : {0:8.1f} µs per edit "
+                  "({1} edits)".format(seconds / number_of_updates * 1e6, number_of_updates))
+            seconds, _ = chrono(lambda: [index.lookup(level) for level in sample])
+            print("  lookup()       : {0:8.1f} µs per lookup "
+                  "(after the edits)".format(seconds / number_of_lookups * 1e6))
+            seconds, _ = chrono(index.compact)
+            print("  compact()      : {0:8.3f} s".format(seconds))
+    finally:
+        os.remove(path)
+        if os.path.exists(path + ".hli"):
+            os.remove(path + ".hli")
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_merge(number_of_shards=64, levels_per_shard=20000):
+    """
+        bench_merge
+
+        Merge of <number_of_shards> sorted shards (level strings, two formats, or
+        HLevel objects) : merge_levels() vs. reading and sorting everything.
+    """
+    formats = [(".1.1.1.1.1.1", ".(A.I.1.a.1.1)")[index % 2] for index in range(number_of_shards)]
+    shards = [sorted(corpus.iter_levels(levels_per_shard, seed=index, fanout=20))
+              for index in range(number_of_shards)]
+    strings = [[HLevel.fromValues(level, formatstr).getRepr() for level in shard]
+               for shard, formatstr in zip(shards, formats)]
+    hlevels = [[HLevel.fromValues(level) for level in shard] for shard in shards]
+    print("{0} shards x {1} levels :".format(number_of_shards, levels_per_shard))
+
+    def read_and_sort():
+        """
+            read_and_sort : all the strings are read, then sorted
+        """
+        return sorted(HLevel(src, formatstr)
+                      for shard, formatstr in zip(strings, formats) for src in shard)
+
+    seconds1, res1 = chrono(read_and_sort)
+    print("  strings, read + sorted()       : {0:6.2f} s".format(seconds1))
+    seconds2, res2 = chrono(lambda: list(merge_levels(strings, formats)))
+    assert res1 == res2
+    print("  strings, merge_levels()        : {0:6.2f} s".format(seconds2))
+    seconds, res2 = chrono(lambda: list(merge_levels(strings, formats, dedup=True)))
+    print("  strings, merge_levels(dedup)   : {0:6.2f} s, {1} levels".format(seconds, len(res2)))
+    del res1, res2
+
+    seconds, _ = chrono(lambda: sorted(itertools.chain.from_iterable(hlevels)))
+    print("  HLevel, sorted()               : {0:6.2f} s".format(seconds))
+    seconds, _ = chrono(lambda: list(heapq.merge(*hlevels)))
+    print("  HLevel, heapq.merge()          : {0:6.2f} s".format(seconds))
+    seconds, _ = chrono(lambda: list(merge_levels(hlevels)))
+    print("  HLevel, merge_levels()         : {0:6.2f} s".format(seconds))
+
+    # lazy streams : only the current item of each stream is kept
+    tracemalloc.start()
+    collections.deque(merge_levels([iter(shard) for shard in strings], formats), maxlen=0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("  peak memory of the merge       : {0:.1f} KiB".format(peak / 1024))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_nodes(number_of_levels=1000000):
+    """
+        bench_nodes
+
+        Memory used by the <number_of_levels> levels of a deep outline : HLevel
+        objects, tuples, interned LevelNode objects.
+    """
+    levels = list(corpus.iter_levels(number_of_levels))
+    print("{0} levels of an outline, mean depth {1:.2f} :".format(
+        number_of_levels, sum(map(len, levels)) / number_of_levels))
+
+    def memory(function):
+        """
+            memory : ((float)seconds, (int)bytes allocated by function())
+        """
+        tracemalloc.start()
+        start = time.perf_counter()
+        res = function()
+        seconds = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del res
+        return (seconds, size)
+
+    for name, function in (("HLevel objects", lambda: [HLevel.fromValues(level, ".I.1.1.a.i.1")
+                                                        for level in levels]),
+                           ("tuples", lambda: [tuple(level) for level in levels]),
+                           ("LevelNode objects", lambda: (lambda tree: (tree, [tree.node(level)
+                                                                          for level in levels]))(
+                                                                              LevelTree()))):
+        seconds, size = memory(function)
+        print("  {0:18} : {1:7.1f} MiB, {2:5.0f} bytes per level "
+              "(built in {3:.2f} s, traced)".format(name, size / 1024**2,
+                                                    size / number_of_levels, seconds))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_numerals(number_of_numbers=1000000):
+    """
+        bench_numerals
+
+        Writing and reading <number_of_numbers> superscript numerals (footnote
+        markers), one at a time and by batch.
+    """
+    print("{0} superscript numerals :".format(number_of_numbers))
+
+    superscript = numberformat.get_format("¹")
+    numbers = list(range(1, number_of_numbers+1))
+
+    seconds, strnumbers = chrono(lambda: [superscript.render(number) for number in numbers])
+    print("  render, one at a time        : {0:8.3f} s".format(seconds))
+    seconds, _ = chrono(superscript.renderMany, numbers)
+    print("  renderMany                   : {0:8.3f} s".format(seconds))
+    seconds, _ = chrono(lambda: [superscript.parse(strnumber) for strnumber in strnumbers])
+    print("  parse, one at a time         : {0:8.3f} s".format(seconds))
+    seconds, _ = chrono(superscript.parseMany, strnumbers)
+    print("  parseMany                    : {0:8.3f} s".format(seconds))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_rollup(number_of_pairs=2000000):
+    """
+        bench_rollup
+
+        Sums of the subtrees of <number_of_pairs> (level, value) pairs :
+        iter_rollup() (sorted pairs), HashRollup (unsorted pairs) vs. a dictionary
+        {prefix : sum} filled with all the prefixes of each level.
+    """
+    rand = random.Random(0)
+    pairs = [(level, rand.randrange(100))
+             for level in corpus.iter_levels(number_of_pairs, fanout=20)]
+    pairs.sort()
+    print("{0} pairs :".format(number_of_pairs))
+
+    def prefixes():
+        """
+            prefixes : {prefix : sum}, sorted
+        """
+        sums = collections.defaultdict(int)
+        for level, value in pairs:
+            level = tuple(level)
+            for depth in range(1, len(level)+1):
+                sums[level[:depth]] += value
+        return sorted(sums.items())
+
+    seconds, expected = chrono(prefixes)
+    print("  dictionary of the prefixes     : {0:6.2f} s, {1} aggregates".format(seconds,
+                                                                               len(expected)))
+    seconds, res = chrono(lambda: list(iter_rollup(pairs, SUM)))
+    assert sorted(res) == expected
+    print("  iter_rollup() (sorted pairs)   : {0:6.2f} s".format(seconds))
+
+    rand.shuffle(pairs)
+    for max_entries in (10**7, 10**5, 10**4):
+        def hash_rollup():
+            """
+                hash_rollup : (aggregates, number of temporary files)
+            """
+            with HashRollup(SUM, max_entries=max_entries) as rollup:
+                rollup.feed(pairs)
+                return list(rollup.iterAggregates()), rollup.number_of_runs
+        seconds, (res, runs) = chrono(hash_rollup)
+        assert sorted(res) == expected
+        print("  HashRollup, {0:8} entries   : {1:6.2f} s, {2} runs".format(max_entries,
+                                                                            seconds, runs))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_scanner(text_size=2000000):
+    """
+        bench_scanner
+
+        Search of the levels written with 1 to 24 formats in a text of <text_size>
+        characters : one pass per format vs. MultiFormatScanner.
+    """
+    print("scanner, text of {0} characters :".format(text_size))
+
+    rand = random.Random(0)
+    prefixes = "([{<«§¶†‡※#@~^=+*&%$!?;:"
+    formatstrs = ["." + prefix + "1.I" for prefix in prefixes]
+    samples = [prefix + "3.IV" for prefix in prefixes]
+    words = []
+    size = 0
+    while size < text_size:
+        word = rand.choice(samples) if rand.random() < 0.005 else \
+               "".join(rand.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6))
+        words.append(word)
+        size += len(word) + 1
+    text = " ".join(words)
+
+    for number_of_formats in (1, 4, 8, 16, 24):
+        _formatstrs = formatstrs[:number_of_formats]
+
+        def one_pass_per_format(formatstrs=_formatstrs):
+            """
+                one_pass_per_format
+            """
+            res = 0
+            for formatstr in formatstrs:
+                regex = re.compile(HLevel(formatstr=formatstr).getSearchPattern())
+                for match in regex.finditer(text):
+                    res += HLevel.try_parse(match.group(), formatstr) is not None
+            return res
+
+        seconds1, found1 = chrono(one_pass_per_format)
+        scanner = MultiFormatScanner(_formatstrs)
+        seconds2, found2 = chrono(lambda: len(scanner.findall(text)))
+        print("  {0:2} format(s) : one pass per format {1:6.3f} s, "
+              "MultiFormatScanner {2:6.3f} s ({3}/{4} levels)".format(number_of_formats,
+                                                                      seconds1, seconds2,
+                                                                      found1, found2))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_outline(document_size=500*1024**2):
+    """
+        bench_outline
+
+        Streaming reading of the sections of a synthetic document of
+        <document_size> bytes : throughput and peak memory.
+    """
+    print("outline, document of {0} MiB :".format(document_size // 1024**2))
+
+    rand = random.Random(0)
+    paragraphs = [" ".join("".join(rand.choice("abcdefghijklmnopqrstuvwxyz")
+                                   for _ in range(rand.randint(2, 9)))
+                           for _ in range(30)) + "\n"
+                  for _ in range(200)]
+    formatstr = ".I.1.1.a.i.1"
+
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        with open(path, "w", encoding="utf-8") as document:
+            size = 0
+            for level in corpus.iter_levels(document_size // 400):
+                chunk = str(HLevel.fromValues(level, formatstr)) + " Heading\n" + \
+                        "".join(rand.choice(paragraphs) for _ in range(rand.randint(1, 8)))
+                document.write(chunk)
+                size += len(chunk)
+                if size >= document_size:
+                    break
+
+        def read_outline():
+            """
+                read_outline : number of sections
+            """
+            with open(path, encoding="utf-8") as document:
+                return sum(event.kind == "open"
+                           for event in OutlineBuilder(formatstr).iterEvents(document))
+
+        seconds, number_of_sections = chrono(read_outline)
+        print("  iterEvents     : {0:8.3f} s, {1:.1f} MiB/s, {2} sections".format(
+            seconds, os.path.getsize(path) / 1024**2 / seconds, number_of_sections))
+
+        tracemalloc.start()
+        read_outline()
+        print("  peak memory    : {0:8.1f} KiB (traced)".format(
+            tracemalloc.get_traced_memory()[1] / 1024))
+        tracemalloc.stop()
+    finally:
+        os.remove(path)
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_packed(number_of_levels=5000000):
+    """
+        bench_packed
+
+        Sorting <number_of_levels> shallow levels (at most 6 numbers < 200) :
+        sorted(), sort_levels() (packed keys), NumPy (packed keys, numpy.sort).
+    """
+    levels = list(corpus.iter_levels(number_of_levels, fanout=200))
+    random.Random(0).shuffle(levels)
+    print("{0} levels, mean depth {1:.2f} :".format(number_of_levels,
+                                                  sum(map(len, levels)) / number_of_levels))
+
+    seconds1, res1 = chrono(sorted, levels)
+    print("  sorted()              : {0:6.2f} s".format(seconds1))
+    seconds2, res2 = chrono(sort_levels, levels)
+    assert res1 == res2
+    print("  sort_levels()         : {0:6.2f} s".format(seconds2))
+    del res2
+
+    try:
+        import numpy
+    except ImportError:
+        print("  (NumPy is not installed)")
+        return
+    seconds_array, array = chrono(levels_to_array, levels)
+    seconds_pack, keys = chrono(pack_array, array)
+    seconds_sort, _ = chrono(keys.sort)
+    print("  NumPy : levels_to_array() {0:6.2f} s, pack_array() {1:6.2f} s, "
+          "sort {2:6.2f} s".format(seconds_array, seconds_pack, seconds_sort))
+    assert res1[:1000] == [level.tolist()[:len(expected)]
+                           for level, expected in zip(unpack_array(keys[:1000]), res1)]
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_range(fanout=(10, 20, 20, 30, 40)):
+    """
+        bench_range
+
+        Enumeration of all the levels of a tree (<fanout>) : HLevel.iter_range()
+        (levels, strings) vs. a new HLevel object rendered for each level.
+    """
+    formatstr = ".I.A.1.a.1"
+    number_of_levels = sum(functools.reduce(operator.mul, fanout[:depth], 1)
+                           for depth in range(1, len(fanout)+1))
+    print("{0} levels, fanout {1} :".format(number_of_levels, fanout))
+
+    def count(levels):
+        """
+            count : number of items of <levels>
+        """
+        res = 0
+        for _ in levels:
+            res += 1
+        return res
+
+    stop = list(fanout)
+    for name, make_levels in (("iter_range()",
+                               lambda: HLevel.iter_range([1], stop, fanout, formatstr)),
+                              ("iter_range(strings)",
+                               lambda: HLevel.iter_range([1], stop, fanout, formatstr,
+                                                         strings=True)),
+                              ("new HLevel objects",
+                               lambda: (str(HLevel.fromValues(level, formatstr))
+                                        for level in HLevel.iter_range([1], stop, fanout,
+                                                                       formatstr)))):
+        seconds, res = chrono(count, make_levels())
+        assert res == number_of_levels
+
+        # memory : the first million levels
+        tracemalloc.start()
+        count(itertools.islice(make_levels(), 1000000))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print("  {0:20} : {1:6.2f} s, {2:9.0f} levels/s, peak {3} bytes".format(
+            name, seconds, number_of_levels / seconds, peak))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_serialization(number_of_levels=200000):
+    """
+        bench_serialization
+
+        Size and load time of <number_of_levels> levels : default pickle, compact
+        pickle (HLevel.__reduce__) and binary format (hlevel/serialization.py).
+    """
+    print("serialization of {0} levels like (3.12.1542) :".format(number_of_levels))
+
+    levels = [HLevel.fromValues((i % 7 + 1, i % 13 + 1, i), ".(1.1.1.1)")
+              for i in range(1, number_of_levels+1)]
+    plain_levels = [PlainHLevel(formatstr=".(1.1.1.1)") for _ in levels]
+    for plain_level, level in zip(plain_levels, levels):
+        plain_level.extend(level)
+
+    results = []
+
+    data = pickle.dumps(plain_levels, protocol=pickle.HIGHEST_PROTOCOL)
+    results.append(("pickle, whole __dict__", len(data), chrono(pickle.loads, data)[0]))
+
+    data = pickle.dumps(levels, protocol=pickle.HIGHEST_PROTOCOL)
+    results.append(("pickle, HLevel.__reduce__", len(data), chrono(pickle.loads, data)[0]))
+
+    data = serialization.encode_levels(levels)
+    results.append(("binary -> HLevel objects", len(data),
+                    chrono(lambda: list(serialization.iter_levels(data)))[0]))
+    results.append(("binary -> lists of int", len(data),
+                    chrono(lambda: list(serialization.iter_levels(data,
+                                                                  values_only=True)))[0]))
+
+    for name, size, seconds in results:
+        print("  {0:<28} {1:>10} bytes ({2:5.1f} bytes/level)   load : {3:6.3f} s".format(
+            name, size, size/number_of_levels, seconds))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_shared(number_of_levels=500000, number_of_processes=4):
+    """
+        bench_shared
+
+        <number_of_levels> levels sent to <number_of_processes> processes (spawn) :
+        list of HLevel objects (pickled) vs. SharedLevels (shared memory).
+    """
+    import multiprocessing
+
+    levels = [HLevel.fromValues(level, ".I.1.a.1.1.1")
+              for level in corpus.iter_levels(number_of_levels, fanout=100)]
+    print("{0} levels, {1} processes :".format(number_of_levels, number_of_processes))
+
+    seconds_dumps, data = chrono(pickle.dumps, levels)
+    seconds_loads, _ = chrono(pickle.loads, data)
+    tracemalloc.start()
+    pickle.loads(data)
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("  pickle       : dumps {0:5.2f} s, loads {1:5.2f} s, {2:6.1f} MiB pickled, "
+          "{3:6.1f} MiB per process".format(seconds_dumps, seconds_loads, len(data) / 1024**2,
+                                            size / 1024**2))
+    del data
+
+    seconds_publish, shared = chrono(publish_levels, levels, ".I.1.a.1.1.1")
+    with shared:
+        seconds_attach, attached = chrono(attach_levels, shared.name)
+        attached.close()
+        print("  SharedLevels : publish {0:5.2f} s, attach {1:7.5f} s, {2:6.1f} MiB shared "
+              "({3}), {4} bytes pickled".format(seconds_publish, seconds_attach,
+                                               shared.shm.size / 1024**2,
+                                               shared.typecode, len(pickle.dumps(shared))))
+
+        context = multiprocessing.get_context("spawn")
+        for name, collection in (("pickle", levels), ("SharedLevels", shared)):
+            with context.Pool(number_of_processes) as pool:
+                seconds, res = chrono(pool.map, shared_worker,
+                                      [collection] * number_of_processes, 1)
+            assert res[0][0] == sum(level[0] for level in levels)
+            print("  pool, {0:12} : {1:5.2f} s, RSS of a process {2:6.1f} MiB".format(
+                name, seconds, max(rss for _, rss in res) / 1024**2))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_sortedlevels(number_of_levels=1000000, number_of_operations=20000):
+    """
+        bench_sortedlevels
+
+        <number_of_operations> insertions, rank/select/subtree queries and
+        deletions in a collection of <number_of_levels> levels : SortedLevels vs.
+        a sorted list (bisect.insort()).
+    """
+    levels = [HLevel.fromValues(level)
+              for level in corpus.iter_levels(number_of_levels + number_of_operations,
+                                              fanout=50)]
+    random.Random(0).shuffle(levels)
+    levels, new_levels = levels[:number_of_levels], levels[number_of_levels:]
+    indexes = [random.Random(1).randrange(number_of_levels)
+               for _ in range(number_of_operations)]
+    print("{0} levels, {1} operations (us/operation) :".format(number_of_levels,
+                                                               number_of_operations))
+    print("  {0:16} {1:>9} {2:>8} {3:>8} {4:>8} {5:>8} {6:>8}".format(
+        "", "build (s)", "insert", "rank", "select", "subtree", "delete"))
+
+    def run(build, insert, rank, select, subtree, delete):
+        """
+            run : one line of results
+        """
+        seconds_build, collection = chrono(build, levels)
+        res = [seconds_build]
+        for operation, arguments in ((insert, new_levels),
+                                     (rank, new_levels),
+                                     (select, indexes),
+                                     (subtree, new_levels),
+                                     (delete, new_levels)):
+            seconds, _ = chrono(lambda: [operation(collection, argument)
+                                         for argument in arguments])
+            res.append(seconds / number_of_operations * 1e6)
+        return res
+
+    def subtree_of_list(sorted_list, level):
+        """
+            subtree_of_list : number of levels in the subtree of <level>
+        """
+        return bisect.bisect_left(sorted_list, level[:-1] + [level[-1]+1]) - \
+            bisect.bisect_left(sorted_list, level)
+
+    def delete_from_list(sorted_list, level):
+        """
+            delete_from_list : one level equal to <level> is removed
+        """
+        del sorted_list[bisect.bisect_left(sorted_list, level)]
+
+    for name, res in (("sorted list", run(sorted, bisect.insort, bisect.bisect_left,
+                                          operator.getitem, subtree_of_list,
+                                          delete_from_list)),
+                      ("SortedLevels", run(SortedLevels, SortedLevels.add, SortedLevels.rank,
+                                           SortedLevels.__getitem__,
+                                           SortedLevels.countSubtree, SortedLevels.remove))):
+        print("  {0:16} {1:9.2f} {2:8.2f} {3:8.2f} {4:8.2f} {5:8.2f} {6:8.2f}".format(name,
+                                                                                   *res))
+
+#///////////////////////////////////////////////////////////////////////////////
+def bench_sqlite(number_of_rows=1000000, number_of_queries=1000):
+    """
+        bench_sqlite
+
+        Indexed range queries on a local sqlite file storing <number_of_rows> levels
+        (see hlevel/sqlite.py).
+    """
+    print("sqlite, {0} rows :".format(number_of_rows))
+
+    rand = random.Random(0)
+    formatstr = ".(1.1.1.1)"
+
+    handle, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(handle)
+    try:
+        connection = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        register_sqlite(connection, formatstr=formatstr)
+        connection.execute("CREATE TABLE sections (level HLEVEL, text TEXT)")
+
+        rows = ((HLevel.fromValues([rand.randint(1, 50)
+                                    for _ in range(rand.randint(1, 4))], formatstr),
+                 "lorem ipsum")
+                for _ in range(number_of_rows))
+        seconds, _ = chrono(connection.executemany,
+                            "INSERT INTO sections VALUES (?, ?)", rows)
+        print("  insert                       : {0:8.3f} s".format(seconds))
+
+        seconds, _ = chrono(connection.execute,
+                            "CREATE INDEX sections_level ON sections (level)")
+        print("  index creation               : {0:8.3f} s".format(seconds))
+        connection.commit()
+
+        # subtree of a random level of depth 2 : (a.b) <= level < (a.b+1)
+        bounds = [subtree_bounds((rand.randint(1, 50), rand.randint(1, 50)))
+                  for _ in range(number_of_queries)]
+        start = time.perf_counter()
+        found = 0
+        for low, high in bounds:
+            found += connection.execute("SELECT COUNT(*) FROM sections "
+                                        "WHERE level >= ? AND level < ?",
+                                        (low, high)).fetchone()[0]
+        seconds = time.perf_counter() - start
+        print("  subtree COUNT(*), indexed    : {0:8.1f} us/query "
+              "({1:.0f} rows/query)".format(seconds/number_of_queries*1e6,
+                                            found/number_of_queries))
+
+        start = time.perf_counter()
+        found = 0
+        for low, high in bounds:
+            found += len(connection.execute("SELECT level FROM sections "
+                                            "WHERE level >= ? AND level < ? "
+                                            "ORDER BY level",
+                                            (low, high)).fetchall())
+        seconds = time.perf_counter() - start
+        print("  subtree SELECT -> HLevel     : {0:8.1f} us/query, "
+              "{1:.2f} us/row".format(seconds/number_of_queries*1e6,
+                                      seconds/max(found, 1)*1e6))
+        connection.close()
+    finally:
+        os.remove(path)
+
+BENCHMARKS = {"bulk" : bench_bulk,
+              "cache" : bench_cache,
+              "compare" : bench_compare,
+              "endtoend" : bench_endtoend,
+              "extsort" : bench_extsort,
+              "index" : bench_index,
+              "merge" : bench_merge,
+              "nodes" : bench_nodes,
+              "numerals" : bench_numerals,
+              "outline" : bench_outline,
+              "packed" : bench_packed,
+              "range" : bench_range,
+              "rollup" : bench_rollup,
+              "scanner" : bench_scanner,
+              "serialization" : bench_serialization,
+              "shared" : bench_shared,
+              "sortedlevels" : bench_sortedlevels,
+              "sqlite" : bench_sqlite,
+             }
+
+#///////////////////////////////////////////////////////////////////////////////
+if __name__ == '__main__':
+    for benchmark_name in (sys.argv[1:] or BENCHMARKS):
+        BENCHMARKS[benchmark_name]()
@@ -0,0 +1,283 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/bulk.py
+
+    * parse_positional() : reading of a whole buffer of levels by NumPy
+
+    The buffer contains one level by line ("\\n", a final "\\r" being ignored),
+    all of them written with the same format string, whose numbers are all
+    positional ("1", "１", "¹", "₁", "١", "१"...). Instead of reading the levels
+    one by one, the characters of the buffer are read as an array of code points :
+    the separators, the digits and the signs are found and the numbers are
+    computed by array operations.
+
+    The result, BulkLevels(values, depths, valid), is made of NumPy arrays :
+        values  : int64, shape (number of lines, maximal depth), the missing
+                  numbers being -1 (see sortkey.pack_array()); with a signed
+                  format, use <depths> to know the real length of a level.
+        depths  : int64, number of numbers of each level
+        valid   : bool, False for a line which can't be read : no exception is
+                  raised, the row of <values> being filled with -1 and its depth
+                  being 0.
+
+    A line is valid if and only if HLevel.try_parse(allow_empty=True) reads it,
+    but for the numbers too great for an int64 (more than 18 decimal digits),
+    which are flagged as invalid : the empty level ("()" for ".(1.1)") is valid,
+    its depth being 0.
+
+    NumPy is required, imported by parse_positional().
+
+    How it works :
+        with open("levels.txt", "rb") as levels:
+            res = parse_positional(levels.read(), ".(1.1.1)")
+        res.values[res.valid]
+"""
+
+import collections
+
+from hlevel.errors import FormatError
+from hlevel.hlevel import HLevel
+from hlevel import numberformat
+
+BulkLevels = collections.namedtuple("BulkLevels", ("values", "depths", "valid"))
+
+# number of characters read at once by parse_positional() : each of them costs
+# about 100 bytes of temporary arrays.
+CHUNK_SIZE = 1024**2
+
+#///////////////////////////////////////////////////////////////////////////////
+def parse_positional(buffer, formatstr=None, encoding="utf-8", chunk_size=CHUNK_SIZE):
+    """
+        parse_positional
+
+        buffer          : (str) or (bytes) levels separated by "\\n"
+        formatstr       : (str) or None for HLevel.defaultformat; all the numbers
+                          must be positional
+        encoding        : (str) encoding of <buffer> if <buffer> is a bytes object
+        chunk_size      : (int) number of characters read at once
+
+        Return a BulkLevels(values, depths, valid) object, see the documentation of
+        the module; a final "\\n" doesn't add an empty line.
+    """
+    import numpy
+
+    if formatstr is None:
+        formatstr = HLevel.defaultformat
+    separator, prefix, suffix, numbers_format = HLevel.compileFormat(formatstr)
+    number_formats = [numberformat.get_format(symbol) for symbol in numbers_format]
+    for number_format in number_formats:
+        if number_format.rule != "positional":
+            raise FormatError("(bulk.parse_positional) '{0}' is not a positional format ({1})",
+                              number_format.symbol, formatstr)
+
+    symbols = list(dict.fromkeys(number_format.symbol for number_format in number_formats))
+    tables = [_get_tables(numpy, numberformat.get_format(symbol)) for symbol in symbols]
+    column_formats = numpy.array([symbols.index(symbol) for symbol in numbers_format] +
+                                 [len(symbols)])
+
+    if isinstance(buffer, (bytes, bytearray, memoryview)):
+        buffer = bytes(buffer)
+        if buffer.isascii() and "a".encode(encoding) == b"a" and \
+           "\n".encode(encoding) == b"\n":
+            codes = numpy.frombuffer(buffer, dtype=numpy.uint8)
+        else:
+            buffer = buffer.decode(encoding)
+            codes = numpy.frombuffer(buffer.encode("utf-32-le"), dtype=numpy.uint32)
+    elif buffer.isascii():
+        codes = numpy.frombuffer(buffer.encode("ascii"), dtype=numpy.uint8)
+    else:
+        codes = numpy.frombuffer(buffer.encode("utf-32-le"), dtype=numpy.uint32)
+
+    # the chunks end with a line :
+    results = []
+    start = 0
+    while start < len(codes):
+        end = min(start + chunk_size, len(codes))
+        if end < len(codes):
+            newlines = numpy.flatnonzero(codes[end:] == 0x0A)
+            end = len(codes) if not len(newlines) else end + int(newlines[0]) + 1
+        results.append(_parse_chunk(numpy, codes[start:end],
+                                    separator, prefix, suffix, tables, column_formats))
+        start = end
+
+    if not results:
+        return BulkLevels(numpy.zeros((0, 0), dtype=numpy.int64),
+                          numpy.zeros(0, dtype=numpy.int64),
+                          numpy.zeros(0, dtype=bool))
+
+    depth = max(res.values.shape[1] for res in results)
+    values = numpy.full((sum(len(res.depths) for res in results), depth), -1,
+                        dtype=numpy.int64)
+    row = 0
+    for res in results:
+        values[row:row+len(res.depths), :res.values.shape[1]] = res.values
+        row += len(res.depths)
+    return BulkLevels(values,
+                      numpy.concatenate([res.depths for res in results]),
+                      numpy.concatenate([res.valid for res in results]))
+
+#///////////////////////////////////////////////////////////////////////////////
+def _get_tables(numpy, number_format):
+    """
+        _get_tables
+
+        numpy           : the numpy module
+        number_format   : numberformat.NumberFormat object, positional
+
+        Return (digits, powers, (bool)signed) :
+            digits      : numpy array {code point : value of the digit or -1}, the
+                          last item being -1 (code points out of the table)
+            powers      : numpy.int64 array base**0, base**1, ... : a number has at
+                          most len(powers) digits
+    """
+    digits = numpy.full(max(map(ord, number_format.symbols)) + 2, -1, dtype=numpy.int64)
+    for char, value in number_format.decode_table.items():
+        digits[ord(char)] = value
+
+    powers = [1]
+    while powers[-1] * number_format.base**2 <= 2**63:
+        powers.append(powers[-1] * number_format.base)
+    return (digits, numpy.array(powers, dtype=numpy.int64), number_format.signed)
+
+#///////////////////////////////////////////////////////////////////////////////
+def _parse_chunk(numpy, codes, separator, prefix, suffix, tables, column_formats):
+    """
+        _parse_chunk
+
+        numpy           : the numpy module
+        codes           : numpy array of code points, whole lines
+        separator, prefix, suffix : (str) see HLevel.compileFormat()
+        tables          : see _get_tables(), for each number format
+        column_formats  : numpy array, index in <tables> of the format of each
+                          number, len(tables) at the end
+
+        Return the BulkLevels object of the lines in <codes>.
+    """
+    int64 = numpy.int64
+    # uint8 (ASCII) -> uint32, the chunk being compared with any code point :
+    codes = codes.astype(numpy.uint32, copy=False)
+    len_codes = len(codes)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # lines :
+    is_newline = codes == 0x0A
+    newlines = numpy.flatnonzero(is_newline)
+    starts = numpy.concatenate(([0], newlines + 1))
+    ends = numpy.concatenate((newlines, [len_codes]))
+    if len_codes and codes[-1] == 0x0A:
+        starts, ends = starts[:-1], ends[:-1]
+    number_of_lines = len(starts)
+    last = max(len_codes - 1, 0)
+
+    ends = ends - ((ends > starts) & (codes[numpy.clip(ends - 1, 0, last)] == 0x0D))
+
+    # prefix and suffix :
+    valid = ends - starts >= len(prefix) + len(suffix)
+    for index, char in enumerate(prefix):
+        valid &= codes[numpy.clip(starts + index, 0, last)] == ord(char)
+    for index, char in enumerate(suffix):
+        valid &= codes[numpy.clip(ends - len(suffix) + index, 0, last)] == ord(char)
+    starts = starts + len(prefix)
+    ends = ends - len(suffix)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # the characters of the numbers, i.e. between the prefix and the suffix :
+    nonempty = valid & (ends > starts)
+    delta = numpy.zeros(len_codes + 1, dtype=numpy.int8)
+    delta[starts[nonempty]] = 1
+    delta[ends[nonempty]] -= 1
+    positions = numpy.flatnonzero(numpy.cumsum(delta[:-1]))
+    chars = codes[positions]
+    lines = (numpy.cumsum(is_newline) - is_newline)[positions]
+
+    is_separator = chars == ord(separator)
+    first_of_line = numpy.ones(len(chars), dtype=bool)
+    first_of_line[1:] = lines[1:] != lines[:-1]
+    first_of_number = first_of_line.copy()
+    first_of_number[1:] |= is_separator[:-1]
+
+    # index of the number of each character in its level :
+    separators_before = numpy.cumsum(is_separator) - is_separator
+    line_firsts = numpy.flatnonzero(first_of_line)
+    columns = separators_before - numpy.repeat(separators_before[line_firsts],
+                                               numpy.diff(numpy.append(line_firsts,
+                                                                       len(chars))))
+
+    depths = numpy.zeros(number_of_lines, dtype=int64)
+    depths[lines[line_firsts]] = \
+        numpy.add.reduceat(is_separator, line_firsts).astype(int64) + 1 \
+        if len(line_firsts) else 0
+    valid &= depths < len(column_formats)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # digits and signs, the number formats being read one by one; index of the
+    # format of each character, len(tables) after the last number of the format :
+    char_formats = column_formats[numpy.minimum(columns, len(column_formats) - 1)]
+    in_formats = [char_formats == format_index for format_index in range(len(tables))]
+
+    digits = numpy.full(len(chars), -1, dtype=int64)
+    minus = numpy.zeros(len(chars), dtype=bool)
+    for in_format, (table, _, signed) in zip(in_formats, tables):
+        found = table[numpy.minimum(chars, len(table) - 1)]
+        numpy.copyto(digits, found, where=in_format)
+        if signed:
+            minus |= in_format & first_of_number & (chars == ord("-"))
+
+    is_digit = digits >= 0
+    wrong = ~(is_digit | is_separator | minus)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # numbers : value = Σ digit * base**(number of digits after it)
+    number_firsts = numpy.flatnonzero(first_of_number)
+    numbers = numpy.cumsum(first_of_number) - 1
+    digits_count = numpy.add.reduceat(is_digit, number_firsts).astype(int64) \
+                   if len(number_firsts) else numpy.zeros(0, dtype=int64)
+    digits_before = numpy.cumsum(is_digit) - is_digit
+    digits_after = digits_count[numbers] - 1 - \
+                   (digits_before - digits_before[number_firsts][numbers])
+    wrong |= digits_count[numbers] == 0
+    # "1." : empty last number
+    line_lasts = numpy.append(line_firsts[1:], len(chars))[:len(line_firsts)] - 1
+    wrong_lines = lines[line_lasts[is_separator[line_lasts]]]
+
+    terms = numpy.zeros(len(chars), dtype=int64)
+    for in_format, (_, powers, _) in zip(in_formats, tables):
+        # numbers too great for an int64 :
+        wrong |= in_format & (digits_after >= len(powers))
+        in_format &= is_digit & ~wrong
+        numpy.copyto(terms, digits * powers[numpy.clip(digits_after, 0, len(powers) - 1)],
+                     where=in_format)
+    number_values = numpy.add.reduceat(terms, number_firsts) if len(number_firsts) else terms
+    if minus.any():
+        number_values[numpy.add.reduceat(minus, number_firsts) > 0] *= -1
+
+    valid[lines[wrong]] = False
+    valid[wrong_lines] = False
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    depths[~valid] = 0
+    values = numpy.full((number_of_lines, int(depths.max()) if number_of_lines else 0), -1,
+                        dtype=int64)
+    number_lines = lines[number_firsts]
+    kept = valid[number_lines]
+    values[number_lines[kept], columns[number_firsts][kept]] = number_values[kept]
+    return BulkLevels(values, depths, valid)
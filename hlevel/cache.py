@@ -0,0 +1,378 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/cache.py
+
+    * FrozenHLevel class : immutable (hashable) level
+    * InternPool class : one FrozenHLevel object for each level
+    * ParseCache class : bounded cache {level string : level}, for one format
+
+    In a real corpus, a few thousand strings ("1.1", "(II.a)"...) make most of
+    the occurrences : a ParseCache reads each of them once and, with an
+    InternPool, all the occurrences of a level share one FrozenHLevel object.
+
+    The pool only keeps weak references : a FrozenHLevel object is deleted when
+    nobody uses it any more. The cache keeps (strong references) the <maxsize>
+    most recently used strings, the strings which can't be read included.
+
+    HLevel objects are mutable : ParseCache.tryParse() returns a new HLevel
+    object each time (the string is read only once, however).
+
+    The caches are cleared by numberformat.register_format().
+
+    How it works :
+        cache = ParseCache(".(I.a)", maxsize=10000)
+        for src in references:
+            level = cache.tryParseFrozen(src)    # FrozenHLevel object or None
+        cache.info()    # CacheInfo(hits=..., misses=..., maxsize=10000, size=...)
+"""
+
+import collections
+import weakref
+
+from hlevel.hlevel import HLevel
+from hlevel import numberformat
+
+CacheInfo = collections.namedtuple("CacheInfo", ("hits", "misses", "maxsize", "size"))
+
+# ParseCache objects, cleared by clear_parse_caches() :
+_CACHES = weakref.WeakSet()
+
+################################################################################
+class FrozenHLevel(object):
+    """
+        class FrozenHLevel
+
+        An immutable level : its (tuple) values, its format string and its first
+        number. It compares like HLevel objects (i.e. like its values), with the
+        other FrozenHLevel objects and with HLevel objects.
+    """
+    __slots__ = ("values", "formatstr", "first_number", "__weakref__")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, values, formatstr=None, first_number=1):
+        """
+                FrozenHLevel.__init__
+
+                values          : iterable of (int), e.g. a HLevel object
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+        """
+        object.__setattr__(self, "values", tuple(values))
+        object.__setattr__(self, "formatstr",
+                           HLevel.defaultformat if formatstr is None else formatstr)
+        object.__setattr__(self, "first_number", first_number)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __eq__(self, other):
+        """
+                FrozenHLevel.__eq__
+        """
+        if self is other:
+            return True
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values == other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __ge__(self, other):
+        """
+                FrozenHLevel.__ge__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values >= other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __getitem__(self, index):
+        """
+                FrozenHLevel.__getitem__
+        """
+        return self.values[index]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __gt__(self, other):
+        """
+                FrozenHLevel.__gt__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values > other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __hash__(self):
+        """
+                FrozenHLevel.__hash__
+        """
+        return hash(self.values)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __iter__(self):
+        """
+                FrozenHLevel.__iter__
+        """
+        return iter(self.values)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __le__(self, other):
+        """
+                FrozenHLevel.__le__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values <= other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __len__(self):
+        """
+                FrozenHLevel.__len__
+        """
+        return len(self.values)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __lt__(self, other):
+        """
+                FrozenHLevel.__lt__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values < other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __ne__(self, other):
+        """
+                FrozenHLevel.__ne__
+        """
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __reduce__(self):
+        """
+                FrozenHLevel.__reduce__
+        """
+        return (FrozenHLevel, (self.values, self.formatstr, self.first_number))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __repr__(self):
+        """
+                FrozenHLevel.__repr__
+        """
+        return "(FrozenHLevel) " + str(self)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __setattr__(self, name, value):
+        """
+                FrozenHLevel.__setattr__
+        """
+        raise AttributeError("FrozenHLevel objects are immutable")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __str__(self):
+        """
+                FrozenHLevel.__str__
+        """
+        return self.toHLevel().getRepr()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getComparedValues(self, other):
+        """
+                FrozenHLevel.getComparedValues
+
+                other   : FrozenHLevel object, HLevel object or list
+
+                Return the (tuple) values of <other>, compared with self.values,
+                or None if <other> can't be compared with a FrozenHLevel object.
+        """
+        if isinstance(other, FrozenHLevel):
+            return other.values
+        if isinstance(other, list):
+            return tuple(other)
+        return None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def toHLevel(self):
+        """
+                FrozenHLevel.toHLevel
+
+                Return a new (mutable) HLevel object.
+        """
+        return HLevel.fromValues(self.values, self.formatstr, self.first_number)
+
+################################################################################
+class InternPool(object):
+    """
+        class InternPool
+
+        Interned FrozenHLevel objects, weakly referenced.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self):
+        """
+                InternPool.__init__
+        """
+        # {(formatstr, first_number, values) : FrozenHLevel object}
+        self.levels = weakref.WeakValueDictionary()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __len__(self):
+        """
+                InternPool.__len__
+
+                Return the number of FrozenHLevel objects still alive.
+        """
+        return len(self.levels)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def intern(self, values, formatstr=None, first_number=1):
+        """
+                InternPool.intern
+
+                values          : iterable of (int), e.g. a HLevel object
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+
+                Return the FrozenHLevel object of <values>, created if it doesn't
+                exist.
+        """
+        values = tuple(values)
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        key = (formatstr, first_number, values)
+        level = self.levels.get(key)
+        if level is None:
+            level = self.levels[key] = FrozenHLevel(values, formatstr, first_number)
+        return level
+
+################################################################################
+class ParseCache(object):
+    """
+        class ParseCache
+
+        Bounded cache {level string : FrozenHLevel object or None} for one format,
+        the least recently used string being forgotten first.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, formatstr=None, first_number=1, maxsize=65536, pool=None):
+        """
+                ParseCache.__init__
+
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+                maxsize         : (int) maximal number of strings
+                pool            : InternPool object or None for a new pool
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        HLevel.compileFormat(formatstr)     # a wrong <formatstr> raises a FormatError
+
+        self.formatstr = formatstr
+        self.first_number = first_number
+        self.maxsize = maxsize
+        self.pool = InternPool() if pool is None else pool
+
+        self.levels = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        _CACHES.add(self)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def clear(self):
+        """
+                ParseCache.clear
+
+                Forget all the strings and reset the statistics.
+        """
+        self.levels.clear()
+        self.hits = 0
+        self.misses = 0
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getHitRate(self):
+        """
+                ParseCache.getHitRate
+
+                Return the (float) proportion of the strings found in the cache.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    #///////////////////////////////////////////////////////////////////////////
+    def info(self):
+        """
+                ParseCache.info
+
+                Return a CacheInfo(hits, misses, maxsize, size) object.
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.levels))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def tryParse(self, src):
+        """
+                ParseCache.tryParse
+
+                src     : (str)
+
+                Return a new HLevel object read from <src> or None, like
+                HLevel.try_parse().
+        """
+        level = self.tryParseFrozen(src)
+        return None if level is None else level.toHLevel()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def tryParseFrozen(self, src):
+        """
+                ParseCache.tryParseFrozen
+
+                src     : (str)
+
+                Return the (interned) FrozenHLevel object read from <src> or None if
+                <src> can't be read.
+        """
+        levels = self.levels
+        try:
+            level = levels[src]
+        except KeyError:
+            pass
+        else:
+            levels.move_to_end(src)
+            self.hits += 1
+            return level
+
+        self.misses += 1
+        hlevel = HLevel.try_parse(src, self.formatstr, self.first_number)
+        level = None if hlevel is None else self.pool.intern(hlevel, self.formatstr,
+                                                             self.first_number)
+        levels[src] = level
+        if len(levels) > self.maxsize:
+            levels.popitem(last=False)
+        return level
+
+#///////////////////////////////////////////////////////////////////////////////
+def clear_parse_caches():
+    """
+        clear_parse_caches
+
+        Clear all the ParseCache objects : called when a number format is
+        registered, the strings being read differently.
+    """
+    for cache in list(_CACHES):
+        cache.clear()
+
+numberformat.REGISTRATION_HOOKS.append(clear_parse_caches)
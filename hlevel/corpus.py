@@ -0,0 +1,286 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/corpus.py
+
+    * synthetic outlines, documents and lists of references, for the tests and
+      the benchmarks (see bench.py)
+
+    Everything is computed from a seed : the same arguments give the same
+    corpus, on any computer, without any download.
+
+        iter_levels()           levels of an outline (depth, fan-out)
+        iter_references()       level strings in random order, with duplicates and
+                                (noise) wrong strings
+        iter_document()         lines of a document : headings, paragraphs quoting
+                                references, (noise) wrong headings
+        write_document()        iter_document() written in a file
+        iter_zipf()             skewed (Zipfian) sample of a list of strings
+
+    How it works :
+        formatstr = make_formatstr("I", depth=4, prefix="§")    # ".§I.I.I.I"
+        for line in iter_document(formatstr, size=10**6, seed=1, noise=0.01):
+            ...
+"""
+
+import bisect
+import itertools
+import random
+
+from hlevel.hlevel import HLevel
+from hlevel import numberformat
+
+# the formats known since the first versions of HLevel :
+CLASSIC_SYMBOLS = ("1", "I", "i", "A", "a", "①", "一", "¹", "₁", "１", "α", "Α")
+
+# characters inserted by corrupt() :
+NOISE_CHARS = "#?*~"
+
+#///////////////////////////////////////////////////////////////////////////////
+def corrupt(src, rand):
+    """
+        corrupt
+
+        src     : (str)
+        rand    : random.Random object
+
+        Return <src> with one character removed, doubled or replaced by one of
+        NOISE_CHARS.
+    """
+    if not src:
+        return rand.choice(NOISE_CHARS)
+    index = rand.randrange(len(src))
+    action = rand.randrange(3)
+    if action == 0:
+        return src[:index] + src[index+1:]
+    if action == 1:
+        return src[:index] + src[index] + src[index:]
+    return src[:index] + rand.choice(NOISE_CHARS) + src[index+1:]
+
+#///////////////////////////////////////////////////////////////////////////////
+def get_max_value(symbol):
+    """
+        get_max_value
+
+        symbol  : (str) symbol of a number format
+
+        Return the (int) greatest number which can be written with the format
+        <symbol>, None if there's no limit.
+    """
+    number_format = numberformat.get_format(symbol)
+    if number_format.rule == "enumerated":
+        return max(number_format.values)
+    if number_format.rule == "additive":
+        return 3999
+    return None
+
+#///////////////////////////////////////////////////////////////////////////////
+def make_formatstr(symbols, depth, separator=".", prefix="", suffix=""):
+    """
+        make_formatstr
+
+        symbols         : (str) one symbol (the same format for all the numbers) or
+                          <depth> symbols
+        depth           : (int) number of numbers
+        separator, prefix, suffix : (str)
+
+        Return a format string, e.g. make_formatstr("I", 3, prefix="(", suffix=")")
+        -> ".(I.I.I)"
+    """
+    if len(symbols) == 1:
+        symbols = symbols*depth
+    return separator + prefix + separator.join(symbols[:depth]) + suffix
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_levels(number_of_levels, max_depth=6, fanout=None, seed=0, max_value=None):
+    """
+        iter_levels
+
+        number_of_levels        : (int)
+        max_depth               : (int)
+        fanout                  : None or (int) maximal number of children of a level
+        seed                    : seed of the random.Random object
+        max_value               : None or (int) greatest number, see get_max_value()
+
+        Yield <number_of_levels> (list of int) levels of an outline, most of them
+        being deep (articles, paragraphs...) : each level is the next sibling, the
+        first child or the next sibling of an ancestor of the previous one. If the
+        first level (depth = 1) can't go further (fan-out, maximal value), the
+        numbering starts again from 1 : levels are repeated.
+    """
+    rand = random.Random(seed)
+    limit = min(fanout or float("inf"), max_value or float("inf"))
+    depths = [depth for depth in range(1, max_depth+1) for _ in range(depth*depth)]
+
+    level = []
+    for _ in range(number_of_levels):
+        depth = rand.choice(depths)
+        if depth > len(level):
+            level = level + [1]
+        else:
+            level = level[:depth]
+            while level[-1] >= limit and len(level) > 1:
+                level.pop()
+            level[-1] = level[-1] + 1 if level[-1] < limit else 1
+        yield level
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_references(formatstr,
+                    number_of_references,
+                    seed=0,
+                    fanout=20,
+                    noise=0.0,
+                    duplicates=0.2,
+                    first_number=1):
+    """
+        iter_references
+
+        formatstr               : (str)
+        number_of_references    : (int)
+        seed                    : seed of the random.Random object
+        fanout                  : None or (int), see iter_levels()
+        noise                   : (float) proportion of wrong strings
+        duplicates              : (float) proportion of strings already yielded
+        first_number            : (int) see HLevel.__init__()
+
+        Yield <number_of_references> (str) level strings written with <formatstr>,
+        in random order.
+    """
+    rand = random.Random(seed)
+    numbers_format = HLevel.compileFormat(formatstr)[3]
+    max_value = min(get_max_value(symbol) or float("inf") for symbol in numbers_format)
+    levels = iter_levels(number_of_references, len(numbers_format), fanout, rand.random(),
+                         max_value)
+    yielded = []
+    for level in levels:
+        if yielded and rand.random() < duplicates:
+            src = rand.choice(yielded)
+        else:
+            # random order : a level near the current one of the outline
+            level = [min(value + rand.randint(0, 2), max_value) if rand.random() < 0.3
+                     else value
+                     for value in level]
+            src = str(HLevel.fromValues(level, formatstr, first_number))
+            if len(yielded) < 10000:
+                yielded.append(src)
+            else:
+                yielded[rand.randrange(len(yielded))] = src
+        yield corrupt(src, rand) if rand.random() < noise else src
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_document(formatstr,
+                  size,
+                  seed=0,
+                  fanout=20,
+                  noise=0.0,
+                  references=0.3,
+                  first_number=1):
+    """
+        iter_document
+
+        formatstr       : (str)
+        size            : (int) number of characters of the document
+        seed            : seed of the random.Random object
+        fanout          : None or (int), see iter_levels()
+        noise           : (float) proportion of wrong headings
+        references      : (float) proportion of paragraphs quoting a level
+        first_number    : (int) see HLevel.__init__()
+
+        Yield the (str) lines ("\\n" included) of a document of about <size>
+        characters : headings written with <formatstr>, each followed by 1 to 8
+        paragraphs of lower case words.
+    """
+    rand = random.Random(seed)
+    words = ["".join(rand.choice("abcdefghijklmnopqrstuvwxyz")
+                     for _ in range(rand.randint(2, 9)))
+             for _ in range(1000)]
+    paragraphs = [" ".join(rand.choice(words) for _ in range(rand.randint(10, 40)))
+                  for _ in range(200)]
+    numbers_format = HLevel.compileFormat(formatstr)[3]
+    max_value = min(get_max_value(symbol) or float("inf") for symbol in numbers_format)
+
+    written = 0
+    previous = []
+    for level in iter_levels(size, len(numbers_format), fanout, rand.random(), max_value):
+        heading = str(HLevel.fromValues(level, formatstr, first_number))
+        if rand.random() < noise:
+            heading = corrupt(heading, rand)
+        line = heading + " " + rand.choice(words).capitalize() + "\n"
+        written += len(line)
+        yield line
+
+        for _ in range(rand.randint(1, 8)):
+            line = rand.choice(paragraphs)
+            if previous and rand.random() < references:
+                line += ", see " + rand.choice(previous) + "."
+            line += "\n"
+            written += len(line)
+            yield line
+
+        previous.append(heading)
+        if len(previous) > 100:
+            previous.pop(0)
+        if written >= size:
+            return
+
+#///////////////////////////////////////////////////////////////////////////////
+def write_document(path, formatstr, size, encoding="utf-8", **kwargs):
+    """
+        write_document
+
+        path            : (str)
+        formatstr       : (str)
+        size            : (int) see iter_document()
+        encoding        : (str)
+        kwargs          : see iter_document()
+
+        Write the document and return its size in bytes.
+    """
+    with open(path, "w", encoding=encoding) as document:
+        lines = []
+        for line in iter_document(formatstr, size, **kwargs):
+            lines.append(line)
+            if len(lines) == 10000:
+                document.write("".join(lines))
+                lines = []
+        document.write("".join(lines))
+        return document.tell()
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_zipf(population, number_of_items, seed=0, exponent=1.0):
+    """
+        iter_zipf
+
+        population      : (list) e.g. distinct level strings
+        number_of_items : (int)
+        seed            : seed of the random.Random object
+        exponent        : (float) the greater, the more skewed
+
+        Yield <number_of_items> items of <population>, the k-th one being chosen
+        with a probability proportional to 1/k**<exponent> : a few items make most
+        of the sample, like the headings "1", "1.1"... in a corpus.
+    """
+    rand = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1 / rank**exponent
+                                            for rank in range(1, len(population)+1)))
+    total = cum_weights[-1]
+    for _ in range(number_of_items):
+        yield population[bisect.bisect(cum_weights, rand.random() * total)]
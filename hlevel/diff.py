@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/diff.py
+
+    * diff between two versions of an outline
+
+    Both versions are sorted iterables whose items are :
+        - HLevel objects,
+        - level strings (read with <formatstr>),
+        - (level, text) pairs, <level> being a HLevel object or a string,
+    or mappings {level string : text}, iterated in sorted order.
+
+    The two versions are merged in O(n + m), one item at a time : they are never
+    loaded in memory. The edit script is made of Edit objects :
+
+        Edit.operation  = "added"       (new_level, new_text)
+                          "removed"     (old_level, old_text)
+                          "changed"     same level, different texts
+                          "renumbered"  same text, old_level -> new_level
+                          "equal"       only if include_equal is True
+
+    Renumbered sections are found by looking for the same text among the last
+    <window> unmatched sections : memory stays O(window).
+
+    How it works :
+        for edit in diff_levels(old_version, new_version, formatstr=".1.1.1"):
+            print(edit.operation, edit.old_level, edit.new_level)
+"""
+
+import collections
+
+from hlevel.errors import HLevelError
+from hlevel.hlevel import HLevel
+
+Edit = collections.namedtuple("Edit",
+                              ("operation", "old_level", "new_level", "old_text", "new_text"))
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_sections(version, formatstr=None):
+    """
+        iter_sections
+
+        version         : see the documentation of the module
+        formatstr       : (str) format of the level strings; if None, the format of
+                          each string is guessed by HLevel.detect()
+
+        Yield (HLevel object, text or None), checking that <version> is sorted.
+    """
+    if hasattr(version, "items"):
+        version = version.items()
+
+    previous = None
+    for item in version:
+        if isinstance(item, (HLevel, str)):
+            level, text = item, None
+        else:
+            level, text = item
+
+        if isinstance(level, str):
+            level = HLevel(src=level,
+                           formatstr=HLevel.detect(level) if formatstr is None else formatstr)
+
+        if previous is not None and level < previous:
+            msg = "(diff.iter_sections) the levels aren't sorted : {0} is after {1}."
+            raise HLevelError(msg, list(level), list(previous))
+        previous = level
+
+        yield (level, text)
+
+#///////////////////////////////////////////////////////////////////////////////
+def diff_levels(old, new, formatstr=None, window=64, include_equal=False):
+    """
+        diff_levels
+
+        old, new        : the two versions of the outline, see the documentation of
+                          the module
+        formatstr       : (str) see iter_sections()
+        window          : (int) maximal number of unmatched sections kept in memory,
+                          on each side, to find renumbered sections
+        include_equal   : (bool) if True, identical sections are yielded too
+
+        Yield the Edit objects transforming <old> into <new>. Without any text,
+        a section can't be recognized once renumbered : only "added", "removed"
+        (and "equal") edits are yielded.
+    """
+    removed = _PendingSections(is_removed=True)
+    added = _PendingSections(is_removed=False)
+
+    old = iter_sections(old, formatstr)
+    new = iter_sections(new, formatstr)
+    old_section = next(old, None)
+    new_section = next(new, None)
+
+    while old_section is not None or new_section is not None:
+
+        if new_section is None or (old_section is not None and old_section[0] < new_section[0]):
+            yield from _remove_or_renumber(old_section, removed, added)
+            old_section = next(old, None)
+
+        elif old_section is None or new_section[0] < old_section[0]:
+            yield from _add_or_renumber(new_section, removed, added)
+            new_section = next(new, None)
+
+        else:
+            # same level :
+            if old_section[1] == new_section[1]:
+                if include_equal:
+                    yield Edit("equal", old_section[0], new_section[0],
+                               old_section[1], new_section[1])
+            else:
+                partners = []
+                yield from _remove_or_renumber(old_section, removed, added, partners)
+                yield from _add_or_renumber(new_section, removed, added, partners)
+                if len(partners) == 2:
+                    partners[0].partner = partners[1]
+                    partners[1].partner = partners[0]
+
+            old_section = next(old, None)
+            new_section = next(new, None)
+
+        yield from removed.evict(window)
+        yield from added.evict(window)
+
+    yield from removed.evict(0)
+    yield from added.evict(0)
+
+#///////////////////////////////////////////////////////////////////////////////
+def _remove_or_renumber(section, removed, added, partners=None):
+    """
+        _remove_or_renumber
+
+        section         : (HLevel object, text) removed from the old version
+        removed, added  : _PendingSections objects
+        partners        : None or list where the new _PendingSection is appended
+
+        Yield a "renumbered" edit if a pending added section has the same text,
+        a "removed" edit if <section> has no text.
+    """
+    level, text = section
+    if text is None:
+        yield Edit("removed", level, None, None, None)
+        return
+
+    match = added.pop(text)
+    if match is not None:
+        yield Edit("renumbered", level, match.level, text, text)
+    else:
+        pending = removed.push(level, text)
+        if partners is not None:
+            partners.append(pending)
+
+#///////////////////////////////////////////////////////////////////////////////
+def _add_or_renumber(section, removed, added, partners=None):
+    """
+        _add_or_renumber
+
+        section         : (HLevel object, text) added in the new version
+        removed, added  : _PendingSections objects
+        partners        : None or list where the new _PendingSection is appended
+
+        Yield a "renumbered" edit if a pending removed section has the same text,
+        an "added" edit if <section> has no text.
+    """
+    level, text = section
+    if text is None:
+        yield Edit("added", None, level, None, None)
+        return
+
+    match = removed.pop(text)
+    if match is not None:
+        yield Edit("renumbered", match.level, level, text, text)
+    else:
+        pending = added.push(level, text)
+        if partners is not None:
+            partners.append(pending)
+
+################################################################################
+class _PendingSection(object):
+    """
+        class _PendingSection
+
+        A section removed from (or added to) the outline, waiting for a section
+        added (or removed) with the same text.
+    """
+
+    __slots__ = ("level", "text", "owner", "alive", "partner")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, level, text, owner):
+        """
+                _PendingSection.__init__
+
+                level   : HLevel object
+                text    : (str)
+                owner   : _PendingSections object storing <self>
+        """
+        self.level = level
+        self.text = text
+        self.owner = owner
+        self.alive = True
+
+        # section with the same level on the other side, if any :
+        self.partner = None
+
+################################################################################
+class _PendingSections(object):
+    """
+        class _PendingSections
+
+        Removed (or added) sections waiting for a match, in arrival order.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, is_removed):
+        """
+                _PendingSections.__init__
+
+                is_removed      : (bool) True for the removed sections, False for
+                                  the added ones
+        """
+        self.is_removed = is_removed
+        self.fifo = collections.deque()     # _PendingSection objects, in arrival order
+        self.by_text = {}                   # text : deque of _PendingSection objects
+        self.alive = 0                      # number of alive sections in self.fifo
+
+    #///////////////////////////////////////////////////////////////////////////
+    def evict(self, window):
+        """
+                _PendingSections.evict
+
+                window  : (int) number of alive sections to be kept
+
+                Yield the edits for the oldest sections, until only <window>
+                sections are alive.
+        """
+        while self.fifo and (self.alive > window or not self.fifo[0].alive):
+            pending = self.fifo.popleft()
+            if not pending.alive:
+                continue
+            self._kill(pending)
+
+            partner = pending.partner
+            if partner is not None and partner.alive:
+                # same level, different texts :
+                partner.owner._kill(partner)    # pylint: disable=protected-access
+                if self.is_removed:
+                    yield Edit("changed", pending.level, partner.level,
+                               pending.text, partner.text)
+                else:
+                    yield Edit("changed", partner.level, pending.level,
+                               partner.text, pending.text)
+
+            elif self.is_removed:
+                yield Edit("removed", pending.level, None, pending.text, None)
+            else:
+                yield Edit("added", None, pending.level, None, pending.text)
+
+        # dead sections behind an alive one : memory must stay O(window)
+        if len(self.fifo) > 2*self.alive + 64:
+            self.fifo = collections.deque(pending for pending in self.fifo if pending.alive)
+            self.by_text = {}
+            for pending in self.fifo:
+                self.by_text.setdefault(pending.text, collections.deque()).append(pending)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def pop(self, text):
+        """
+                _PendingSections.pop
+
+                text    : (str)
+
+                Remove and return the oldest alive section whose text is <text>,
+                None if there's none.
+        """
+        candidates = self.by_text.get(text)
+        while candidates:
+            pending = candidates[0]
+            if pending.alive:
+                self._kill(pending)
+                return pending
+            candidates.popleft()
+        return None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def push(self, level, text):
+        """
+                _PendingSections.push
+
+                level   : HLevel object
+                text    : (str)
+
+                Add a new section and return the _PendingSection object.
+        """
+        pending = _PendingSection(level, text, self)
+        self.fifo.append(pending)
+        self.by_text.setdefault(text, collections.deque()).append(pending)
+        self.alive += 1
+        return pending
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _kill(self, pending):
+        """
+                _PendingSections._kill
+
+                pending : _PendingSection object in self.fifo
+        """
+        pending.alive = False
+        self.alive -= 1
+
+        candidates = self.by_text.get(pending.text)
+        if candidates is not None:
+            while candidates and not candidates[0].alive:
+                candidates.popleft()
+            if not candidates:
+                del self.by_text[pending.text]
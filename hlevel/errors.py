@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/errors.py
+
+    * exceptions raised by HLevel
+
+        HLevelError
+         ├── FormatError   : wrong format string or number format
+         ├── ParseError    : a string can't be read
+         ├── RenderError   : a number can't be written
+         └── DecodeError   : wrong binary data (serialization, sort keys)
+
+    The messages are formatted only when they are displayed : an exception caught
+    and ignored costs no string formatting.
+"""
+
+################################################################################
+class HLevelError(Exception):
+    """
+        class HLevelError
+
+        Base class of the exceptions raised by HLevel.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, msg, *msg_args):
+        """
+                HLevelError.__init__
+
+                msg             : (str) message, formatted by msg.format(*msg_args)
+                msg_args        : arguments of <msg>
+        """
+        Exception.__init__(self, msg, *msg_args)
+        self.msg = msg
+        self.msg_args = msg_args
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __str__(self):
+        """
+                HLevelError.__str__
+        """
+        return self.msg.format(*self.msg_args)
+
+################################################################################
+class FormatError(HLevelError):
+    """
+        class FormatError
+
+        Wrong format string, unknown or wrongly declared number format.
+    """
+
+################################################################################
+class RenderError(HLevelError):
+    """
+        class RenderError
+
+        A number can't be written with the required format.
+    """
+
+################################################################################
+class DecodeError(HLevelError):
+    """
+        class DecodeError
+
+        Binary data (see hlevel/serialization.py, hlevel/sortkey.py) can't be read.
+    """
+
+################################################################################
+class ParseError(HLevelError):
+    """
+        class ParseError
+
+        A string can't be read.
+
+        src             : (str) the string
+        formatstr       : (str) the format string
+        offset          : (int) offset of the faulty character in <src>
+        reason          : (str) what went wrong at <offset>
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, src, formatstr, offset, reason, *reason_args, caller="HLevel.initFromStr"):
+        """
+                ParseError.__init__
+
+                src, formatstr, offset  : see the documentation of the class
+                reason          : (str) formatted by reason.format(*reason_args)
+                reason_args     : arguments of <reason>
+                caller          : (str) name of the function which raised the error
+        """
+        HLevelError.__init__(self,
+                             "({0}) can't read '{1}' with the format string '{2}' : "
+                             "error at offset {3} : {4}.",
+                             caller, src, formatstr, offset, reason)
+        self.src = src
+        self.formatstr = formatstr
+        self.offset = offset
+        self.reason_template = reason
+        self.reason_args = reason_args
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __str__(self):
+        """
+                ParseError.__str__
+        """
+        return self.msg.format(self.msg_args[0], self.src, self.formatstr, self.offset,
+                               self.reason)
+
+    #///////////////////////////////////////////////////////////////////////////
+    @property
+    def reason(self):
+        """
+                ParseError.reason
+
+                Return the (str) formatted reason of the error.
+        """
+        return self.reason_template.format(*self.reason_args)
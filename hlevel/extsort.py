@@ -0,0 +1,416 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/extsort.py
+
+    * ExternalSorter class : sorting lines beginning with a level, more lines than
+      the memory can hold
+    * sort_file() : a text file sorted into a text file or into a binary file (see
+      hlevel/serialization.py)
+
+    Each line is read with the format string (the level is the whole line or, with
+    a delimiter, the beginning of the line) and its sort key (see
+    hlevel/sortkey.py) is computed once. The (key, line) records are kept in memory
+    until <memory_limit> is reached; they are then sorted (bytes comparison) and
+    written in a temporary file, a "run". At the end, the runs are merged (k-way
+    merge, heapq.merge()), <fan_in> runs at most being opened at once : if there
+    are more runs, they are first merged into longer runs.
+
+    run file : for each record, varint(length of the key) + key
+                              + varint(length of the line) + line (utf-8)
+
+    The sort is stable. The lines which can't be read are not sorted : they are
+    counted and written in <rejects>, if any.
+
+    How it works :
+        stats = sort_file("references.txt", "sorted.txt", ".(I.1.a)",
+                          memory_limit=512*1024**2)
+        print(stats.runs, stats.bytes_written)
+
+        with ExternalSorter(".(I.1.a)", delimiter="\\t") as sorter:
+            sorter.feed(lines)
+            for line in sorter.iterSorted():
+                ...
+"""
+
+import collections
+import heapq
+import operator
+import os
+import shutil
+import sys
+import tempfile
+
+from hlevel.errors import DecodeError
+from hlevel.hlevel import HLevel
+from hlevel import serialization
+from hlevel.sortkey import encode_sortkey, decode_sortkey
+
+SortStats = collections.namedtuple("SortStats",
+                                   ("lines", "invalid", "runs", "bytes_written", "bytes_read"))
+
+# default memory used by the records kept in memory :
+MEMORY_LIMIT = 256*1024**2
+
+# size of the chunks read in the runs :
+CHUNK_SIZE = 1 << 16
+
+# estimated size in memory of a record, besides the key and the line : tuple, bytes
+# and str objects, list item
+RECORD_OVERHEAD = sys.getsizeof((None, None)) + sys.getsizeof(b"") + sys.getsizeof("") + 8
+
+################################################################################
+class ExternalSorter(object):
+    """
+        class ExternalSorter
+
+        Sort lines beginning with a level, the sorted runs being written in
+        temporary files : see the documentation of the module.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self,
+                 formatstr=None,
+                 first_number=1,
+                 delimiter=None,
+                 memory_limit=MEMORY_LIMIT,
+                 fan_in=128,
+                 tmpdir=None,
+                 rejects=None,
+                 cache_size=65536):
+        """
+                ExternalSorter.__init__
+
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+                delimiter       : None (the level is the whole line) or (str), the
+                                  level being the beginning of the line, before
+                                  <delimiter>
+                memory_limit    : (int) bytes used by the records kept in memory
+                fan_in          : (int) maximal number of runs merged at once
+                tmpdir          : None or (str) directory of the temporary files
+                rejects         : None or text file object : the lines which can't
+                                  be read are written in it
+                cache_size      : (int) number of level strings whose key is
+                                  cached (the same level being often repeated)
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        HLevel.compileFormat(formatstr)     # a wrong <formatstr> raises a FormatError
+
+        self.formatstr = formatstr
+        self.first_number = first_number
+        self.delimiter = delimiter
+        self.memory_limit = memory_limit
+        self.fan_in = max(fan_in, 2)
+        self.tmpdir = tmpdir
+        self.rejects = rejects
+        self.cache_size = cache_size
+
+        # {level string : sort key}
+        self.keys = {}
+
+        # (key, line) records not written yet, and their (estimated) size :
+        self.records = []
+        self.records_size = 0
+
+        # paths of the runs, directory of the runs (created by the first run) :
+        self.runs = []
+        self.directory = None
+        self.number_of_runs = 0
+
+        self.lines = 0
+        self.invalid = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __enter__(self):
+        """
+                ExternalSorter.__enter__
+        """
+        return self
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __exit__(self, *exc_info):
+        """
+                ExternalSorter.__exit__
+        """
+        self.close()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def close(self):
+        """
+                ExternalSorter.close
+
+                Remove the temporary files.
+        """
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+        self.runs = []
+        self.records = []
+        self.records_size = 0
+
+    #///////////////////////////////////////////////////////////////////////////
+    def feed(self, lines):
+        """
+                ExternalSorter.feed
+
+                lines   : iterable of (str) lines, e.g. a text file object; the
+                          final "\\n" (or "\\r\\n") is removed.
+
+                Read <lines>; may be called several times before iterSorted().
+        """
+        keys = self.keys
+        records = self.records
+        delimiter = self.delimiter
+        formatstr = self.formatstr
+        first_number = self.first_number
+        records_size = self.records_size
+
+        for line in lines:
+            self.lines += 1
+            if line.endswith("\n"):
+                line = line[:-2] if line.endswith("\r\n") else line[:-1]
+            src = line if delimiter is None else line.split(delimiter, 1)[0]
+
+            key = keys.get(src)
+            if key is None:
+                hlevel = HLevel.try_parse(src, formatstr, first_number)
+                if hlevel is None:
+                    self.invalid += 1
+                    if self.rejects is not None:
+                        self.rejects.write(line + "\n")
+                    continue
+                key = encode_sortkey(hlevel)
+                if len(keys) >= self.cache_size:
+                    keys.clear()
+                keys[src] = key
+
+            records.append((key, line))
+            records_size += len(key) + len(line) + RECORD_OVERHEAD
+            if records_size >= self.memory_limit:
+                self.writeRun()
+                records = self.records
+                records_size = 0
+
+        self.records_size = records_size
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getStats(self):
+        """
+                ExternalSorter.getStats
+
+                Return a SortStats(lines, invalid, runs, bytes_written, bytes_read)
+                object : the temporary files written and read so far.
+        """
+        return SortStats(self.lines, self.invalid, self.number_of_runs,
+                         self.bytes_written, self.bytes_read)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterLevels(self):
+        """
+                ExternalSorter.iterLevels
+
+                Yield the (list of int) levels of the sorted lines.
+        """
+        for key, _ in self.iterRecords():
+            yield decode_sortkey(key)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterRecords(self):
+        """
+                ExternalSorter.iterRecords
+
+                Yield the sorted (key, line) records; the temporary files are removed
+                at the end.
+        """
+        self.records.sort(key=operator.itemgetter(0))
+        if not self.runs:
+            # everything is in memory :
+            records, self.records, self.records_size = self.records, [], 0
+            yield from records
+            return
+
+        if self.records:
+            self.writeRun(sorted_records=self.records)
+
+        try:
+            while len(self.runs) > self.fan_in:
+                # one pass : the runs are merged by groups of <fan_in> runs, in their
+                # order (the sort is stable)
+                runs, self.runs = self.runs, []
+                for index in range(0, len(runs), self.fan_in):
+                    group = runs[index:index+self.fan_in]
+                    if len(group) == 1:
+                        self.runs.append(group[0])
+                        continue
+                    self.writeRun(heapq.merge(*(self.iterRun(path) for path in group),
+                                              key=operator.itemgetter(0)))
+                    for path in group:
+                        os.remove(path)
+
+            yield from heapq.merge(*(self.iterRun(path) for path in self.runs),
+                                   key=operator.itemgetter(0))
+        finally:
+            self.close()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterRun(self, path):
+        """
+                ExternalSorter.iterRun
+
+                path    : (str) path of a run
+
+                Yield the (key, line) records of the run <path>, read by chunks of
+                CHUNK_SIZE bytes.
+        """
+        decode_varint = serialization.decode_varint
+        with open(path, "rb") as run:
+            buffer = b""
+            pos = 0
+            while True:
+                chunk = run.read(CHUNK_SIZE)
+                self.bytes_read += len(chunk)
+                if not chunk:
+                    if pos < len(buffer):
+                        raise DecodeError("(ExternalSorter.iterRun) truncated run {0}", path)
+                    return
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                len_buffer = len(buffer)
+
+                try:
+                    while True:
+                        start = pos
+                        length, pos = decode_varint(buffer, pos)
+                        key = buffer[pos:pos+length]
+                        length, pos = decode_varint(buffer, pos+length)
+                        if pos + length > len_buffer:
+                            raise IndexError
+                        line = buffer[pos:pos+length].decode("utf-8", "surrogateescape")
+                        pos += length
+                        yield (key, line)
+                except IndexError:
+                    # incomplete record :
+                    pos = start
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterSorted(self):
+        """
+                ExternalSorter.iterSorted
+
+                Yield the sorted (str) lines, without "\\n".
+        """
+        for _, line in self.iterRecords():
+            yield line
+
+    #///////////////////////////////////////////////////////////////////////////
+    def writeRun(self, sorted_records=None):
+        """
+                ExternalSorter.writeRun
+
+                sorted_records  : None to write self.records (which are sorted and
+                                  emptied) or iterable of sorted (key, line) records
+
+                Write a new run, added at the end of self.runs.
+        """
+        if sorted_records is None or sorted_records is self.records:
+            self.records.sort(key=operator.itemgetter(0))
+            sorted_records, self.records, self.records_size = self.records, [], 0
+
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="hlevel-sort-", dir=self.tmpdir)
+        self.number_of_runs += 1
+        path = os.path.join(self.directory, "run-{0:06}.bin".format(self.number_of_runs))
+
+        encode_varint = serialization.encode_varint
+        with open(path, "wb") as run:
+            res = bytearray()
+            for key, line in sorted_records:
+                line = line.encode("utf-8", "surrogateescape")
+                encode_varint(len(key), res)
+                res += key
+                encode_varint(len(line), res)
+                res += line
+                if len(res) >= CHUNK_SIZE:
+                    run.write(res)
+                    self.bytes_written += len(res)
+                    res = bytearray()
+            run.write(res)
+            self.bytes_written += len(res)
+
+        self.runs.append(path)
+
+#///////////////////////////////////////////////////////////////////////////////
+def sort_file(src_path,
+              dest_path,
+              formatstr=None,
+              first_number=1,
+              binary=False,
+              encoding="utf-8",
+              rejects_path=None,
+              **kwargs):
+    """
+        sort_file
+
+        src_path        : (str) text file, one line per level
+        dest_path       : (str) sorted file
+        formatstr       : (str) or None for HLevel.defaultformat
+        first_number    : (int)
+        binary          : (bool) False : the sorted lines are written in <dest_path>;
+                          True : only the levels are written, in the binary format of
+                          hlevel/serialization.py
+        encoding        : (str) encoding of the text files
+        rejects_path    : None or (str) file where the lines which can't be read are
+                          written
+        kwargs          : see ExternalSorter.__init__() (delimiter, memory_limit...)
+
+        Return a SortStats object.
+    """
+    rejects = None if rejects_path is None else \
+              open(rejects_path, "w", encoding=encoding, errors="surrogateescape")
+    try:
+        with ExternalSorter(formatstr, first_number, rejects=rejects, **kwargs) as sorter:
+            with open(src_path, encoding=encoding, errors="surrogateescape") as src:
+                sorter.feed(src)
+
+            if binary:
+                with open(dest_path, "wb") as dest:
+                    serialization.write_levels(dest, sorter.iterLevels(),
+                                               sorter.formatstr, first_number)
+            else:
+                with open(dest_path, "w", encoding=encoding, errors="surrogateescape") as dest:
+                    batch = []
+                    for line in sorter.iterSorted():
+                        batch.append(line)
+                        if len(batch) == 4096:
+                            batch.append("")
+                            dest.write("\n".join(batch))
+                            batch = []
+                    if batch:
+                        batch.append("")
+                        dest.write("\n".join(batch))
+            return sorter.getStats()
+    finally:
+        if rejects is not None:
+            rejects.close()
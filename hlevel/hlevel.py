@@ -78,9 +78,19 @@
 
     * capitalgreek_symbols = ("Α", "Β", "Γ", "Δ", "Ε", "Ζ", ..., "Φ", "Χ", "Ψ", "Ω", "ΑΑ", ...)
       positive integers, normally greater than zero (but see self.first_number)
+
+    * Arabic-Indic digits ("٠", "١", ...), Devanagari digits ("०", "१", ...) and
+      circled numbers from 21 to 50 ("㉑", ..., "㊿")
+
+    Each format is declared in hlevel/numberformat.py, where other formats can be
+    registered.
 """
 
 import re
+import sys
+
+from hlevel import numberformat
+from hlevel.errors import HLevelError, FormatError, ParseError, RenderError
 
 ################################################################################
 class HLevel(list):
@@ -93,64 +103,70 @@ class HLevel(list):
     defaultformat = ".(1111111111)"
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    # accepted symbols in each format string :
-    reprnum = ["1", "I", "i", "A", "a", "①", "一", "¹", "₁", "１", "α", "Α"]
+    # accepted symbols in each format string : see hlevel/numberformat.py
+    reprnum = numberformat.SYMBOLS
 
-    arabicnumber_symbols = ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9",)
+    arabicnumber_symbols = numberformat.FORMATS["1"].symbols
 
-    capitalletter_symbols = ("A", "B", "C", "D", "E", "F", "G", "H", "I", \
-                             "J", "K", "L", "M", "N", "O", "P", "Q", "R", \
-                             "S", "T", "U", "V", "W", "X", "Y", "Z",)
+    capitalletter_symbols = numberformat.FORMATS["A"].symbols
 
-    lowercaseletter_symbols = ("a", "b", "c", "d", "e", "f", "g", "h", "i", \
-                             "j", "k", "l", "m", "n", "o", "p", "q", "r", \
-                             "s", "t", "u", "v", "w", "x", "y", "z",)
+    lowercaseletter_symbols = numberformat.FORMATS["a"].symbols
 
-    capitalromannumber_symbols = ("I", "V", "X", "L", "C", "D", "M")
+    capitalromannumber_symbols = numberformat.FORMATS["I"].symbols
 
-    lowercaseromannumber_symbols = ("i", "v", "x", "l", "c", "d", "m")
+    lowercaseromannumber_symbols = numberformat.FORMATS["i"].symbols
 
-    enclosedletter_symbols = ("①", "②", "③", "④", "⑤",
-                              "⑥", "⑦", "⑧", "⑨", "⑩",
-                              "⑪", "⑫", "⑬", "⑭", "⑮",
-                              "⑯", "⑰", "⑱", "⑲", "⑳")
+    enclosedletter_symbols = numberformat.FORMATS["①"].symbols
 
-    japanesenumber_symbols = ('〇', '一', '二', '三', '四', '五', '六', '七', '八', '九',
-                              "十", "百", "千")
+    japanesenumber_symbols = numberformat.FORMATS["一"].symbols
 
-    superscript_symbols = ("-",
-                           chr(0x2070), chr(0x00B9), chr(0x00B2), chr(0x00B3), chr(0x2074),
-                           chr(0x2075), chr(0x2076), chr(0x2077), chr(0x2078), chr(0x2079))
+    superscript_symbols = ("-",) + numberformat.FORMATS["¹"].symbols
 
-    subscript_symbols = ("-",
-                         chr(0x2080), chr(0x2081), chr(0x2082), chr(0x2083), chr(0x2084),
-                         chr(0x2085), chr(0x2086), chr(0x2087), chr(0x2088), chr(0x2089))
+    subscript_symbols = ("-",) + numberformat.FORMATS["₁"].symbols
 
-    fullwidthnumerals_symbols = ("０", "１", "２", "３", "４", "５", "６", "７", "８", "９",)
+    fullwidthnumerals_symbols = numberformat.FORMATS["１"].symbols
 
-    lowercasegreek_symbols = ("α", "β", "γ", "δ", "ε", "ζ", "η", "θ",
-                              "ι", "κ", "λ", "μ", "ν", "ξ", "ο", "π",
-                              "ρ", "σ", "τ", "υ", "φ", "χ", "ψ", "ω")
+    lowercasegreek_symbols = numberformat.FORMATS["α"].symbols
 
-    capitalgreek_symbols = ("Α", "Β", "Γ", "Δ", "Ε", "Ζ", "Η", "Θ",
-                            "Ι", "Κ", "Λ", "Μ", "Ν", "Ξ", "Ο", "Π",
-                            "Ρ", "Σ", "Τ", "Υ", "Φ", "Χ", "Ψ", "Ω")
+    capitalgreek_symbols = numberformat.FORMATS["Α"].symbols
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    # forbidden characters in prefix and suffix string :
-    invalid_chars_in_pre_suffix = (
-        arabicnumber_symbols + \
-        capitalletter_symbols + \
-        lowercaseletter_symbols + \
-        capitalromannumber_symbols + \
-        lowercaseromannumber_symbols + \
-        enclosedletter_symbols + \
-        japanesenumber_symbols + \
-        superscript_symbols + \
-        subscript_symbols + \
-        fullwidthnumerals_symbols + \
-        lowercasegreek_symbols + \
-        capitalgreek_symbols)
+    # attributes whose modification changes the representation of the object :
+    format_attributes = ("separator", "prefix", "suffix", "numbers_format", "first_number")
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # forbidden characters in prefix and suffix string (updated by
+    # numberformat.register_format()) :
+    invalid_chars_in_pre_suffix = numberformat.RESERVED_CHARS
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # HLevel.detect() : each symbol is replaced by the character of its class;
+    # the Roman numerals are split into two classes : the ones read as Roman
+    # numbers when alone ("I", "V", "X") and the ones read as letters when alone
+    # ("L", "C", "D", "M").
+    detect_classes = ((arabicnumber_symbols, "1"),
+                      (capitalletter_symbols, "A"),
+                      (("L", "C", "D", "M"), "C"),
+                      (("I", "V", "X"), "I"),
+                      (lowercaseletter_symbols, "a"),
+                      (("l", "c", "d", "m"), "c"),
+                      (("i", "v", "x"), "i"),
+                      (enclosedletter_symbols, "①"),
+                      (japanesenumber_symbols, "一"),
+                      (superscript_symbols[1:], "¹"),
+                      (subscript_symbols[1:], "₁"),
+                      (fullwidthnumerals_symbols, "１"),
+                      (lowercasegreek_symbols, "α"),
+                      (capitalgreek_symbols, "Α"))
+
+    # maximal number of shapes stored by HLevel.detect() :
+    detect_cache_maxsize = 4096
+
+    _detect_cache = {}
+    _detect_table = None
+
+    # HLevel.setFormat() : {format string : (separator, prefix, suffix, numbers format)}
+    _formats_cache = {}
 
     #///////////////////////////////////////////////////////////////////////////
     def __init__(self, src=None, formatstr=None, first_number=1):
@@ -170,6 +186,9 @@ class HLevel(list):
         """
         list.__init__(self)
 
+        # cached value of self.getRepr(), None if it has to be computed again :
+        self._repr = None
+
         self.separator = ""
         self.prefix = ""
         self.suffix = ""
@@ -185,6 +204,49 @@ class HLevel(list):
         if src is not None:
             self.initFromStr(src)
 
+    #///////////////////////////////////////////////////////////////////////////
+    def __delitem__(self, index):
+        """
+                HLevel.__delitem__
+        """
+        try:
+            list.__delitem__(self, index)
+        finally:
+            self._repr = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __iadd__(self, other):
+        """
+                HLevel.__iadd__
+        """
+        try:
+            return list.__iadd__(self, other)
+        finally:
+            self._repr = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __imul__(self, other):
+        """
+                HLevel.__imul__
+        """
+        try:
+            return list.__imul__(self, other)
+        finally:
+            self._repr = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __reduce__(self):
+        """
+                HLevel.__reduce__
+
+                Pickle support : only the format string, the integers and, if it isn't
+                1, self.first_number are stored. Since the format string is interned,
+                pickling a list of objects sharing the same format stores it only once.
+        """
+        if self.first_number == 1:
+            return (_unpickleHLevel, (self.getFormatStr(), tuple(self)))
+        return (_unpickleHLevel, (self.getFormatStr(), tuple(self), self.first_number))
+
     #///////////////////////////////////////////////////////////////////////////
     def __repr__(self):
         """
@@ -198,12 +260,258 @@ class HLevel(list):
                              self.numbers_format,
                              ".".join(str(value) for value in self))
 
+    #///////////////////////////////////////////////////////////////////////////
+    def __setattr__(self, name, value):
+        """
+                HLevel.__setattr__
+
+                Modifying one of the HLevel.format_attributes invalidates the cached
+                representation of the object.
+        """
+        if name in HLevel.format_attributes:
+            list.__setattr__(self, "_repr", None)
+        list.__setattr__(self, name, value)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __setitem__(self, index, value):
+        """
+                HLevel.__setitem__
+        """
+        try:
+            list.__setitem__(self, index, value)
+        finally:
+            self._repr = None
+
     #///////////////////////////////////////////////////////////////////////////
     def __str__(self):
         """
                 HLevel.__str__
+
+                The string returned by getRepr() is cached in self._repr : every
+                method modifying the content (append, extend, __setitem__, ...) or the
+                format (setFormat, separator, prefix, ...) of the object resets it.
+                Beware : self.numbers_format is replaced by setFormat(), never modified
+                in place; do not modify it in place yourself.
+        """
+        if self._repr is None:
+            self._repr = self.getRepr()
+        return self._repr
+
+    #///////////////////////////////////////////////////////////////////////////
+    def append(self, value):
+        """
+                HLevel.append
+        """
+        try:
+            list.append(self, value)
+        finally:
+            self._repr = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def clear(self):
+        """
+                HLevel.clear
+        """
+        try:
+            list.clear(self)
+        finally:
+            self._repr = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def clearCaches():
+        """
+                HLevel.clearCaches
+
+                Forget the format strings and the shapes read so far : called each time
+                a number format is registered (see numberformat.register_format()).
+        """
+        HLevel._detect_cache.clear()
+        HLevel._detect_table = None
+        HLevel._formats_cache.clear()
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def compileFormat(formatstr):
+        """
+                HLevel.compileFormat
+
+                formatstr       : (str)
+
+                Return (separator, prefix, suffix, (tuple)numbers format) read from
+                <formatstr>, each format string being read only once (see
+                HLevel._formats_cache).
+        """
+        if formatstr not in HLevel._formats_cache:
+
+            if formatstr == "":
+                raise FormatError("HLevel.setFormat : empty format string")
+
+            separator = ""
+            prefix = ""
+            suffix = ""
+            numbers_format = []
+
+            for index_char, char in enumerate(formatstr):
+
+                if index_char == 0:
+                    separator = char
+
+                elif char == separator:
+                    pass
+
+                elif char not in HLevel.reprnum and numbers_format == []:
+                    prefix += char
+
+                elif char in HLevel.reprnum:
+                    numbers_format.append(char)
+
+                elif char not in HLevel.invalid_chars_in_pre_suffix:
+                    suffix += char
+
+                else:
+                    raise FormatError("HLevel.setFormat : wrong format string = '{0}'",
+                                      formatstr)
+
+            HLevel._formats_cache[formatstr] = (separator, prefix, suffix, tuple(numbers_format))
+
+        return HLevel._formats_cache[formatstr]
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def detect(src):
+        """
+                HLevel.detect
+
+                src     : (str)
+
+                Guess the format string of (str)src, e.g. ".(I.a.1)" for "(IV.b.3)".
+
+                Each symbol of <src> is replaced by the character of its class (see
+                HLevel.detect_classes; the symbols of the other registered formats
+                are replaced by the symbol of their format) by a single
+                str.translate() call : the result
+                (the "shape" of <src>) is read once and the format deduced from it is
+                cached (see HLevel.detect_cache_maxsize).
+
+                Ambiguous components are resolved as follows :
+                    "I", "V", "X" (and "i", "v", "x") are read as Roman numbers;
+                    "L", "C", "D", "M" (and "l", "c", "d", "m") are read as letters;
+                    several Roman symbols (e.g. "CD", "iv") are read as a Roman number;
+                    a Roman symbol mixed with other letters (e.g. "IB") is a letter.
+
+                Return a (str)format string or None if no format fits <src>.
+        """
+        shape = src.translate(HLevel.getDetectTable())
+
+        if shape in HLevel._detect_cache:
+            return HLevel._detect_cache[shape]
+
+        res = HLevel.detectFromShape(shape)
+
+        if len(HLevel._detect_cache) >= HLevel.detect_cache_maxsize:
+            HLevel._detect_cache.clear()
+        HLevel._detect_cache[shape] = res
+
+        return res
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def detectFromShape(shape):
+        """
+                HLevel.detectFromShape
+
+                shape   : (str) a string whose symbols have been replaced by the
+                          characters of their class (see HLevel.detect())
+
+                Return a (str)format string or None if no format fits <shape>.
+        """
+        class_chars = set(HLevel.getDetectTable().values())
+
+        prefix = None
+        separators = set()
+        components = []         # list of the sets of classes found in each number
+        lengths = []            # list of the lengths of each number
+        pending = []            # characters read since the last symbol
+
+        for char in shape:
+            if char not in class_chars:
+                pending.append(char)
+
+            elif prefix is None:
+                prefix = "".join(pending)
+                components.append({char})
+                lengths.append(1)
+                pending = []
+
+            elif pending:
+                separators.add("".join(pending))
+                components.append({char})
+                lengths.append(1)
+                pending = []
+
+            else:
+                components[-1].add(char)
+                lengths[-1] += 1
+
+        if prefix is None or len(separators) > 1:
+            return None
+        suffix = "".join(pending)
+
+        if separators:
+            separator = separators.pop()
+        else:
+            separator = "."
+            for char in ".|-/:":
+                if char not in prefix and char not in suffix:
+                    separator = char
+                    break
+
+        # numbers format :
+        numbers_format = []
+        for classes, length in zip(components, lengths):
+            if len(classes) == 1 and \
+               not classes & {"A", "C", "I", "a", "c", "i"}:
+                numbers_format.append(classes.pop())
+
+            elif classes <= {"A", "C", "I"}:
+                if "A" in classes or (length == 1 and "C" in classes):
+                    numbers_format.append("A")
+                else:
+                    numbers_format.append("I")
+
+            elif classes <= {"a", "c", "i"}:
+                if "a" in classes or (length == 1 and "c" in classes):
+                    numbers_format.append("a")
+                else:
+                    numbers_format.append("i")
+
+            else:
+                return None
+
+        res = separator + prefix + separator.join(numbers_format) + suffix
+
+        # is <res> a valid format string, giving back the same prefix, suffix... ?
+        try:
+            hlevel = HLevel(formatstr=res)
+        except HLevelError:
+            return None
+
+        if (hlevel.separator, hlevel.prefix, hlevel.suffix) != (separator, prefix, suffix) or \
+           len(hlevel.numbers_format) != len(numbers_format):
+            return None
+
+        return res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def extend(self, iterable):
+        """
+                HLevel.extend
         """
-        return self.getRepr()
+        try:
+            list.extend(self, iterable)
+        finally:
+            self._repr = None
 
     #///////////////////////////////////////////////////////////////////////////
     def findHLevelStringFromAString(self, src):
@@ -217,20 +525,7 @@ class HLevel(list):
                          if success, hlevel string,
                       )
         """
-        pattern = re.escape(self.prefix)
-
-        for index_numberf, numberf in enumerate(self.numbers_format[::-1]):
-
-            if numberf == '1':
-                pattern += "[" + "|".join(map(re.escape, HLevel.arabicnumber_symbols)) + "]*"
-
-            elif numberf == 'I':
-                pattern += "[" + "|".join(map(re.escape, HLevel.capitalromannumber_symbols)) + "]*"
-
-            if index_numberf+1 < len(self.numbers_format):
-                pattern += re.escape(self.separator) + "?"
-
-        pattern += re.escape(self.suffix)
+        pattern = self.getSearchPattern()
 
         search = re.search(pattern, src)
         if search is None:
@@ -240,6 +535,67 @@ class HLevel(list):
                 search.start(),
                 src[search.start():search.end()])
 
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def fromValues(values, formatstr=None, first_number=1):
+        """
+                HLevel.fromValues
+
+                values          : iterable of (int)
+                formatstr       : str or None
+                first_number    : (int)
+
+                Return a new HLevel object made of the integers in <values>.
+                Faster than HLevel.__init__() + extend() : the format string is read
+                only once, the attributes being then copied from HLevel._formats_cache.
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        separator, prefix, suffix, numbers_format = HLevel.compileFormat(formatstr)
+
+        hlevel = list.__new__(HLevel)
+        list.__init__(hlevel, values)
+        hlevel.__dict__.update(_repr=None,
+                               separator=separator,
+                               prefix=prefix,
+                               suffix=suffix,
+                               numbers_format=list(numbers_format),
+                               first_number=first_number)
+        return hlevel
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def getDetectTable():
+        """
+                HLevel.getDetectTable
+
+                Return the table used by HLevel.detect() : {ord(symbol) : class}.
+        """
+        if HLevel._detect_table is None:
+            table = {}
+            for symbols, class_char in HLevel.detect_classes:
+                for symbol in symbols:
+                    table[ord(symbol)] = class_char
+            for numberformat_ in numberformat.FORMATS.values():
+                for symbol in numberformat_.symbols:
+                    table.setdefault(ord(symbol), numberformat_.symbol)
+            HLevel._detect_table = table
+
+        return HLevel._detect_table
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getFormatStr(self):
+        """
+                HLevel.getFormatStr
+
+                Return the (str)format string describing the current format, the same
+                (interned) string object being returned for a given format.
+        """
+        return sys.intern(self.separator + \
+                          self.prefix + \
+                          self.separator.join(self.numbers_format) + \
+                          self.suffix)
+
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
     def getNumberFromArabicNumber(strnumber):
@@ -247,15 +603,10 @@ class HLevel(list):
                 HLevel.getNumberFromArabicNumber
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.arabicnumber_symbols] != []:
-            msg = "(HLevel.getNumberFromArabicNumber) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.arabicnumber_symbols))
 
-        return int(strnumber)
+                See numberformat.FORMATS["1"].parse().
+        """
+        return numberformat.FORMATS["1"].parse(strnumber)
 
     #///////////////////////////////////////////////////////////////////////////
     def getNumberFromCapitalGreekLetter(self, strnumber):
@@ -263,19 +614,10 @@ class HLevel(list):
                 HLevel.getNumberFromCapitalGreekLetter
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.capitalgreek_symbols] != []:
-            msg = "(HLevel.getNumberFromCapitalGreekLetter) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.capitalgreek_symbols))
-
-        res = 0
-        for index_char, char in enumerate(strnumber[::-1]):
-            res += (24 ** index_char) * (ord(char) - 0x391 + self.first_number)
 
-        return res
+                See numberformat.FORMATS["Α"].parse().
+        """
+        return numberformat.FORMATS["Α"].parse(strnumber, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getNumberFromCapitalLetter(self, strnumber):
@@ -283,19 +625,10 @@ class HLevel(list):
                 HLevel.getNumberFromCapitalLetter
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.capitalletter_symbols] != []:
-            msg = "(HLevel.getNumberFromCapitalLetter) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.capitalletter_symbols))
 
-        res = 0
-        for index_char, char in enumerate(strnumber[::-1]):
-            res += (26 ** index_char) * (ord(char) - 65 + self.first_number)
-
-        return res
+                See numberformat.FORMATS["A"].parse().
+        """
+        return numberformat.FORMATS["A"].parse(strnumber, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getNumberFromCapitalRomanNumber(self, strnumber):
@@ -303,43 +636,10 @@ class HLevel(list):
                 HLevel.getNumberFromCapitalRomanNumber
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.capitalromannumber_symbols] != []:
-            msg = "(HLevel.getNumberFromCapitalRomanNumber) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.capitalromannumber_symbols))
-
-        if self.first_number != 1:
-            msg = "(HLevel.getNumberFromCapitalRomanNumber) " \
-                  "You can't use roman numbers (number read : {0}) if " \
-                  "self.first_number (='{0}') is not set to 1."
-            raise Exception(msg.format(strnumber,
-                                       self.first_number))
-
-        data = (('M', 1000),
-                ('CM', 900),
-                ('D', 500),
-                ('CD', 400),
-                ('C', 100),
-                ('XC', 90),
-                ('L', 50),
-                ('XL', 40),
-                ('X', 10),
-                ('IX', 9),
-                ('V', 5),
-                ('IV', 4),
-                ('I', 1))
-
-        res = 0
-        index = 0
-        for numeral, integer in data:
-            while strnumber[index:index+len(numeral)] == numeral:
-                res += integer
-                index += len(numeral)
 
-        return res
+                See numberformat.FORMATS["I"].parse().
+        """
+        return numberformat.FORMATS["I"].parse(strnumber, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
@@ -348,49 +648,22 @@ class HLevel(list):
                 HLevel.getNumberFromEnclosedNumber
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.enclosedletter_symbols] != []:
-            msg = "(HLevel.getNumberFromEnclosedNumber) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.enclosedletter_symbols))
-
-        if len(strnumber) != 1:
-            msg = "(HLevel.getNumberFromEnclosedNumber) " \
-                  "Multiple character in '{0}', which is forbidden."
-            raise Exception(msg.format(strnumber))
 
-        return ord(strnumber) - 0x2460 + 1
+                See numberformat.FORMATS["①"].parse().
+        """
+        return numberformat.FORMATS["①"].parse(strnumber)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
     def getNumberFromFullWidthNumeral(strnumber):
         """
                 HLevel.getNumberFromFullWidthNumeral
+
+                strnumber       : (str)
+
+                See numberformat.FORMATS["１"].parse().
         """
-        if [char for char in strnumber if char not in HLevel.fullwidthnumerals_symbols] != []:
-            msg = "(HLevel.getNumberFromFullWidthNumeral) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.fullwidthnumerals_symbols))
-
-        data = {"-" : "-",
-                "０" : 0,
-                "１" : 1,
-                "２" : 2,
-                "３" : 3,
-                "４" : 4,
-                "５" : 5,
-                "６" : 6,
-                "７" : 7,
-                "８" : 8,
-                "９" : 9}
-
-        _strnumber = "".join(str(data[char]) for char in strnumber)
-
-        return int(_strnumber)
+        return numberformat.FORMATS["１"].parse(strnumber)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
@@ -399,54 +672,10 @@ class HLevel(list):
                 HLevel.getNumberFromJapaneseNumber
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.japanesenumber_symbols] != []:
-            msg = "(HLevel.getNumberFromJapaneseNumber) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.japanesenumber_symbols))
-
-        data_digits = {'一' : 1,
-                       '二' : 2,
-                       '三' : 3,
-                       '四' : 4,
-                       '五' : 5,
-                       '六' : 6,
-                       '七' : 7,
-                       '八' : 8,
-                       '九' : 9}
-
-        data_mul = {'十' : 10,
-                    '百' : 100,
-                    '千' : 1000,}
-
-        if strnumber == '〇':
-            return 0
-
-        else:
-            res = 0
-            digit = None
-            mul = 0
-            for index_char, char in enumerate(strnumber):
-
-                if char in data_mul:
-                    mul = data_mul[char]
-                    if digit is None:
-                        res += mul
-                    else:
-                        res += mul * digit
 
-                    digit = None
-                    mul = 0
-                else:
-                    digit = data_digits[char]
-                    mul = 0
-
-                    if index_char == len(strnumber)-1:
-                        res += digit
-
-        return res
+                See numberformat.FORMATS["一"].parse().
+        """
+        return numberformat.FORMATS["一"].parse(strnumber)
 
     #///////////////////////////////////////////////////////////////////////////
     def getNumberFromLowercGreekLetter(self, strnumber):
@@ -454,19 +683,10 @@ class HLevel(list):
                 HLevel.getNumberFromLowercGreekLetter
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.lowercasegreek_symbols] != []:
-            msg = "(HLevel.getNumberFromLowercGreekLetter) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.lowercasegreek_symbols))
-
-        res = 0
-        for index_char, char in enumerate(strnumber[::-1]):
-            res += (24 ** index_char) * (ord(char) - 0x3B1 + self.first_number)
 
-        return res
+                See numberformat.FORMATS["α"].parse().
+        """
+        return numberformat.FORMATS["α"].parse(strnumber, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getNumberFromLowercaseLetter(self, strnumber):
@@ -474,19 +694,10 @@ class HLevel(list):
                 HLevel.getNumberFromLowercaseLetter
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber if char not in HLevel.lowercaseletter_symbols] != []:
-            msg = "(HLevel.getNumberFromLowercaseLetter) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.lowercaseletter_symbols))
-
-        res = 0
-        for index_char, char in enumerate(strnumber[::-1]):
-            res += (26 ** index_char) * (ord(char) - 97 + self.first_number)
 
-        return res
+                See numberformat.FORMATS["a"].parse().
+        """
+        return numberformat.FORMATS["a"].parse(strnumber, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getNumberFromLowercRomanNumber(self, strnumber):
@@ -494,81 +705,34 @@ class HLevel(list):
                 HLevel.getNumberFromLowercRomanNumber
 
                 strnumber       : (str)
-        """
-        if [char for char in strnumber \
-            if char not in HLevel.lowercaseromannumber_symbols] != []:
-            msg = "(HLevel.getNumberFromLowercRomanNumber) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.lowercaseromannumber_symbols))
 
-        if self.first_number != 1:
-            msg = "(HLevel.getNumberFromLowercRomanNumber) " \
-                  "You can't use roman numbers (number read : {0}) if " \
-                  "self.first_number (='{0}') is not set to 1."
-            raise Exception(msg.format(strnumber,
-                                       self.first_number))
-
-        return self.getNumberFromCapitalRomanNumber(strnumber.upper())
+                See numberformat.FORMATS["i"].parse().
+        """
+        return numberformat.FORMATS["i"].parse(strnumber, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
     def getNumberFromSubscriptNumeral(strnumber):
         """
                 HLevel.getNumberFromSubscriptNumeral
+
+                strnumber       : (str)
+
+                See numberformat.FORMATS["₁"].parse().
         """
-        if [char for char in strnumber if char not in HLevel.subscript_symbols] != []:
-            msg = "(HLevel.getNumberFromSubscriptNumeral) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.subscript_symbols))
-
-        data = {"-" : "-",
-                chr(0x2080) : 0,
-                chr(0x2081) : 1,
-                chr(0x2082) : 2,
-                chr(0x2083) : 3,
-                chr(0x2084) : 4,
-                chr(0x2085) : 5,
-                chr(0x2086) : 6,
-                chr(0x2087) : 7,
-                chr(0x2088) : 8,
-                chr(0x2089) : 9}
-
-        _strnumber = "".join(str(data[char]) for char in strnumber)
-
-        return int(_strnumber)
+        return numberformat.FORMATS["₁"].parse(strnumber)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
     def getNumberFromSuperscriptNumeral(strnumber):
         """
                 HLevel.getNumberFromSuperscriptNumeral
+
+                strnumber       : (str)
+
+                See numberformat.FORMATS["¹"].parse().
         """
-        if [char for char in strnumber if char not in HLevel.superscript_symbols] != []:
-            msg = "(HLevel.getNumberFromSuperscriptNumeral) " \
-                  "In '{0}', there is (at least) one unknown symbol. " \
-                  "Allowed symbols are {1}."
-            raise Exception(msg.format(strnumber,
-                                       HLevel.superscript_symbols))
-
-        data = {"-" : "-",
-                chr(0x2070) : 0,
-                chr(0x00B9) : 1,
-                chr(0x00B2) : 2,
-                chr(0x00B3) : 3,
-                chr(0x2074) : 4,
-                chr(0x2075) : 5,
-                chr(0x2076) : 6,
-                chr(0x2077) : 7,
-                chr(0x2078) : 8,
-                chr(0x2079) : 9}
-
-        _strnumber = "".join(str(data[char]) for char in strnumber)
-
-        return int(_strnumber)
+        return numberformat.FORMATS["¹"].parse(strnumber)
 
     #///////////////////////////////////////////////////////////////////////////
     def getRepr(self):
@@ -582,62 +746,29 @@ class HLevel(list):
 
         len_self = len(self)
         len_numbers_format = len(self.numbers_format)
+        formats = numberformat.FORMATS
 
         # numbers :
         for number_index, number in enumerate(self):
 
             if number < self.first_number:
-                msg = "(HLevel.getRepr) number {0} is less than self.first_number={1}"
-                raise Exception(msg.format(number,
-                                           self.first_number))
+                raise RenderError("(HLevel.getRepr) number {0} is less than "
+                                  "self.first_number={1}",
+                                  number, self.first_number)
 
             if number_index+1 > len_numbers_format:
-                msg = "HLevel.getRepr : too many numbers in {0}; expected pattern is {1}."
-                raise Exception(msg.format(".".join(map(str, self)),
-                                           self.numbers_format))
+                raise RenderError("HLevel.getRepr : too many numbers in {0}; "
+                                  "expected pattern is {1}.",
+                                  ".".join(map(str, self)), self.numbers_format)
 
             number_format = self.numbers_format[number_index]
 
-            if number_format == '1':
-                res.append(self.getReprArabicNumber(number))
-
-            elif number_format == 'A':
-                res.append(self.getReprCapitalLetter(number))
-
-            elif number_format == 'a':
-                res.append(self.getReprLowerCaseLetter(number))
-
-            elif number_format == 'I':
-                res.append(self.getReprCapitalRomanNumber(number))
-
-            elif number_format == 'i':
-                res.append(self.getReprLowerCaseRomanNumber(number))
+            if number_format not in formats:
+                raise FormatError("HLevel.getRepr : unknown number format '{0}'; "
+                                  "expected formats are {1}.",
+                                  number_format, HLevel.reprnum)
 
-            elif number_format == '①':
-                res.append(self.getReprEnclosedNumber(number))
-
-            elif number_format == '一':
-                res.append(self.getReprJapaneseNumber(number))
-
-            elif number_format == '¹':
-                res.append(self.getReprSuperscriptNumeral(number))
-
-            elif number_format == '₁':
-                res.append(self.getReprSubscriptNumeral(number))
-
-            elif number_format == '１':
-                res.append(self.getReprArabicNumberFullWidth(number))
-
-            elif number_format == 'α':
-                res.append(self.getReprLowercaseGreekLetter(number))
-
-            elif number_format == 'Α':
-                res.append(self.getReprCapitalGreekLetter(number))
-
-            else:
-                msg = "HLevel.getRepr : unknown number format '0'; expected formats are {1}."
-                raise Exception(msg.format(number_format,
-                                           HLevel.reprnum))
+            res.append(formats[number_format].render(number, self.first_number))
 
             # separator ?
             if number_index+1 < len_self:
@@ -656,8 +787,10 @@ class HLevel(list):
                 HLevel.getReprArabicNumber
 
                 number  : (int)
+
+                See numberformat.FORMATS["1"].render().
         """
-        return str(number)
+        return numberformat.FORMATS["1"].render(number)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
@@ -666,28 +799,10 @@ class HLevel(list):
                 HLevel.getReprArabicNumberFullWidth
 
                 number  : (int)
-        """
-        strnumber = str(number)
 
-        res = []
-
-        digit_to_fullwidthdigit = {
-            "-"     : "-",
-            "0"     : "０",
-            "1"     : "１",
-            "2"     : "２",
-            "3"     : "３",
-            "4"     : "４",
-            "5"     : "５",
-            "6"     : "６",
-            "7"     : "７",
-            "8"     : "８",
-            "9"     : "９",}
-
-        for digit in str(strnumber):
-            res.append(digit_to_fullwidthdigit[digit])
-
-        return "".join(res)
+                See numberformat.FORMATS["１"].render().
+        """
+        return numberformat.FORMATS["１"].render(number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprCapitalGreekLetter(self, number):
@@ -695,10 +810,10 @@ class HLevel(list):
                 HLevel.getReprCapitalGreekLetter
 
                 number  : (int)
+
+                See numberformat.FORMATS["Α"].render().
         """
-        return self.stringBase(number=number,
-                               base=24,
-                               digits="ΑΒΓΔΕΖΗΘΙΚΛΜΝΞΟΠΡΣΤΥΦΧΨΩ")
+        return numberformat.FORMATS["Α"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprCapitalLetter(self, number):
@@ -706,10 +821,10 @@ class HLevel(list):
                 HLevel.getReprCapitalLetter
 
                 number  : (int)
+
+                See numberformat.FORMATS["A"].render().
         """
-        return self.stringBase(number=number,
-                               base=26,
-                               digits="ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        return numberformat.FORMATS["A"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprCapitalRomanNumber(self, number):
@@ -717,42 +832,10 @@ class HLevel(list):
                 HLevel.getReprCapitalRomanNumber
 
                 number  : (int)
-        """
-        if number < 0:
-            msg = "HLevel.getReprCapitalRomanNumber : can interpret number {0} as " \
-                  "a Roman numeral. Number must be greater than 0."
-            raise Exception(msg.format(number))
-
-        if self.first_number != 1:
-            msg = "(HLevel.getReprCapitalRomanNumber) " \
-                  "You can't use roman numbers (number read : {0}) if " \
-                  "self.first_number (='{0}') is not set to 1."
-            raise Exception(msg.format(number,
-                                       self.first_number))
-
-        data = (('M', 1000),
-                ('CM', 900),
-                ('D', 500),
-                ('CD', 400),
-                ('C', 100),
-                ('XC', 90),
-                ('L', 50),
-                ('XL', 40),
-                ('X', 10),
-                ('IX', 9),
-                ('V', 5),
-                ('IV', 4),
-                ('I', 1))
-
-        res = ""
-        decreasing_num = number
-
-        for num, integer in data:
-            while decreasing_num >= integer:
-                res += num
-                decreasing_num -= integer
 
-        return res
+                See numberformat.FORMATS["I"].render().
+        """
+        return numberformat.FORMATS["I"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprEnclosedNumber(self, number):
@@ -760,20 +843,10 @@ class HLevel(list):
                 HLevel.getReprEnclosedNumber
 
                 number  : (int)
-        """
-        if number < 1 or number > 20:
-            msg = "HLevel.getReprEnclosedNumber : can interpret number {0} as " \
-                  "an enclosed numeral. Expected range is [1;20]"
-            raise Exception(msg.format(number))
 
-        if self.first_number != 1:
-            msg = "(HLevel.getReprEnclosedNumber) " \
-                  "You can't use enclosed numbers (number read : {0}) if " \
-                  "self.first_number (='{0}') is not set to 1."
-            raise Exception(msg.format(number,
-                                       self.first_number))
-
-        return chr(0x2460 + number - 1)
+                See numberformat.FORMATS["①"].render().
+        """
+        return numberformat.FORMATS["①"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprJapaneseNumber(self, number):
@@ -781,44 +854,10 @@ class HLevel(list):
                 HLevel.getReprJapaneseNumber
 
                 number  : (int)
-        """
-        if number < self.first_number or number > 9999:
-            msg = "HLevel.getReprJapaneseNumber : can interpret number {0} as " \
-                  "a Japanese number. Expected range is [1;9999]"
-            raise Exception(msg.format(number))
-
-        japanese_digits = ['〇', '一', '二', '三', '四', '五', '六', '七', '八', '九']
-
-        res = []
-        strnumber = str(number)
-
-        for position, digit in enumerate(strnumber[::-1]):
-
-            if position == 0:
-                res.insert(0, japanese_digits[int(digit)])
-
-            elif position == 1 and int(digit) != 0:
-
-                res.insert(0, "十")
-
-                if int(digit) > 1:
-                    res.insert(0, japanese_digits[int(digit)])
 
-            elif position == 2 and int(digit) != 0:
-
-                res.insert(0, "百")
-
-                if int(digit) > 1:
-                    res.insert(0, japanese_digits[int(digit)])
-
-            elif position == 3 and int(digit) != 0:
-
-                res.insert(0, "千")
-
-                if int(digit) > 1:
-                    res.insert(0, japanese_digits[int(digit)])
-
-        return "".join(res)
+                See numberformat.FORMATS["一"].render().
+        """
+        return numberformat.FORMATS["一"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprLowercaseGreekLetter(self, number):
@@ -826,10 +865,10 @@ class HLevel(list):
                 HLevel.getReprLowercaseGreekLetter
 
                 number  : (int)
+
+                See numberformat.FORMATS["α"].render().
         """
-        return self.stringBase(number=number,
-                               base=24,
-                               digits="αβγδεζηθικλμνξοπρστυφχψω")
+        return numberformat.FORMATS["α"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprLowerCaseLetter(self, number):
@@ -837,10 +876,10 @@ class HLevel(list):
                 HLevel.getReprLowerCaseLetter
 
                 number  : (int)
+
+                See numberformat.FORMATS["a"].render().
         """
-        return self.stringBase(number=number,
-                               base=26,
-                               digits="ABCDEFGHIJKLMNOPQRSTUVWXYZ").lower()
+        return numberformat.FORMATS["a"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def getReprLowerCaseRomanNumber(self, number):
@@ -848,20 +887,10 @@ class HLevel(list):
                 HLevel.getReprLowerCaseRomanNumber
 
                 number  : (int)
-        """
-        if number < 0:
-            msg = "HLevel.getReprLowercaseRomanNumber : can interpret number {0} as " \
-                  "a Roman numeral. Number must be greater than 0."
-            raise Exception(msg.format(number))
-
-        if self.first_number != 1:
-            msg = "(HLevel.getReprLowercaseRomanNumber) " \
-                  "You can't use roman numbers (number read : {0}) if " \
-                  "self.first_number (='{0}') is not set to 1."
-            raise Exception(msg.format(number,
-                                       self.first_number))
 
-        return self.getReprCapitalRomanNumber(number).lower()
+                See numberformat.FORMATS["i"].render().
+        """
+        return numberformat.FORMATS["i"].render(number, self.first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
@@ -870,28 +899,10 @@ class HLevel(list):
                 HLevel.getReprSubscriptNumeral
 
                 number  : (int)
-        """
-        strnumber = str(number)
-
-        res = []
 
-        digit_to_subscriptdigit = {
-            "-"     : "-",
-            "0"     : chr(0x2080),
-            "1"     : chr(0x2081),
-            "2"     : chr(0x2082),
-            "3"     : chr(0x2083),
-            "4"     : chr(0x2084),
-            "5"     : chr(0x2085),
-            "6"     : chr(0x2086),
-            "7"     : chr(0x2087),
-            "8"     : chr(0x2088),
-            "9"     : chr(0x2089),}
-
-        for digit in str(strnumber):
-            res.append(digit_to_subscriptdigit[digit])
-
-        return "".join(res)
+                See numberformat.FORMATS["₁"].render().
+        """
+        return numberformat.FORMATS["₁"].render(number)
 
     #///////////////////////////////////////////////////////////////////////////
     @staticmethod
@@ -900,28 +911,42 @@ class HLevel(list):
                 HLevel.getReprSuperscriptNumeral
 
                 number  : (int)
+
+                See numberformat.FORMATS["¹"].render().
         """
-        strnumber = str(number)
+        return numberformat.FORMATS["¹"].render(number)
 
-        res = []
+    #///////////////////////////////////////////////////////////////////////////
+    def getSearchPattern(self, encoding=None):
+        """
+                HLevel.getSearchPattern
 
-        digit_to_superscriptdigit = {
-            "-"     : "-",
-            "0"     : chr(0x2070),
-            "1"     : chr(0x00B9),
-            "2"     : chr(0x00B2),
-            "3"     : chr(0x00B3),
-            "4"     : chr(0x2074),
-            "5"     : chr(0x2075),
-            "6"     : chr(0x2076),
-            "7"     : chr(0x2077),
-            "8"     : chr(0x2078),
-            "9"     : chr(0x2079),}
-
-        for digit in str(strnumber):
-            res.append(digit_to_superscriptdigit[digit])
+                encoding        : None or (str) name of an encoding
 
-        return "".join(res)
+                Return the (str)regex matching the level strings written with the
+                current format : prefix, at least one number, suffix. Each number is
+                matched by the search pattern of its format (see
+                numberformat.NumberFormat), the following numbers being optional.
+
+                If <encoding> is not None, return a (bytes)regex matching the level
+                strings encoded with <encoding>.
+        """
+        def text(src):
+            """
+                text : <src> encoded with <encoding>
+            """
+            return src if encoding is None else src.encode(encoding)
+
+        pattern = text("")
+        for number_format in reversed(self.numbers_format):
+            number_pattern = numberformat.get_format(number_format).getSearchPattern(encoding)
+            if pattern:
+                pattern = text("(?:") + number_pattern + \
+                          text("(?:") + re.escape(text(self.separator)) + pattern + text(")?)")
+            else:
+                pattern = text("(?:") + number_pattern + text(")")
+
+        return re.escape(text(self.prefix)) + pattern + re.escape(text(self.suffix))
 
     #///////////////////////////////////////////////////////////////////////////
     def initFromStr(self, src):
@@ -932,100 +957,371 @@ class HLevel(list):
 
                 Initialize <self> from (str)src.
         """
-        if not (src.startswith(self.prefix) and src.endswith(self.suffix)):
+        values, error_offset, reason, reason_args = \
+            HLevel._tokenize(src, self.separator, self.prefix, self.suffix,
+                             self.numbers_format, self.first_number)
 
-            msg = "(HLevel.initFromStr) missing prefix '{0}' or suffix '{1}' in string '{2}'."
-            raise Exception(msg.format(self.prefix,
-                                       self.suffix,
-                                       src))
+        if values is None:
+            raise ParseError(src, self.getFormatStr(), error_offset, reason, *reason_args)
 
-        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        self.clear()
+        self[:] = values
 
-        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        # no prefix, no suffix :
-        _src = src[len(self.prefix):-len(self.suffix)]
+    #///////////////////////////////////////////////////////////////////////////
+    def insert(self, index, value):
+        """
+                HLevel.insert
+        """
+        try:
+            list.insert(self, index, value)
+        finally:
+            self._repr = None
 
-        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        for strnumber_index, strnumber in enumerate(_src.split(self.separator)):
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def is_valid(src, formatstr=None, first_number=1, allow_empty=False):
+        """
+                HLevel.is_valid
 
-            if strnumber_index >= len(self.numbers_format):
-                msg = "(HLevel.initFromStr) Too many integers in '{0}'; format string='{1}'"
-                raise Exception(msg.format(_src,
-                                           self.numbers_format))
+                src             : (str)
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+                allow_empty     : (bool) if False, the empty level (e.g. "" for
+                                  ".1.1", "()" for ".(1.1)") is not valid
 
-            number_format = self.numbers_format[strnumber_index]
+                Return True if <src> can be read with <formatstr>; no HLevel object is
+                created and no error message is formatted.
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        separator, prefix, suffix, numbers_format = HLevel.compileFormat(formatstr)
 
-            if number_format == '1':
-                self.append(self.getNumberFromArabicNumber(strnumber))
+        values = HLevel._tokenize(src, separator, prefix, suffix,
+                                  numbers_format, first_number)[0]
+        return values is not None and (allow_empty or values != [])
 
-            elif number_format == 'A':
-                self.append(self.getNumberFromCapitalLetter(strnumber))
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def iter_range(start,
+                   stop,
+                   fanout,
+                   formatstr=None,
+                   first_number=1,
+                   first_value=1,
+                   leaves_only=False,
+                   strings=False):
+        """
+                HLevel.iter_range
+
+                start, stop     : (str) levels written with <formatstr>, or iterables
+                                  of (int), e.g. HLevel objects
+                fanout          : (int) number of children of each level, or a list
+                                  of (int), the number of children at each depth
+                                  (fanout[0] : number of levels of depth 1, ...)
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+                first_value     : (int) value of the first child of a level
+                leaves_only     : (bool) True to yield only the deepest levels
+                strings         : (bool) True to yield the (str) levels
+
+                Yield, in the HLevel order, all the levels <level> of the tree
+                described by <fanout> such as start <= level <= stop; the depth of the
+                tree is len(fanout), or the depth of the deepest bound if <fanout> is
+                an int.
+                E.g. HLevel.iter_range("A.I.1", "C.V.9", (3, 5, 9), ".A.I.1") : A.I.1,
+                A.I.2, ..., A.I.9, A.II, A.II.1, ..., C.V.9.
+
+                Only one HLevel object is created and yielded again and again, modified
+                in place : copy it (e.g. HLevel.fromValues()) to keep it. With
+                <strings>, only the modified number is rendered at each step. The
+                memory used is O(depth), whatever the number of levels.
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        separator, prefix, suffix, numbers_format = HLevel.compileFormat(formatstr)
+
+        if isinstance(start, str):
+            start = HLevel(src=start, formatstr=formatstr, first_number=first_number)
+        if isinstance(stop, str):
+            stop = HLevel(src=stop, formatstr=formatstr, first_number=first_number)
+        start = list(start)
+        stop = list(stop)
+        if isinstance(fanout, int):
+            fanout = (fanout,)*max(len(start), len(stop))
+        # last value at each depth :
+        last_values = [first_value + number_of_children - 1 for number_of_children in fanout]
+        depth = len(last_values)
+
+        cursor = HLevel.fromValues(start, formatstr, first_number)
+        if not cursor or len(cursor) > depth or \
+           any(not first_value <= value <= last_value
+               for value, last_value in zip(cursor, last_values)):
+            raise HLevelError("(HLevel.iter_range) {0} is not a level of the tree "
+                              "{1}, first value {2}", list(cursor), fanout, first_value)
+
+        # strings : the rendered numbers of the cursor
+        renderers = []
+        numbers = []
+        if strings:
+            if first_value < first_number:
+                raise RenderError("(HLevel.iter_range) number {0} is less than "
+                                  "first_number={1}", first_value, first_number)
+            for symbol in numbers_format[:depth]:
+                renderers.append(numberformat.get_format(symbol).render)
+            numbers = [renderers[index](value, first_number)
+                       for index, value in enumerate(cursor)]
+
+        while cursor <= stop:
+            if not leaves_only or len(cursor) == depth:
+                yield prefix + separator.join(numbers) + suffix if strings else cursor
+
+            # next level : the first child, the next sibling, the next sibling of an
+            # ancestor :
+            if len(cursor) < depth:
+                cursor.append(first_value)
+                if strings:
+                    numbers.append(renderers[len(cursor)-1](first_value, first_number))
+                continue
+
+            while cursor and cursor[-1] >= last_values[len(cursor)-1]:
+                cursor.pop()
+                if strings:
+                    numbers.pop()
+            if not cursor:
+                return
+            cursor[-1] += 1
+            if strings:
+                numbers[-1] = renderers[len(cursor)-1](cursor[-1], first_number)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def pop(self, index=-1):
+        """
+                HLevel.pop
+        """
+        try:
+            return list.pop(self, index)
+        finally:
+            self._repr = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def remove(self, value):
+        """
+                HLevel.remove
+        """
+        try:
+            list.remove(self, value)
+        finally:
+            self._repr = None
 
-            elif number_format == 'a':
-                self.append(self.getNumberFromLowercaseLetter(strnumber))
+    #///////////////////////////////////////////////////////////////////////////
+    def reverse(self):
+        """
+                HLevel.reverse
+        """
+        try:
+            list.reverse(self)
+        finally:
+            self._repr = None
 
-            elif number_format == 'I':
-                self.append(self.getNumberFromCapitalRomanNumber(strnumber))
+    #///////////////////////////////////////////////////////////////////////////
+    def setFormat(self, formatstr):
+        """
+                HLevel.setFormat
 
-            elif number_format == 'i':
-                self.append(self.getNumberFromLowercRomanNumber(strnumber))
+                src     : (str)
+        """
+        separator, prefix, suffix, numbers_format = HLevel.compileFormat(formatstr)
 
-            elif number_format == '①':
-                self.append(self.getNumberFromEnclosedNumber(strnumber))
+        self.separator = separator
+        self.prefix = prefix
+        self.suffix = suffix
+        self.numbers_format = list(numbers_format)
 
-            elif number_format == '一':
-                self.append(self.getNumberFromJapaneseNumber(strnumber))
+    #///////////////////////////////////////////////////////////////////////////
+    def sort(self, *, key=None, reverse=False):
+        """
+                HLevel.sort
+        """
+        try:
+            list.sort(self, key=key, reverse=reverse)
+        finally:
+            self._repr = None
 
-            elif number_format == '¹':
-                self.append(self.getNumberFromSuperscriptNumeral(strnumber))
+    #///////////////////////////////////////////////////////////////////////////
+    def tokenizeStr(self, src):
+        """
+                HLevel.tokenizeStr
 
-            elif number_format == '₁':
-                self.append(self.getNumberFromSubscriptNumeral(strnumber))
+                src     : (str)
 
-            elif number_format == '１':
-                self.append(self.getNumberFromFullWidthNumeral(strnumber))
+                Read (str)src, character after character, validating and computing the
+                numbers at the same time : each character is read only once. The prefix
+                and the suffix may be empty; a string made of the prefix and the suffix
+                gives an empty list.
 
-            elif number_format == 'α':
-                self.append(self.getNumberFromLowercGreekLetter(strnumber))
+                Return (list of the integers read, None, None) or, if <src> can't be read,
+                (None, (int)offset of the faulty character in <src>, (str)error message).
+        """
+        values, error_offset, reason, reason_args = \
+            HLevel._tokenize(src, self.separator, self.prefix, self.suffix,
+                             self.numbers_format, self.first_number)
 
-            elif number_format == 'Α':
-                self.append(self.getNumberFromCapitalGreekLetter(strnumber))
+        if values is None:
+            return (None, error_offset, reason.format(*reason_args))
+        return (values, None, None)
 
     #///////////////////////////////////////////////////////////////////////////
-    def setFormat(self, formatstr):
+    @staticmethod
+    def _tokenize(src, separator, prefix, suffix, numbers_format, first_number):
         """
-                HLevel.setFormat
+                HLevel._tokenize
 
-                src     : (str)
+                src             : (str)
+                separator, prefix, suffix, numbers_format, first_number : the format
+
+                See HLevel.tokenizeStr(); no error message is formatted here.
+
+                Return (list of the integers read, None, None, None) or, if <src> can't
+                be read, (None, (int)offset of the faulty character in <src>,
+                (str)reason, (tuple)arguments of the reason).
         """
-        if formatstr == "":
-            raise Exception("HLevel.setFormat : empty format string")
+        formats = numberformat.FORMATS
 
-        self.separator = ""
-        self.prefix = ""
-        self.suffix = ""
-        self.numbers_format = []
+        if not src.startswith(prefix):
+            return (None, 0, "missing prefix '{0}'", (prefix,))
+
+        len_src = len(src)
+        len_numbers_format = len(numbers_format)
+
+        values = []
+        index = len(prefix)
+
+        while True:
+            #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+            # a new number begins at <index> :
+            if len(values) >= len_numbers_format:
+                return (None, index, "too many numbers; format is {0}", (numbers_format,))
+
+            if numbers_format[len(values)] not in formats:
+                return (None, index, "unknown number format '{0}'",
+                        (numbers_format[len(values)],))
+
+            number_format = formats[numbers_format[len(values)]]
+            rule = number_format.rule
+            table = number_format.decode_table
+            base = number_format.base
+            signed = number_format.signed
+
+            if (rule == "additive" or rule == "enumerated") and first_number != 1:
+                return (None, index, "{0} can't be read if first_number (={1}) is not set to 1",
+                        (number_format.name, first_number))
 
-        for index_char, char in enumerate(formatstr):
+            number_start = index
+            value = 0
+            sign = 1
+            previous = 0        # additive numbers : value of the previous symbol
+            digit = None        # multiplicative numbers : pending digit
 
-            if index_char == 0:
-                self.separator = char
+            for index in range(number_start, len_src):
+                char = src[index]
 
-            elif char == self.separator:
-                pass
+                if char in table:
+                    symbol_value = table[char]
 
-            elif char not in HLevel.reprnum and self.numbers_format == []:
-                self.prefix += char
+                    if rule == "positional":
+                        value = value*base + symbol_value
 
-            elif char in HLevel.reprnum:
-                self.numbers_format.append(char)
+                    elif rule == "bijective":
+                        value = value*base + symbol_value + first_number
 
-            elif char not in HLevel.invalid_chars_in_pre_suffix:
-                self.suffix += char
+                    elif rule == "additive":
+                        value += symbol_value
+                        if previous < symbol_value:
+                            value -= 2*previous
+                        previous = symbol_value
 
+                    elif rule == "enumerated":
+                        if index != number_start:
+                            return (None, index, "only one symbol allowed for {0}",
+                                    (number_format.name,))
+                        value = symbol_value
+
+                    elif symbol_value >= base:
+                        # multiplier :
+                        value += symbol_value * (1 if digit is None else digit)
+                        digit = None
+
+                    else:
+                        # digit multiplied by the next multiplier :
+                        if digit is not None:
+                            return (None, index, "two consecutive digits in {0}",
+                                    (number_format.name,))
+                        digit = symbol_value
+
+                elif char == "-" and signed and index == number_start:
+                    sign = -1
+
+                else:
+                    end_of_number = index
+                    break
             else:
-                raise Exception("HLevel.setFormat : wrong format string = '{0}'".format(formatstr))
+                end_of_number = len_src
+
+            index = end_of_number
+
+            #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+            # the number is over :
+            if index == number_start or (sign == -1 and index == number_start+1):
+                if values == [] and index == number_start and src[index:] == suffix:
+                    # nothing but the prefix and the suffix :
+                    return ([], None, None, None)
+                if index < len_src and src[index] != separator and src[index:] != suffix:
+                    # neither a symbol of the number nor the end of the number :
+                    return (None, index, "unexpected character '{0}'", (src[index],))
+                return (None, index, "empty number", ())
+
+            if digit is not None:
+                value += digit
+            values.append(sign*value)
+
+            if index < len_src and src[index] == separator:
+                index += 1
+
+            elif src[index:] == suffix:
+                return (values, None, None, None)
+
+            elif index == len_src:
+                return (None, index, "missing suffix '{0}'", (suffix,))
+
+            else:
+                return (None, index, "unexpected character '{0}'", (src[index],))
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def try_parse(src, formatstr=None, first_number=1, allow_empty=False):
+        """
+                HLevel.try_parse
+
+                src             : (str)
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+                allow_empty     : (bool) if False, None is returned for the empty
+                                  level (e.g. "" for ".1.1", "()" for ".(1.1)") :
+                                  a blank line isn't a level
+
+                Return a new HLevel object read from <src> or None if <src> can't be
+                read with <formatstr> : unlike HLevel(src=...), no exception is raised
+                and no error message is formatted. A wrong <formatstr> still raises
+                a FormatError.
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        separator, prefix, suffix, numbers_format = HLevel.compileFormat(formatstr)
+
+        values = HLevel._tokenize(src, separator, prefix, suffix,
+                                  numbers_format, first_number)[0]
+        if values is None or (values == [] and not allow_empty):
+            return None
+        return HLevel.fromValues(values, formatstr, first_number)
 
     #///////////////////////////////////////////////////////////////////////////
     def stringBase(self,
@@ -1047,3 +1343,14 @@ class HLevel(list):
             return self.stringBase(div, base, digits) + digits[mod]
 
         return digits[mod]
+
+numberformat.REGISTRATION_HOOKS.append(HLevel.clearCaches)
+
+#///////////////////////////////////////////////////////////////////////////////
+def _unpickleHLevel(formatstr, values, first_number=1):
+    """
+        _unpickleHLevel
+
+        Function called by pickle to rebuild a HLevel object : see HLevel.__reduce__.
+    """
+    return HLevel.fromValues(values, formatstr, first_number)
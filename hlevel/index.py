@@ -0,0 +1,731 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/index.py
+
+    * sidecar index of the headings of a (large) document
+
+    A heading is a line beginning with a level string followed by a space or by
+    the end of the line, e.g. "IV.3.b Penalties" with the format ".I.1.a".
+
+    build_index() reads the document once (memory-mapped) and writes the index
+    file, made of a header and of fixed-size records sorted by level :
+
+        header  : MAGIC, key size, number of records, size of the document,
+                  format string
+        record  : sort key of the level (see hlevel/sortkey.py) padded with zeros
+                  to <key size> bytes, length of the sort key, byte offset of the
+                  heading in the document, length in bytes of the heading line
+        offsets : the offsets of the headings in the document order (8 bytes each)
+
+    Padding with zeros keeps the order of the sort keys (an encoded integer never
+    begins with 0x00) : the records are sorted by memcmp. HeadingIndex memory-maps
+    the index file and finds a level by binary search; the document is then read
+    at the right offset : nothing else is read.
+
+    After an edit of the document, HeadingIndex.update() reads again only the
+    edited lines. The records being sorted by level, shifting the offsets of the
+    following headings in the file would cost a pass over the whole index : the
+    edits are journaled instead (in memory). The records of the edited lines are
+    masked, the offsets of the other records are shifted when they are read and
+    the headings found in the edited lines are kept in a small sorted list.
+    HeadingIndex.compact() writes the whole index again, with the journal applied.
+
+    How it works :
+        build_index("law.txt", formatstr=".I.1.a")          # writes law.txt.hli
+        with HeadingIndex("law.txt.hli") as index:
+            index.seek("IV.3.b")                            # -> offset
+            print(index.heading("IV.3.b"))                  # "IV.3.b Penalties"
+
+            # the document has been edited : 5 bytes at offset 1200 replaced by "IV.4"
+            index.update(1200, 5, "IV.4")
+            index.compact()
+"""
+
+import bisect
+import heapq
+import itertools
+import mmap
+import os
+import re
+import struct
+
+from hlevel.errors import DecodeError, HLevelError
+from hlevel.hlevel import HLevel
+from hlevel.sortkey import encode_sortkey, decode_sortkey, subtree_bounds
+
+# first bytes of the index file :
+MAGIC = b"HLI\x01"
+
+# header, after MAGIC : key size, number of records, size of the document,
+# length of the (utf-8) format string
+HEADER = struct.Struct(">HQQH")
+
+# default maximal size of a sort key : 24 bytes ~ 12 numbers < 256
+DEFAULT_KEY_SIZE = 24
+
+# extension of the index file, added to the name of the document :
+INDEX_EXTENSION = ".hli"
+
+# offsets of the headings, in the document order :
+OFFSET = struct.Struct(">Q")
+
+# size of the chunks read in the document to find the beginning/the end of a line :
+CHUNK_SIZE = 4096
+
+#///////////////////////////////////////////////////////////////////////////////
+def heading_regex(formatstr, encoding="utf-8"):
+    """
+        heading_regex
+
+        formatstr       : (str) format of the headings
+        encoding        : (str) encoding of the document
+
+        Return the compiled (bytes)regex matching the level strings at the beginning
+        of a line, followed by a space, a tab or the end of the line.
+    """
+    return re.compile(b"^" + HLevel(formatstr=formatstr).getSearchPattern(encoding) +
+                      b"(?=[ \\t\\r\\n]|\\Z)",
+                      re.MULTILINE)
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_headings(buffer, formatstr, encoding="utf-8", start=0, end=None):
+    """
+        iter_headings
+
+        buffer          : bytes-like object, e.g. a memory-mapped document
+        formatstr       : (str) format of the headings
+        encoding        : (str) encoding of the document
+        start, end      : (int) only the headings beginning in buffer[start:end] are
+                          read; <start> must be the beginning of a line
+
+        Yield ((list of int)values, (int)offset, (int)length) for each heading,
+        in the document order; <length> is the length in bytes of the heading
+        line, without the end of line.
+    """
+    if end is None:
+        end = len(buffer)
+
+    for match in heading_regex(formatstr, encoding).finditer(buffer, start, end):
+        hlevel = HLevel.try_parse(match.group().decode(encoding), formatstr)
+        if hlevel is None:
+            continue
+
+        offset = match.start()
+        line_end = buffer.find(b"\n", match.end())
+        if line_end == -1:
+            line_end = len(buffer)
+        if line_end > offset and buffer[line_end-1] == 0x0D:   # "\r"
+            line_end -= 1
+
+        yield (list(hlevel), offset, line_end - offset)
+
+#///////////////////////////////////////////////////////////////////////////////
+def record_struct(key_size):
+    """
+        record_struct
+
+        key_size        : (int)
+
+        Return the struct.Struct object of a record : padded sort key, length of the
+        sort key, offset, length.
+    """
+    return struct.Struct(">{0}sBQI".format(key_size))
+
+#///////////////////////////////////////////////////////////////////////////////
+def pack_record(record, values, offset, length):
+    """
+        pack_record
+
+        record          : struct.Struct object returned by record_struct()
+        values          : iterable of (int)
+        offset, length  : (int)
+
+        Return the (bytes) record.
+    """
+    key = encode_sortkey(values)
+    key_size = record.size - 13
+    if len(key) > key_size:
+        msg = "(index.pack_record) the sort key of {0} is {1} bytes long; the key " \
+              "size of the index is {2} bytes."
+        raise HLevelError(msg, list(values), len(key), key_size)
+    return record.pack(key, len(key), offset, length)
+
+#///////////////////////////////////////////////////////////////////////////////
+def write_index(index_path, records, offsets, formatstr, document_size, key_size):
+    """
+        write_index
+
+        index_path      : (str) path of the index file
+        records         : sorted list of (bytes) records, see pack_record()
+        offsets         : sorted list of the (int) offsets of the headings
+        formatstr       : (str)
+        document_size   : (int)
+        key_size        : (int)
+
+        Write the index file; a temporary file replaces <index_path> once written.
+    """
+    encoded_formatstr = formatstr.encode("utf-8")
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as index_file:
+        index_file.write(MAGIC)
+        index_file.write(HEADER.pack(key_size, len(records), document_size,
+                                     len(encoded_formatstr)))
+        index_file.write(encoded_formatstr)
+        index_file.write(b"".join(records))
+        index_file.write(b"".join(map(OFFSET.pack, offsets)))
+    os.replace(tmp_path, index_path)
+
+#///////////////////////////////////////////////////////////////////////////////
+def build_index(document_path,
+                index_path=None,
+                formatstr=None,
+                key_size=DEFAULT_KEY_SIZE,
+                encoding="utf-8"):
+    """
+        build_index
+
+        document_path   : (str) path of the document
+        index_path      : (str) path of the index file; if None, <document_path> +
+                          INDEX_EXTENSION
+        formatstr       : (str) format of the headings; if None, HLevel.defaultformat
+        key_size        : (int) maximal size of the sort keys
+        encoding        : (str) encoding of the document
+
+        Read the document once and write its index. Return the number of headings.
+    """
+    if index_path is None:
+        index_path = document_path + INDEX_EXTENSION
+    if formatstr is None:
+        formatstr = HLevel.defaultformat
+    record = record_struct(key_size)
+
+    records = []
+    offsets = []        # in the document order
+    with open(document_path, "rb") as document:
+        document_size = os.fstat(document.fileno()).st_size
+        if document_size > 0:
+            with mmap.mmap(document.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                headings = iter_headings(buffer, formatstr, encoding)
+                try:
+                    for values, offset, length in headings:
+                        records.append(pack_record(record, values, offset, length))
+                        offsets.append(offset)
+                finally:
+                    # the regex iterator must release <buffer> before it's closed :
+                    headings.close()
+    records.sort()
+
+    write_index(index_path, records, offsets, formatstr, document_size, key_size)
+    return len(records)
+
+################################################################################
+class HeadingIndex(object):
+    """
+        class HeadingIndex
+
+        Index file written by build_index(), memory-mapped, and the journal of the
+        updates not yet written (see update() and compact()).
+
+        The records of the file are called the "base records"; their offsets are
+        the offsets in the document before the updates.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, index_path, document_path=None):
+        """
+                HeadingIndex.__init__
+
+                index_path      : (str) path of the index file
+                document_path   : (str) path of the document; if None, <index_path>
+                                  without INDEX_EXTENSION
+        """
+        if document_path is None and index_path.endswith(INDEX_EXTENSION):
+            document_path = index_path[:-len(INDEX_EXTENSION)]
+        self.index_path = index_path
+        self.document_path = document_path
+        self.document = None            # document file, opened by self.openDocument()
+        self.index_file = None
+        self.buffer = None
+
+        self.load()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __enter__(self):
+        """
+                HeadingIndex.__enter__
+        """
+        return self
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __exit__(self, *exc_info):
+        """
+                HeadingIndex.__exit__
+        """
+        self.close()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __iter__(self):
+        """
+                HeadingIndex.__iter__
+
+                Yield ((list of int)values, (int)offset, (int)length) for each heading,
+                sorted by level.
+        """
+        return self.iterHeadings(b"", b"\xFF"*(self.key_size+1))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __len__(self):
+        """
+                HeadingIndex.__len__
+        """
+        return self.count - self.number_of_deleted + len(self.added)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def bisect(self, key):
+        """
+                HeadingIndex.bisect
+
+                key     : (bytes) sort key
+
+                Return the index of the first base record whose key is >= <key>.
+        """
+        key = key.ljust(self.key_size, b"\x00")
+        return bisect.bisect_left(range(self.count), key, key=self.getKey)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def close(self):
+        """
+                HeadingIndex.close
+
+                The updates not written by compact() are lost.
+        """
+        if self.document is not None:
+            self.document.close()
+            self.document = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self.index_file is not None:
+            self.index_file.close()
+            self.index_file = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def compact(self):
+        """
+                HeadingIndex.compact
+
+                Write the index file again, with the updates : the journal is empty
+                afterwards. Read the whole index.
+        """
+        records = []
+        offsets = []
+        for values, offset, length in self:
+            records.append(pack_record(self.record, values, offset, length))
+            offsets.append(offset)
+        offsets.sort()
+
+        self.close()
+        write_index(self.index_path, records, offsets, self.formatstr,
+                    self.document_size, self.key_size)
+        self.load()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def countBaseRecords(self, low, high):
+        """
+                HeadingIndex.countBaseRecords
+
+                low, high       : (int) offsets, before the updates
+
+                Return the number of base records whose offset is in [low, high[.
+        """
+        return bisect.bisect_left(range(self.count), high, key=self.getOffset) - \
+               bisect.bisect_left(range(self.count), low, key=self.getOffset)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def deleteBaseRecords(self, low, high):
+        """
+                HeadingIndex.deleteBaseRecords
+
+                low, high       : (int) offsets, before the updates
+
+                Mask the base records whose offset is in [low, high[.
+        """
+        if low >= high:
+            return
+
+        # the ranges [first, last[ of self.deleted overlap [low, high[ : merged.
+        first = bisect.bisect_left(self.deleted, (low,))
+        if first > 0 and self.deleted[first-1][1] >= low:
+            first -= 1
+        last = first
+        while last < len(self.deleted) and self.deleted[last][0] <= high:
+            last += 1
+
+        merged = self.deleted[first:last]
+        if merged:
+            low = min(low, merged[0][0])
+            high = max(high, merged[-1][1])
+        self.number_of_deleted += self.countBaseRecords(low, high) - \
+            sum(self.countBaseRecords(range_low, range_high) for range_low, range_high in merged)
+        self.deleted[first:last] = [(low, high)]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def findLineEnd(self, position):
+        """
+                HeadingIndex.findLineEnd
+
+                position        : (int) offset in the document
+
+                Return the offset of the end of the line containing <position> (i.e.
+                of the next end of line, or the size of the document).
+        """
+        self.document.seek(position)
+        while True:
+            chunk = self.document.read(CHUNK_SIZE)
+            if not chunk:
+                return position
+            newline = chunk.find(b"\n")
+            if newline != -1:
+                return position + newline
+            position += len(chunk)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def findLineStart(self, position):
+        """
+                HeadingIndex.findLineStart
+
+                position        : (int) offset in the document
+
+                Return the offset of the beginning of the line containing <position>.
+        """
+        while position > 0:
+            chunk_start = max(0, position-CHUNK_SIZE)
+            self.document.seek(chunk_start)
+            newline = self.document.read(position-chunk_start).rfind(b"\n")
+            if newline != -1:
+                return chunk_start + newline + 1
+            position = chunk_start
+        return 0
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getKey(self, record_index):
+        """
+                HeadingIndex.getKey
+
+                record_index    : (int)
+
+                Return the (bytes) padded sort key of the base record #<record_index>.
+        """
+        start = self.records_start + record_index*self.record.size
+        return self.buffer[start:start+self.key_size]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getOffset(self, heading_index):
+        """
+                HeadingIndex.getOffset
+
+                heading_index   : (int)
+
+                Return the (int) offset, before the updates, of the base record
+                #<heading_index> in the document order.
+        """
+        return OFFSET.unpack_from(self.buffer, self.offsets_start + heading_index*OFFSET.size)[0]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getValues(self, level):
+        """
+                HeadingIndex.getValues
+
+                level   : HLevel object, iterable of (int) or (str) level string written
+                          with self.formatstr
+
+                Return the (list of int) values of <level>.
+        """
+        if isinstance(level, str):
+            return list(HLevel(src=level, formatstr=self.formatstr))
+        return list(level)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def heading(self, level, encoding="utf-8"):
+        """
+                HeadingIndex.heading
+
+                level   : see HeadingIndex.getValues()
+                encoding: (str) encoding of the document
+
+                Return the (str) first heading line whose level is <level>, None if
+                there's none.
+        """
+        found = self.lookup(level)
+        if not found:
+            return None
+        offset, length = found[0]
+        self.openDocument().seek(offset)
+        return self.document.read(length).decode(encoding)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def isDeleted(self, offset):
+        """
+                HeadingIndex.isDeleted
+
+                offset  : (int) offset of a base record, before the updates
+
+                Return True if the line of this base record has been updated.
+        """
+        range_index = bisect.bisect_right(self.deleted, (offset, float("inf"))) - 1
+        return range_index >= 0 and offset < self.deleted[range_index][1]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterHeadings(self, low, high):
+        """
+                HeadingIndex.iterHeadings
+
+                low, high       : (bytes) padded sort keys
+
+                Yield ((list of int)values, (int)offset, (int)length) for the headings
+                whose padded sort key is in [low, high[, sorted by level then by
+                offset.
+        """
+        base = self.iterRecords(self.bisect(low), self.bisect(high))
+        if not self.edits:
+            yield from base
+            return
+
+        # base records : masked if updated, offsets shifted by the updates
+        boundaries = [boundary for boundary, _ in self.shifts]
+        shifts = list(itertools.accumulate(shift for _, shift in self.shifts))
+
+        def shifted_base():
+            """
+                shifted_base : yield (padded key, offset, length, values)
+            """
+            for values, offset, length in base:
+                if not self.isDeleted(offset):
+                    shift_index = bisect.bisect_right(boundaries, offset)
+                    if shift_index:
+                        offset += shifts[shift_index-1]
+                    yield (encode_sortkey(values).ljust(self.key_size, b"\x00"),
+                           offset, length, values)
+
+        added = self.added[bisect.bisect_left(self.added, (low,)):
+                           bisect.bisect_left(self.added, (high,))]
+        for _, offset, length, values in heapq.merge(shifted_base(), added,
+                                                     key=lambda heading: heading[:2]):
+            yield (list(values), offset, length)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterRecords(self, first, last):
+        """
+                HeadingIndex.iterRecords
+
+                first, last     : (int) indexes of base records
+
+                Yield ((list of int)values, (int)offset, (int)length) for the base
+                records #first to #last-1, the offsets being the ones before the
+                updates.
+        """
+        record = self.record
+        for record_index in range(first, last):
+            key, key_length, offset, length = \
+                record.unpack_from(self.buffer, self.records_start + record_index*record.size)
+            yield (decode_sortkey(key[:key_length]), offset, length)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def load(self):
+        """
+                HeadingIndex.load
+
+                (Re)open the index file and empty the journal of the updates.
+        """
+        self.index_file = open(self.index_path, "rb")
+        self.buffer = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.buffer[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise DecodeError("(HeadingIndex.load) '{0}' is not a HLevel index file.",
+                              self.index_path)
+
+        self.key_size, self.count, self.document_size, len_formatstr = \
+            HEADER.unpack_from(self.buffer, len(MAGIC))
+        start = len(MAGIC) + HEADER.size
+        self.formatstr = self.buffer[start:start+len_formatstr].decode("utf-8")
+        self.records_start = start + len_formatstr
+        self.record = record_struct(self.key_size)
+        self.offsets_start = self.records_start + self.count*self.record.size
+
+        # journal of the updates :
+        self.edits = []             # (start, old length, new length), in order
+        # sorted (offset before the updates, shift) : the base records after this
+        # offset are shifted.
+        self.shifts = []
+        self.deleted = []           # sorted disjoint [low, high[ offsets before the updates
+        self.number_of_deleted = 0  # number of base records in self.deleted
+        self.added = []             # sorted (padded key, offset, length, values)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def lookup(self, level):
+        """
+                HeadingIndex.lookup
+
+                level   : see HeadingIndex.getValues()
+
+                Return the list of the ((int)offset, (int)length) of the headings whose
+                level is <level>, in the document order.
+        """
+        key = encode_sortkey(self.getValues(level)).ljust(self.key_size, b"\x00")
+        return [(offset, length) for _, offset, length in self.iterHeadings(key, key+b"\x00")]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def openDocument(self):
+        """
+                HeadingIndex.openDocument
+
+                Open (once) self.document, the document in binary mode, and return it.
+                Raise an HLevelError if the size of the document isn't the one read
+                when the index has been built (or updated).
+        """
+        if self.document is None:
+            self.document = open(self.document_path, "rb")
+            document_size = os.fstat(self.document.fileno()).st_size
+            if document_size != self.document_size:
+                self.document.close()
+                self.document = None
+                msg = "(HeadingIndex.openDocument) the document '{0}' ({1} bytes) has " \
+                      "been modified since the index has been built ({2} bytes)."
+                raise HLevelError(msg, self.document_path, document_size,
+                                  self.document_size)
+        return self.document
+
+    #///////////////////////////////////////////////////////////////////////////
+    def seek(self, level):
+        """
+                HeadingIndex.seek
+
+                level   : see HeadingIndex.getValues()
+
+                Move self.document (the document opened in binary mode) to the first
+                heading whose level is <level>. Return the offset of this heading or
+                None if there's none.
+        """
+        found = self.lookup(level)
+        if not found:
+            return None
+        self.openDocument().seek(found[0][0])
+        return found[0][0]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def subtree(self, level):
+        """
+                HeadingIndex.subtree
+
+                level   : see HeadingIndex.getValues()
+
+                Yield ((list of int)values, (int)offset, (int)length) for <level> and
+                its descendants, sorted by level.
+        """
+        low, high = subtree_bounds(self.getValues(level))
+        return self.iterHeadings(low.ljust(self.key_size, b"\x00"),
+                                 high.ljust(self.key_size, b"\x00"))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def toBaseOffset(self, offset, upper):
+        """
+                HeadingIndex.toBaseOffset
+
+                offset  : (int) offset in the document
+                upper   : (bool) if <offset> is in an updated text, return the end
+                          (True) or the beginning (False) of the replaced text
+
+                Return the (int) offset before the updates matching <offset>.
+        """
+        for start, old_length, new_length in reversed(self.edits):
+            if offset >= start + new_length:
+                offset += old_length - new_length
+            elif offset > start:
+                offset = start + old_length if upper else start
+        return offset
+
+    #///////////////////////////////////////////////////////////////////////////
+    def update(self, start, old_length, new_text, encoding="utf-8"):
+        """
+                HeadingIndex.update
+
+                start           : (int) offset of the edit in the document
+                old_length      : (int) number of bytes replaced
+                new_text        : (str or bytes) the new text, already written in the
+                                  document at <start>
+                encoding        : (str) encoding of the document
+
+                Update the index after an edit of the document : the lines containing
+                the new text are read again, nothing else. The time spent depends on
+                the size of the edit and on the number of updates since the last call
+                to compact(), not on the size of the document.
+
+                Return the number of headings found in the edited lines.
+        """
+        if isinstance(new_text, str):
+            new_text = new_text.encode(encoding)
+        new_length = len(new_text)
+        delta = new_length - old_length
+
+        # the document has been modified : it's opened again.
+        if self.document is not None:
+            self.document.close()
+            self.document = None
+        self.document_size += delta
+        try:
+            document = self.openDocument()
+            document.seek(start)
+            if document.read(new_length) != new_text:
+                msg = "(HeadingIndex.update) the document '{0}' doesn't contain the new " \
+                      "text at offset {1}."
+                raise HLevelError(msg, self.document_path, start)
+        except HLevelError:
+            self.document_size -= delta
+            raise
+
+        # [low, high[ : the edited lines, in the document now; [low, old_high[ before
+        low = self.findLineStart(start)
+        high = self.findLineEnd(start + new_length)
+        old_high = high - delta
+
+        # the headings of the edited lines are removed, the following ones shifted :
+        self.added = [(key, offset + delta if offset >= old_high else offset, length, values)
+                      for key, offset, length, values in self.added
+                      if not low <= offset < old_high]
+        self.deleteBaseRecords(self.toBaseOffset(low, False),
+                               self.toBaseOffset(old_high, True))
+        if delta:
+            bisect.insort(self.shifts, (self.toBaseOffset(start + old_length, True), delta))
+        self.edits.append((start, old_length, new_length))
+
+        # the edited lines are read again :
+        document.seek(low)
+        found = 0
+        for values, offset, length in iter_headings(document.read(high-low),
+                                                    self.formatstr, encoding):
+            record = pack_record(self.record, values, low + offset, length)
+            bisect.insort(self.added, (record[:self.key_size], low + offset, length,
+                                       tuple(values)))
+            found += 1
+        return found
+
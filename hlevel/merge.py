@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/merge.py
+
+    * merge_levels() : one sorted stream made of several sorted streams
+
+    Each stream is a sorted iterable whose items are HLevel objects, FrozenHLevel
+    objects (see hlevel/cache.py) or level strings, read with the format of the
+    stream : the streams may use different formats (".1.1", ".(A.I)"...).
+
+    Each item is read once : the levels are then compared through the tuple of
+    their numbers, the index of the stream breaking the ties (the merge is stable).
+    Only the current item of each stream is kept : memory is O(k) for k streams,
+    and the merged stream is lazy.
+
+    How it works :
+        for hlevel in merge_levels((shard1, shard2, shard3),
+                                   formats=(".1.1", ".(A.I)", None),
+                                   dedup=True):
+            ...
+"""
+
+import heapq
+import itertools
+
+from hlevel.errors import HLevelError
+from hlevel.hlevel import HLevel
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_keyed_levels(stream, formatstr=None, first_number=1, stream_index=0):
+    """
+        iter_keyed_levels
+
+        stream          : sorted iterable of HLevel objects, FrozenHLevel objects or
+                          (str) level strings
+        formatstr       : (str) format of the level strings; if None, the format of
+                          each string is guessed by HLevel.detect()
+        first_number    : (int) see HLevel.__init__()
+        stream_index    : (int) index of <stream>, for the error messages
+
+        Yield (tuple of int, level) pairs, checking that <stream> is sorted. A
+        string is read with HLevel.__init__() (a ParseError may be raised) unless it
+        is the same as the previous one.
+    """
+    previous_src = None
+    previous_formatstr = None
+    previous_key = None
+    for level in stream:
+        if isinstance(level, str):
+            if level == previous_src:
+                level = HLevel.fromValues(previous_key, previous_formatstr, first_number)
+            else:
+                previous_src = level
+                previous_formatstr = HLevel.detect(level) if formatstr is None else formatstr
+                level = HLevel(src=level, formatstr=previous_formatstr,
+                               first_number=first_number)
+        key = tuple(level)
+
+        if previous_key is not None and key < previous_key:
+            msg = "(merge.iter_keyed_levels) the stream #{0} isn't sorted : {1} is after {2}."
+            raise HLevelError(msg, stream_index, list(key), list(previous_key))
+        previous_key = key
+
+        yield (key, level)
+
+#///////////////////////////////////////////////////////////////////////////////
+def merge_levels(streams, formats=None, first_number=1, dedup=False, with_stream=False):
+    """
+        merge_levels
+
+        streams         : iterable of sorted streams, see the documentation of the
+                          module
+        formats         : None, (str) format of all the streams or sequence of
+                          (str or None) formats, one for each stream; see
+                          iter_keyed_levels()
+        first_number    : (int) see HLevel.__init__()
+        dedup           : (bool) if True, a level equal to the previous one (in any
+                          stream) is skipped : the first stream wins
+        with_stream     : (bool) if True, (level, index of the stream) pairs are
+                          yielded
+
+        Yield the levels of all the streams, sorted : the HLevel and FrozenHLevel
+        objects are yielded as is, the strings as new HLevel objects. A HLevelError
+        is raised if a stream isn't sorted.
+    """
+    streams = list(streams)
+    if formats is None or isinstance(formats, str):
+        formats = [formats] * len(streams)
+    elif len(formats) != len(streams):
+        raise HLevelError("(merge.merge_levels) {0} formats for {1} streams",
+                          len(formats), len(streams))
+
+    # heap of [key, index of the stream, level, iterator] lists, modified in place;
+    # since the indexes are different, the levels are never compared.
+    heap = []
+    for index, (stream, formatstr) in enumerate(zip(streams, formats)):
+        iterator = iter_keyed_levels(stream, formatstr, first_number, index)
+        item = next(iterator, None)
+        if item is not None:
+            heap.append([item[0], index, item[1], iterator])
+    heapq.heapify(heap)
+
+    last_key = None
+    heapreplace = heapq.heapreplace
+    while len(heap) > 1:
+        entry = heap[0]
+        key, index, level, iterator = entry
+        if not dedup or key != last_key:
+            last_key = key
+            yield (level, index) if with_stream else level
+
+        item = next(iterator, None)
+        if item is None:
+            heapq.heappop(heap)
+        else:
+            entry[0], entry[2] = item
+            heapreplace(heap, entry)
+
+    if heap:
+        # only one stream left :
+        key, index, level, iterator = heap[0]
+        for key, level in itertools.chain(((key, level),), iterator):
+            if not dedup or key != last_key:
+                last_key = key
+                yield (level, index) if with_stream else level
+
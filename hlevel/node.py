@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/node.py
+
+    * LevelTree, LevelNode classes : levels stored as (parent, last number)
+
+    An HLevel object stores all its numbers : the levels of an outline cost
+    O(number of levels * depth). A LevelNode only stores its parent node and its
+    last number; the nodes are interned by their LevelTree, i.e. a level is created
+    only once and its parent path is shared by all its descendants :
+    O(number of levels).
+
+    The LevelNode objects are immutable; parent(), ancestors() and depth don't
+    copy anything. They compare like the HLevel objects (i.e. like their values),
+    with each other and with HLevel objects; two nodes of the same tree are equal
+    if and only if they are the same object.
+
+    How it works :
+        tree = LevelTree()
+        node = tree.node(HLevel(src="IV.3.b", formatstr=".I.1.a"))
+        node.depth                              # 3
+        node.parent() is tree.node([4, 3])      # True
+        node.toHLevel(".I.1.a")                 # IV.3.b
+"""
+
+from hlevel.hlevel import HLevel
+
+################################################################################
+class LevelNode(object):
+    """
+        class LevelNode
+
+        A level : its parent node and its last number. Use LevelTree.node() or
+        LevelNode.child() to create the nodes, not LevelNode().
+    """
+    __slots__ = ("_parent", "value", "depth", "children")
+
+    # maximal number of children stored in a list, see LevelNode.child()
+    max_listed_children = 8
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, parent, value):
+        """
+                LevelNode.__init__
+
+                parent  : LevelNode object or None for the empty level
+                value   : (int) last number; None for the empty level
+        """
+        self._parent = parent
+        self.value = value
+        self.depth = 0 if parent is None else parent.depth + 1
+        # None, list of the child nodes (a few children) or {value : child node}
+        self.children = None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __eq__(self, other):
+        """
+                LevelNode.__eq__
+        """
+        if self is other:
+            return True
+        if isinstance(other, LevelNode):
+            # nodes of the same tree share their ancestors :
+            return self.depth == other.depth and self.value == other.value and \
+                   self._parent == other._parent
+        if isinstance(other, list):
+            return list(self.values()) == other
+        return NotImplemented
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __ge__(self, other):
+        """
+                LevelNode.__ge__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values() >= other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __gt__(self, other):
+        """
+                LevelNode.__gt__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values() > other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __hash__(self):
+        """
+                LevelNode.__hash__
+        """
+        return hash(self.values())
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __iter__(self):
+        """
+                LevelNode.__iter__
+
+                Yield the numbers of the level, the first one first.
+        """
+        return iter(self.values())
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __le__(self, other):
+        """
+                LevelNode.__le__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values() <= other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __len__(self):
+        """
+                LevelNode.__len__
+        """
+        return self.depth
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __lt__(self, other):
+        """
+                LevelNode.__lt__
+        """
+        other = self.getComparedValues(other)
+        return NotImplemented if other is None else self.values() < other
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __ne__(self, other):
+        """
+                LevelNode.__ne__
+        """
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __repr__(self):
+        """
+                LevelNode.__repr__
+        """
+        return "(LevelNode) " + ".".join(str(value) for value in self.values())
+
+    #///////////////////////////////////////////////////////////////////////////
+    def ancestors(self):
+        """
+                LevelNode.ancestors
+
+                Yield the parent, the grandparent... of the node, until the level of
+                depth 1 : the empty level is not yielded.
+        """
+        node = self._parent
+        while node is not None and node.depth:
+            yield node
+            node = node._parent
+
+    #///////////////////////////////////////////////////////////////////////////
+    def child(self, value):
+        """
+                LevelNode.child
+
+                value   : (int)
+
+                Return the (interned) LevelNode object <self>.<value>.
+        """
+        children = self.children
+        if isinstance(children, dict):
+            node = children.get(value)
+            if node is None:
+                node = children[value] = LevelNode(self, value)
+            return node
+
+        # a few children : a list (a dict costs ~200 bytes), the last child first
+        if children is None:
+            children = self.children = []
+        for node in reversed(children):
+            if node.value == value:
+                return node
+        node = LevelNode(self, value)
+        children.append(node)
+        if len(children) > LevelNode.max_listed_children:
+            self.children = {child.value: child for child in children}
+        return node
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getComparedValues(self, other):
+        """
+                LevelNode.getComparedValues
+
+                other   : LevelNode object, HLevel object or list
+
+                Return the (tuple) values of <other>, compared with self.values(),
+                or None if <other> can't be compared with a LevelNode object.
+        """
+        if isinstance(other, LevelNode):
+            return other.values()
+        if isinstance(other, list):
+            return tuple(other)
+        return None
+
+    #///////////////////////////////////////////////////////////////////////////
+    def parent(self):
+        """
+                LevelNode.parent
+
+                Return the parent node, the empty level for a node of depth 1, None for
+                the empty level.
+        """
+        return self._parent
+
+    #///////////////////////////////////////////////////////////////////////////
+    def toHLevel(self, formatstr=None, first_number=1):
+        """
+                LevelNode.toHLevel
+
+                formatstr       : (str) or None for HLevel.defaultformat
+                first_number    : (int)
+
+                Return a new HLevel object.
+        """
+        return HLevel.fromValues(self.values(), formatstr, first_number)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def values(self):
+        """
+                LevelNode.values
+
+                Return the (tuple) numbers of the level, the first one first.
+        """
+        res = [None]*self.depth
+        node = self
+        while node.depth:
+            res[node.depth-1] = node.value
+            node = node._parent
+        return tuple(res)
+
+################################################################################
+class LevelTree(object):
+    """
+        class LevelTree
+
+        Interned LevelNode objects : the nodes are kept as long as the tree is kept.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self):
+        """
+                LevelTree.__init__
+        """
+        # the empty level, ancestor of all the nodes :
+        self.root = LevelNode(None, None)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def node(self, values):
+        """
+                LevelTree.node
+
+                values  : iterable of (int), e.g. a HLevel object
+
+                Return the (interned) LevelNode object of <values>.
+        """
+        node = self.root
+        for value in values:
+            node = node.child(value)
+        return node
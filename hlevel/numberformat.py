@@ -0,0 +1,763 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/numberformat.py
+
+    * NumberFormat class : declaration of a numbering system
+    * registry of the numbering systems known by HLevel (see FORMATS)
+
+    A numbering system is declared once by :
+        - its symbol in the format strings (e.g. "1" in ".(1.1)"),
+        - its symbols and their values,
+        - its rule :
+            "positional"     : value = Σ symbol's value * base**position, e.g. "1", "¹"
+            "bijective"      : idem but the symbols' values begin at first_number,
+                               e.g. "A" : A=1, ..., Z=26, AA=27, ...
+            "additive"       : Roman-like numbers : the symbols' values are added, a
+                               symbol followed by a greater one being subtracted
+            "enumerated"     : one symbol for each number, e.g. "①", "②", ...
+            "multiplicative" : Japanese-like numbers : the digits are multiplied by the
+                               following multiplier (symbols whose value is >= base)
+        - the sign support ("-" before the number).
+
+    The decoding table, the encoding function and the search pattern (regex) are
+    built from this declaration.
+
+    How it works :
+        register_format(NumberFormat(symbol="१",
+                                     symbols="०१२३४५६७८९",
+                                     rule="positional",
+                                     name="Devanagari digits"))
+        HLevel(src="(१.२)", formatstr=".(१.१)")
+
+    Known formats : see the end of this file.
+"""
+
+import re
+
+from hlevel.errors import FormatError, ParseError, RenderError
+
+# registered formats : {(str)symbol in the format strings : NumberFormat object}
+FORMATS = {}
+
+# symbols of the registered formats, in registration order; this list object is
+# HLevel.reprnum.
+SYMBOLS = []
+
+# characters forbidden in the prefix and in the suffix of a format string; this set
+# object is HLevel.invalid_chars_in_pre_suffix.
+RESERVED_CHARS = set()
+
+# functions called without argument after each call to register_format() :
+REGISTRATION_HOOKS = []
+
+RULES = ("positional", "bijective", "additive", "enumerated", "multiplicative")
+
+################################################################################
+class NumberFormat(object):
+    """
+        class NumberFormat
+
+        Declaration of a numbering system : see the documentation of the module.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self,
+                 symbol,
+                 symbols,
+                 rule,
+                 values=None,
+                 base=None,
+                 signed=False,
+                 name=""):
+        """
+                NumberFormat.__init__
+
+                symbol  : (str) one character, symbol of the format in the format
+                          strings; must be one of <symbols>.
+                symbols : iterable of (str)characters
+                rule    : (str) one of RULES
+                values  : None or iterable of (int), the value of each symbol;
+                          if None, (0, 1, 2, ...) or, with the "enumerated" rule,
+                          (1, 2, 3, ...).
+                base    : None or (int); "multiplicative" rule : the digits are the
+                          symbols whose value is less than <base>, the other ones
+                          being the multipliers (required); other rules : if None,
+                          the number of symbols.
+                signed  : (bool) True if negative numbers are written with a "-"
+                          (only with the "positional" rule)
+                name    : (str)
+        """
+        symbols = tuple(symbols)
+
+        if rule not in RULES:
+            msg = "(NumberFormat.__init__) unknown rule '{0}'; known rules are {1}."
+            raise FormatError(msg, rule, RULES)
+
+        if len(symbol) != 1 or symbol not in symbols:
+            msg = "(NumberFormat.__init__) the symbol '{0}' must be one character " \
+                  "among {1}."
+            raise FormatError(msg, symbol, symbols)
+
+        if len(set(symbols)) != len(symbols) or "-" in symbols:
+            msg = "(NumberFormat.__init__) duplicated symbol or '-' in {0}."
+            raise FormatError(msg, symbols)
+
+        if values is None:
+            values = range(1, len(symbols)+1) if rule == "enumerated" else range(len(symbols))
+        values = tuple(values)
+
+        if len(values) != len(symbols):
+            msg = "(NumberFormat.__init__) {0} symbols but {1} values."
+            raise FormatError(msg, len(symbols), len(values))
+
+        if rule == "multiplicative" and base is None:
+            msg = "(NumberFormat.__init__) the base of a multiplicative number is required."
+            raise FormatError(msg)
+
+        if signed and rule != "positional":
+            msg = "(NumberFormat.__init__) only positional numbers may be signed."
+            raise FormatError(msg)
+
+        self.symbol = symbol
+        self.symbols = symbols
+        self.values = values
+        self.rule = rule
+        self.signed = signed
+        self.name = name
+
+        # {symbol : value}
+        self.decode_table = dict(zip(symbols, values))
+
+        # {value : symbol}
+        self.encode_table = dict(zip(values, symbols))
+
+        # "positional", "bijective", "multiplicative" : number of digits
+        self.base = len(symbols) if base is None else base
+
+        # "additive" : ((str)numeral, (int)value) sorted by decreasing value, with
+        #              the subtractive numerals ("IV", "CM", ...)
+        self.numerals = ()
+        if rule == "additive":
+            self.numerals = self._getSubtractiveNumerals()
+
+        # "multiplicative" : multipliers sorted by decreasing value
+        self.multipliers = ()
+        if rule == "multiplicative":
+            self.multipliers = tuple(sorted(((value, symbol) for symbol, value \
+                                             in self.decode_table.items() \
+                                             if value >= self.base),
+                                            reverse=True))
+
+        # "positional", "bijective" : True if the symbols sort like their values, i.e.
+        # if two numbers of the same length (without sign or leading zero) compare
+        # like the strings; see hlevel/compare.py
+        self.lexical_order = rule in ("positional", "bijective") and \
+            sorted(symbols) == sorted(symbols, key=self.decode_table.get)
+
+        # decimal digits other than "0123456789" : str.translate() tables from and to
+        # ASCII digits; the ASCII digits are deleted when read, so that a string
+        # mixing both kinds of digits can be detected by its length.
+        self.to_ascii = None
+        self.from_ascii = None
+        self.many_ascii_numbers_regex = None
+        if rule == "positional" and values == tuple(range(10)):
+            self.to_ascii = str.maketrans("".join(symbols),
+                                          "0123456789",
+                                          "".join(set("0123456789") - set(symbols)))
+            self.from_ascii = str.maketrans("0123456789", "".join(symbols))
+
+            # NumberFormat.parseMany() : translated numbers separated by "\n"
+            sign = "-?" if signed else ""
+            self.many_ascii_numbers_regex = re.compile(
+                "{0}[0-9]+(?:\n{0}[0-9]+)*".format(sign), re.ASCII)
+
+        # functions reading and writing a number, chosen once for all :
+        if rule == "positional" and symbols == tuple("0123456789"):
+            self._parse = self._parseDecimal
+            self._render = self._renderDecimal
+        elif self.to_ascii is not None:
+            self._parse = self._parseTranslate
+            self._render = self._renderTranslate
+        else:
+            self._parse = getattr(self, "_parse" + rule.capitalize())
+            self._render = getattr(self, "_render" + rule.capitalize())
+
+        # regex matching one number :
+        charclass = "[" + "".join(re.escape(char) for char in symbols) + "]"
+        if rule == "enumerated":
+            self.search_pattern = charclass
+        elif signed:
+            self.search_pattern = "-?" + charclass + "+"
+        else:
+            self.search_pattern = charclass + "+"
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __repr__(self):
+        """
+                NumberFormat.__repr__
+        """
+        return "(NumberFormat) symbol='{0}'; name='{1}'; rule='{2}'; " \
+               "signed={3}; symbols={4}".format(self.symbol,
+                                                 self.name,
+                                                 self.rule,
+                                                 self.signed,
+                                                 "".join(self.symbols))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getSearchPattern(self, encoding=None):
+        """
+                NumberFormat.getSearchPattern
+
+                encoding        : None or (str) name of an encoding
+
+                Return the regex matching one number : self.search_pattern if
+                <encoding> is None, else a (bytes)regex matching the numbers encoded
+                with <encoding>, e.g. to search a memory-mapped file.
+        """
+        if encoding is None:
+            return self.search_pattern
+
+        symbols = sorted(set(symbol.encode(encoding) for symbol in self.symbols),
+                         key=lambda symbol: (-len(symbol), symbol))
+        if all(len(symbol) == 1 for symbol in symbols):
+            charclass = b"[" + b"".join(map(re.escape, symbols)) + b"]"
+        else:
+            charclass = b"(?:" + b"|".join(map(re.escape, symbols)) + b")"
+
+        if self.rule == "enumerated":
+            return charclass
+        if self.signed:
+            return re.escape("-".encode(encoding)) + b"?" + charclass + b"+"
+        return charclass + b"+"
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _getSubtractiveNumerals(self):
+        """
+                NumberFormat._getSubtractiveNumerals
+
+                Return the numerals used to write an additive number : the symbols and
+                the subtractive pairs, a symbol whose value is a power of ten being
+                written before a symbol worth 5 or 10 times more (e.g. "IV", "CM").
+        """
+        numerals = list(zip(self.symbols, self.values))
+        for symbol, value in zip(self.symbols, self.values):
+            for small_symbol, small_value in zip(self.symbols, self.values):
+                if value in (small_value*5, small_value*10) and \
+                   str(small_value).rstrip("0") == "1":
+                    numerals.append((small_symbol + symbol, value - small_value))
+                    break
+        return tuple(sorted(numerals, key=lambda numeral: -numeral[1]))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def parse(self, strnumber, first_number=1):
+        """
+                NumberFormat.parse
+
+                strnumber       : (str) one number
+                first_number    : (int) see HLevel.__init__()
+
+                Return the (int) value of <strnumber>.
+        """
+        if self.to_ascii is not None:
+            ascii_number = strnumber.translate(self.to_ascii)
+            if self.isASCIINumber(ascii_number) and len(ascii_number) == len(strnumber):
+                return int(ascii_number)
+
+        else:
+            digits = strnumber[1:] if self.signed and strnumber[:1] == "-" else strnumber
+            if digits and [char for char in digits if char not in self.decode_table] == []:
+                return self._parse(strnumber, first_number)
+
+        offset = 0
+        for offset, char in enumerate(strnumber):
+            if char not in self.decode_table and \
+               not (self.signed and offset == 0 and char == "-" and len(strnumber) > 1):
+                break
+        else:
+            offset = len(strnumber)
+        raise ParseError(strnumber, self.symbol, offset,
+                         "unknown symbol; allowed symbols for {0} are {1}",
+                         self.name, self.symbols,
+                         caller="NumberFormat.parse")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def isASCIINumber(self, ascii_number):
+        """
+                NumberFormat.isASCIINumber
+
+                ascii_number    : (str) a number translated by self.to_ascii
+
+                Return True if <ascii_number> is made of ASCII digits, preceded by
+                "-" if the format is signed. Unlike int(), no whitespace, "_" or
+                non-ASCII digit is accepted.
+        """
+        if self.signed and ascii_number[:1] == "-":
+            ascii_number = ascii_number[1:]
+        return ascii_number.isascii() and ascii_number.isdigit()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def parseMany(self, strnumbers, first_number=1):
+        """
+                NumberFormat.parseMany
+
+                strnumbers      : iterable of (str) numbers
+                first_number    : (int) see HLevel.__init__()
+
+                Return the (list of int) values of <strnumbers>. The decimal formats
+                translate all the numbers by a single str.translate() call.
+        """
+        if self.to_ascii is None:
+            return [self.parse(strnumber, first_number) for strnumber in strnumbers]
+
+        strnumbers = list(strnumbers)
+        if not strnumbers:
+            return []
+
+        src = "\n".join(strnumbers)
+        ascii_numbers = src.translate(self.to_ascii)
+        if len(ascii_numbers) == len(src) and \
+           self.many_ascii_numbers_regex.fullmatch(ascii_numbers) is not None:
+            ascii_numbers = ascii_numbers.split("\n")
+            if len(ascii_numbers) == len(strnumbers):
+                return list(map(int, ascii_numbers))
+
+        # let's find the faulty number :
+        for strnumber in strnumbers:
+            self.parse(strnumber, first_number)
+
+        strnumber = [strnumber for strnumber in strnumbers if "\n" in strnumber][0]
+        raise ParseError(strnumber, self.symbol, strnumber.index("\n"),
+                         "unexpected line break",
+                         caller="NumberFormat.parseMany")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _parseAdditive(self, strnumber, first_number):
+        """
+                NumberFormat._parseAdditive
+
+                strnumber       : (str) valid number
+                first_number    : (int) see HLevel.__init__()
+        """
+        if first_number != 1:
+            raise ParseError(strnumber, self.symbol, 0,
+                             "{0} can't be read if first_number (={1}) is not set to 1",
+                             self.name, first_number,
+                             caller="NumberFormat.parse")
+
+        table = self.decode_table
+        res = 0
+        previous = 0
+        for char in strnumber:
+            value = table[char]
+            res += value
+            if previous < value:
+                res -= 2*previous
+            previous = value
+        return res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _parseBijective(self, strnumber, first_number):
+        """
+                NumberFormat._parseBijective
+
+                strnumber       : (str) valid number
+                first_number    : (int) see HLevel.__init__()
+        """
+        table = self.decode_table
+        base = self.base
+        res = 0
+        for char in strnumber:
+            res = res*base + table[char] + first_number
+        return res
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def _parseDecimal(strnumber, _):
+        """
+                NumberFormat._parseDecimal
+
+                strnumber       : (str) valid number written with ASCII digits
+        """
+        return int(strnumber)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _parseEnumerated(self, strnumber, _):
+        """
+                NumberFormat._parseEnumerated
+
+                strnumber       : (str) valid number
+        """
+        if len(strnumber) != 1:
+            raise ParseError(strnumber, self.symbol, 1,
+                             "only one symbol allowed for {0}", self.name,
+                             caller="NumberFormat.parse")
+        return self.decode_table[strnumber]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _parseMultiplicative(self, strnumber, _):
+        """
+                NumberFormat._parseMultiplicative
+
+                strnumber       : (str) valid number
+        """
+        table = self.decode_table
+        base = self.base
+        res = 0
+        digit = None
+        for char in strnumber:
+            value = table[char]
+            if value >= base:
+                res += value * (1 if digit is None else digit)
+                digit = None
+            else:
+                digit = value
+        if digit is not None:
+            res += digit
+        return res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _parseTranslate(self, strnumber, _):
+        """
+                NumberFormat._parseTranslate
+
+                strnumber       : (str) valid number
+        """
+        return int(strnumber.translate(self.to_ascii))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _parsePositional(self, strnumber, _):
+        """
+                NumberFormat._parsePositional
+
+                strnumber       : (str) valid number
+        """
+        sign = 1
+        if strnumber[0] == "-":
+            sign = -1
+            strnumber = strnumber[1:]
+
+        table = self.decode_table
+        base = self.base
+        res = 0
+        for char in strnumber:
+            res = res*base + table[char]
+        return sign*res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def render(self, number, first_number=1):
+        """
+                NumberFormat.render
+
+                number          : (int)
+                first_number    : (int) see HLevel.__init__()
+
+                Return the (str) representation of <number>.
+        """
+        return self._render(number, first_number)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def renderMany(self, numbers, first_number=1):
+        """
+                NumberFormat.renderMany
+
+                numbers         : iterable of (int)
+                first_number    : (int) see HLevel.__init__()
+
+                Return the (list of str) representations of <numbers>. The decimal
+                formats translate all the numbers by a single str.translate() call.
+        """
+        if self.from_ascii is None:
+            return [self._render(number, first_number) for number in numbers]
+
+        res = "\n".join(map(str, numbers))
+        if not res:
+            return []
+        return res.translate(self.from_ascii).split("\n")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _renderAdditive(self, number, first_number):
+        """
+                NumberFormat._renderAdditive
+
+                number          : (int)
+                first_number    : (int) see HLevel.__init__()
+        """
+        if first_number != 1:
+            msg = "(NumberFormat.render) You can't use {0} (number read : {1}) if " \
+                  "first_number (='{2}') is not set to 1."
+            raise RenderError(msg, self.name, number, first_number)
+
+        if number < 0:
+            msg = "(NumberFormat.render) can't interpret number {0} as " \
+                  "{1}. Number must be greater than 0."
+            raise RenderError(msg, number, self.name)
+
+        res = []
+        decreasing_num = number
+        for numeral, value in self.numerals:
+            while decreasing_num >= value:
+                res.append(numeral)
+                decreasing_num -= value
+        return "".join(res)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _renderBijective(self, number, first_number):
+        """
+                NumberFormat._renderBijective
+
+                number          : (int)
+                first_number    : (int) see HLevel.__init__()
+        """
+        symbols = self.symbols
+        base = self.base
+        res = []
+        decreasing_num = number
+        while True:
+            decreasing_num, digit = divmod(decreasing_num - first_number, base)
+            if decreasing_num < 0:
+                msg = "(NumberFormat.render) can't write {0} with {1} if " \
+                      "first_number is {2}."
+                raise RenderError(msg, number, self.name, first_number)
+            res.append(symbols[digit])
+            if decreasing_num == 0:
+                break
+        return "".join(reversed(res))
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def _renderDecimal(number, _):
+        """
+                NumberFormat._renderDecimal
+
+                number          : (int)
+        """
+        return str(number)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _renderEnumerated(self, number, first_number):
+        """
+                NumberFormat._renderEnumerated
+
+                number          : (int)
+                first_number    : (int) see HLevel.__init__()
+        """
+        if first_number != 1:
+            msg = "(NumberFormat.render) You can't use {0} (number read : {1}) if " \
+                  "first_number (='{2}') is not set to 1."
+            raise RenderError(msg, self.name, number, first_number)
+
+        if number not in self.encode_table:
+            msg = "(NumberFormat.render) can't interpret number {0} as {1}. " \
+                  "Expected range is [{2};{3}]"
+            raise RenderError(msg, number, self.name,
+                              min(self.values), max(self.values))
+        return self.encode_table[number]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _renderMultiplicative(self, number, first_number):
+        """
+                NumberFormat._renderMultiplicative
+
+                number          : (int)
+                first_number    : (int) see HLevel.__init__()
+        """
+        maximum = self.multipliers[0][0] * self.base - 1 if self.multipliers else self.base - 1
+        if number < first_number or number < 0 or number > maximum:
+            msg = "(NumberFormat.render) can't interpret number {0} as {1}. " \
+                  "Expected range is [{2};{3}]"
+            raise RenderError(msg, number, self.name, max(first_number, 0), maximum)
+
+        encode_table = self.encode_table
+        if number == 0:
+            return encode_table[0]
+        res = []
+        decreasing_num = number
+        for value, symbol in self.multipliers:
+            digit, decreasing_num = divmod(decreasing_num, value)
+            if digit > 1:
+                res.append(encode_table[digit])
+            if digit > 0:
+                res.append(symbol)
+        if decreasing_num > 0:
+            res.append(encode_table[decreasing_num])
+        return "".join(res)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _renderTranslate(self, number, _):
+        """
+                NumberFormat._renderTranslate
+
+                number          : (int)
+        """
+        return str(number).translate(self.from_ascii)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _renderPositional(self, number, _):
+        """
+                NumberFormat._renderPositional
+
+                number          : (int)
+        """
+        symbols = self.symbols
+        base = self.base
+        res = []
+        decreasing_num = abs(number)
+        while True:
+            decreasing_num, digit = divmod(decreasing_num, base)
+            res.append(symbols[digit])
+            if decreasing_num == 0:
+                break
+        if number < 0:
+            res.append("-")
+        return "".join(reversed(res))
+
+#///////////////////////////////////////////////////////////////////////////////
+def get_format(symbol):
+    """
+        get_format
+
+        symbol  : (str) symbol of a format, e.g. "1"
+
+        Return the registered NumberFormat object.
+    """
+    if symbol not in FORMATS:
+        msg = "(numberformat.get_format) unknown number format '{0}'; " \
+              "expected formats are {1}."
+        raise FormatError(msg, symbol, SYMBOLS)
+    return FORMATS[symbol]
+
+#///////////////////////////////////////////////////////////////////////////////
+def register_format(numberformat, replace=False):
+    """
+        register_format
+
+        numberformat    : NumberFormat object
+        replace         : (bool) if True, a format with the same symbol is replaced
+
+        Add <numberformat> to the known formats : it can be used in the format strings.
+    """
+    if numberformat.symbol in FORMATS and not replace:
+        msg = "(numberformat.register_format) the symbol '{0}' is already used by {1}."
+        raise FormatError(msg, numberformat.symbol, FORMATS[numberformat.symbol])
+
+    if numberformat.symbol not in FORMATS:
+        SYMBOLS.append(numberformat.symbol)
+    FORMATS[numberformat.symbol] = numberformat
+
+    RESERVED_CHARS.clear()
+    for known_format in FORMATS.values():
+        RESERVED_CHARS.update(known_format.symbols)
+        if known_format.signed:
+            RESERVED_CHARS.add("-")
+
+    for hook in REGISTRATION_HOOKS:
+        hook()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# built-in formats :
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+register_format(NumberFormat(symbol="1",
+                             symbols="0123456789",
+                             rule="positional",
+                             name="Arabic numbers"))
+
+register_format(NumberFormat(symbol="I",
+                             symbols="IVXLCDM",
+                             values=(1, 5, 10, 50, 100, 500, 1000),
+                             rule="additive",
+                             name="capital Roman numbers"))
+
+register_format(NumberFormat(symbol="i",
+                             symbols="ivxlcdm",
+                             values=(1, 5, 10, 50, 100, 500, 1000),
+                             rule="additive",
+                             name="lower case Roman numbers"))
+
+register_format(NumberFormat(symbol="A",
+                             symbols="ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+                             rule="bijective",
+                             name="capital letters"))
+
+register_format(NumberFormat(symbol="a",
+                             symbols="abcdefghijklmnopqrstuvwxyz",
+                             rule="bijective",
+                             name="lower case letters"))
+
+register_format(NumberFormat(symbol="①",
+                             symbols="①②③④⑤⑥⑦⑧⑨⑩⑪⑫⑬⑭⑮⑯⑰⑱⑲⑳",
+                             rule="enumerated",
+                             name="enclosed numbers"))
+
+register_format(NumberFormat(symbol="一",
+                             symbols="〇一二三四五六七八九十百千",
+                             values=(0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 100, 1000),
+                             base=10,
+                             rule="multiplicative",
+                             name="Japanese numbers"))
+
+register_format(NumberFormat(symbol="¹",
+                             symbols=(chr(0x2070), chr(0x00B9), chr(0x00B2), chr(0x00B3),
+                                      chr(0x2074), chr(0x2075), chr(0x2076), chr(0x2077),
+                                      chr(0x2078), chr(0x2079)),
+                             rule="positional",
+                             signed=True,
+                             name="superscript numerals"))
+
+register_format(NumberFormat(symbol="₁",
+                             symbols=(chr(0x2080), chr(0x2081), chr(0x2082), chr(0x2083),
+                                      chr(0x2084), chr(0x2085), chr(0x2086), chr(0x2087),
+                                      chr(0x2088), chr(0x2089)),
+                             rule="positional",
+                             signed=True,
+                             name="subscript numerals"))
+
+register_format(NumberFormat(symbol="１",
+                             symbols="０１２３４５６７８９",
+                             rule="positional",
+                             name="fullwidth numerals"))
+
+register_format(NumberFormat(symbol="α",
+                             symbols="αβγδεζηθικλμνξοπρστυφχψω",
+                             rule="bijective",
+                             name="lower case Greek letters"))
+
+register_format(NumberFormat(symbol="Α",
+                             symbols="ΑΒΓΔΕΖΗΘΙΚΛΜΝΞΟΠΡΣΤΥΦΧΨΩ",
+                             rule="bijective",
+                             name="capital Greek letters"))
+
+register_format(NumberFormat(symbol="١",
+                             symbols="٠١٢٣٤٥٦٧٨٩",
+                             rule="positional",
+                             name="Arabic-Indic digits"))
+
+register_format(NumberFormat(symbol="१",
+                             symbols="०१२३४५६७८९",
+                             rule="positional",
+                             name="Devanagari digits"))
+
+register_format(NumberFormat(symbol="㉑",
+                             symbols=[chr(codepoint) for codepoint in range(0x3251, 0x3260)] + \
+                                     [chr(codepoint) for codepoint in range(0x32B1, 0x32C0)],
+                             values=range(21, 51),
+                             rule="enumerated",
+                             name="circled numbers 21-50"))
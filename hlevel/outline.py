@@ -0,0 +1,289 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/outline.py
+
+    * OutlineBuilder class : streaming reading of the sections of a document
+    * build_tree() : tree of Section objects
+
+    The lines of the document are read one by one; a heading is a line beginning
+    with a level string followed by a space or by the end of the line, e.g.
+    "IV.3.b Penalties" with the format ".I.1.a". The builder yields events
+    (SAX-like), OutlineEvent(kind, hlevel, line_number, data) :
+
+        OPEN    : a section begins; data = the heading line
+        CLOSE   : a section ends, before <line_number>; data = None
+        TEXT    : a line which is not a heading (only if text=True); data = the line
+        ANOMALY : the numbering is wrong, the event being yielded before the OPEN
+                  event of the heading; data = one of ANOMALIES
+
+    Only the open sections (the ancestors of the current heading) are kept in
+    memory : a document of any size is read in constant memory.
+
+    OutlineBuilder.feedHeading() reads the headings found otherwise, e.g. the
+    ScanMatch objects of a MultiFormatScanner (see hlevel/scanner.py).
+
+    The anomalies :
+        SKIPPED_LEVEL   "IV.1.a" after "III" : the section "IV.1" is opened
+                        (OPEN event with data = None) before "IV.1.a"
+        SKIPPED_NUMBER  "IV.3" after "IV.1"
+        OUT_OF_ORDER    "IV.2" after "IV.3", or "IV.3" twice
+
+    The numbers of the missing sections are checked too : "VI.3.b" after "IV.2"
+    is reported three times (SKIPPED_LEVEL, then SKIPPED_NUMBER for "VI", "3" and
+    "b"), "II.1.a" after "III" twice (SKIPPED_LEVEL, OUT_OF_ORDER for "II").
+
+    How it works :
+        with open("law.txt") as document:
+            for event in OutlineBuilder(".I.1.a").iterEvents(document):
+                if event.kind == ANOMALY:
+                    print(event.line_number, event.data, event.hlevel)
+
+        root = build_tree(OutlineBuilder(".I.1.a").iterEvents(lines))
+"""
+
+import collections
+import re
+
+from hlevel.hlevel import HLevel
+
+OPEN = "open"
+CLOSE = "close"
+TEXT = "text"
+ANOMALY = "anomaly"
+
+SKIPPED_LEVEL = "skipped level"
+SKIPPED_NUMBER = "skipped number"
+OUT_OF_ORDER = "out of order"
+ANOMALIES = (SKIPPED_LEVEL, SKIPPED_NUMBER, OUT_OF_ORDER)
+
+OutlineEvent = collections.namedtuple("OutlineEvent", ("kind", "hlevel", "line_number", "data"))
+
+################################################################################
+class OutlineBuilder(object):
+    """
+        class OutlineBuilder
+
+        Read the headings of a document, line by line, and yield OutlineEvent
+        objects.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, formatstr=None, first_number=1, first_value=1, text=False):
+        """
+                OutlineBuilder.__init__
+
+                formatstr       : (str) format of the headings; if None,
+                                  HLevel.defaultformat
+                first_number    : (int) see HLevel.__init__()
+                first_value     : (int) expected value of the first child of a
+                                  section (e.g. 1 for "I", "1", "A"...)
+                text            : (bool) True to yield TEXT events
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        self.formatstr = formatstr
+        self.first_number = first_number
+        self.first_value = first_value
+        self.text = text
+
+        self.regex = re.compile(HLevel(formatstr=formatstr).getSearchPattern() +
+                                r"(?=[ \t\r\n]|\Z)")
+
+        # the open sections, the root (empty level) first : lists
+        # [(tuple)values, HLevel object, (int)value of the last child or None]
+        self.stack = [[(), None, None]]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def close(self, line_number=None):
+        """
+                OutlineBuilder.close
+
+                line_number     : (int) number of the line after the document
+
+                Yield the CLOSE events of the sections still open.
+        """
+        stack = self.stack
+        while len(stack) > 1:
+            yield OutlineEvent(CLOSE, stack.pop()[1], line_number, None)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def feedHeading(self, hlevel, line_number=None, data=None):
+        """
+                OutlineBuilder.feedHeading
+
+                hlevel          : HLevel object, the heading
+                line_number     : (int)
+                data            : data of the OPEN event, e.g. the heading line
+
+                Yield the events caused by the heading <hlevel> : CLOSE events,
+                ANOMALY events, OPEN events.
+        """
+        stack = self.stack
+        values = tuple(hlevel)
+        depth = len(values)
+
+        # the sections which aren't ancestors of <hlevel> are closed :
+        while len(stack) > 1:
+            top_values = stack[-1][0]
+            if len(top_values) < depth and values[:len(top_values)] == top_values:
+                break
+            yield OutlineEvent(CLOSE, stack.pop()[1], line_number, None)
+
+        parent = stack[-1]
+        skipped_level = len(parent[0]) < depth - 1
+        if skipped_level:
+            yield OutlineEvent(ANOMALY, hlevel, line_number, SKIPPED_LEVEL)
+
+        # the numbers of the new sections (the missing ones, then <hlevel>) : the
+        # first one follows the last child of <parent>, the others are first children
+        expected = self.first_value if parent[2] is None else parent[2] + 1
+        for value in values[len(parent[0]):]:
+            if value != expected:
+                yield OutlineEvent(ANOMALY, hlevel, line_number,
+                                   SKIPPED_NUMBER if value > expected else OUT_OF_ORDER)
+            expected = self.first_value
+
+        if skipped_level:
+            # missing sections, opened without heading :
+            for missing_depth in range(len(parent[0])+1, depth):
+                missing = HLevel.fromValues(values[:missing_depth],
+                                            self.formatstr, self.first_number)
+                parent[2] = values[missing_depth-1]
+                parent = [values[:missing_depth], missing, None]
+                stack.append(parent)
+                yield OutlineEvent(OPEN, missing, line_number, None)
+
+        if values:
+            parent[2] = values[-1]
+            stack.append([values, hlevel, None])
+            yield OutlineEvent(OPEN, hlevel, line_number, data)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def feedLine(self, line, line_number=None):
+        """
+                OutlineBuilder.feedLine
+
+                line            : (str) a line of the document
+                line_number     : (int)
+
+                Yield the events caused by <line>.
+        """
+        match = self.regex.match(line)
+        if match is not None:
+            hlevel = HLevel.try_parse(match.group(), self.formatstr, self.first_number)
+            if hlevel is not None:
+                yield from self.feedHeading(hlevel, line_number, line.rstrip("\r\n"))
+                return
+
+        if self.text:
+            yield OutlineEvent(TEXT, None, line_number, line)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterEvents(self, lines):
+        """
+                OutlineBuilder.iterEvents
+
+                lines   : iterable of (str) lines, e.g. a file object
+
+                Yield all the events of the document, the line numbers beginning at 1.
+        """
+        regex_match = self.regex.match
+        text = self.text
+        line_number = 0
+        for line_number, line in enumerate(lines, 1):
+            # most of the lines are not headings :
+            if text or regex_match(line) is not None:
+                yield from self.feedLine(line, line_number)
+        yield from self.close(line_number + 1)
+
+################################################################################
+class Section(object):
+    """
+        class Section
+
+        A section of the tree built by build_tree().
+
+        hlevel          : HLevel object, None for the root
+        heading         : (str) heading line, None for the root and for the sections
+                          opened without heading (SKIPPED_LEVEL)
+        start           : (int) number of the heading line
+        end             : (int) number of the first line after the section
+        children        : list of Section objects
+    """
+    __slots__ = ("hlevel", "heading", "start", "end", "children")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, hlevel, heading, start):
+        """
+                Section.__init__
+        """
+        self.hlevel = hlevel
+        self.heading = heading
+        self.start = start
+        self.end = None
+        self.children = []
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __repr__(self):
+        """
+                Section.__repr__
+        """
+        return "(Section) {0} lines {1}-{2}, {3} children".format(self.hlevel,
+                                                                   self.start, self.end,
+                                                                   len(self.children))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def walk(self):
+        """
+                Section.walk
+
+                Yield the section and its descendants, in the document order.
+        """
+        stack = [self]
+        while stack:
+            section = stack.pop()
+            yield section
+            stack.extend(reversed(section.children))
+
+#///////////////////////////////////////////////////////////////////////////////
+def build_tree(events):
+    """
+        build_tree
+
+        events  : iterable of OutlineEvent objects, see OutlineBuilder.iterEvents()
+
+        Return the root Section object (hlevel = None) : the whole tree is kept in
+        memory, but no line of text.
+    """
+    root = Section(None, None, 1)
+    stack = [root]
+    line_number = None
+    for event in events:
+        line_number = event.line_number
+        if event.kind == OPEN:
+            section = Section(event.hlevel, event.data, event.line_number)
+            stack[-1].children.append(section)
+            stack.append(section)
+        elif event.kind == CLOSE:
+            stack.pop().end = event.line_number
+    root.end = line_number
+    return root
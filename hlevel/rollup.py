@@ -0,0 +1,365 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/rollup.py
+
+    * iter_rollup() : aggregates of the subtrees of a sorted stream
+    * HashRollup class : the same aggregates, from an unsorted stream
+    * Reducer : how the values are aggregated (COUNT, SUM, MIN, MAX, COUNT_SUM)
+
+    The stream is made of (level, value) pairs, <level> being a HLevel object, a
+    list of integers or a level string. The aggregate of a level is made of the
+    values of the level and of all its descendants, e.g. the number of citations
+    under each chapter : an Aggregate(prefix, value) object is yielded for each
+    level and for each ancestor of a level, <prefix> being the tuple of its
+    numbers.
+
+    iter_rollup() : the stream is sorted; an aggregate is yielded as soon as its
+    subtree is closed (the children before their parent), only the open levels
+    (the ancestors of the current level) being kept : O(depth) memory.
+
+    HashRollup : the stream is in any order; the values are first aggregated by
+    level in a dictionary; when it holds <max_entries> levels, they are sorted
+    and written in a temporary file (pickle), the files being merged at the end.
+    The accumulators (see Reducer) must be picklable.
+
+    Reducer(initial, add, merge, finish) :
+        initial()               : a new accumulator
+        add(accumulator, value) : the accumulator with one more value
+        merge(acc1, acc2)       : the accumulator of the values of acc1 and acc2
+        finish(accumulator)     : the aggregate (None : the accumulator itself)
+
+    How it works :
+        for aggregate in iter_rollup(sorted_pairs, reducer=SUM, formatstr=".I.1"):
+            print(aggregate.prefix, aggregate.value)    # (4, 2) 17 ... (4,) 123
+
+        with HashRollup(reducer=COUNT, formatstr=".I.1", max_entries=10**6) as rollup:
+            rollup.feed(pairs)
+            for aggregate in rollup.iterAggregates():
+                ...
+"""
+
+import collections
+import heapq
+import operator
+import pickle
+import tempfile
+
+from hlevel.errors import HLevelError
+from hlevel.hlevel import HLevel
+
+Aggregate = collections.namedtuple("Aggregate", ("prefix", "value"))
+
+Reducer = collections.namedtuple("Reducer", ("initial", "add", "merge", "finish"))
+Reducer.__new__.__defaults__ = (None,)
+
+#///////////////////////////////////////////////////////////////////////////////
+def _min(acc1, acc2):
+    """
+        _min : the least of <acc1> and <acc2>, None being "no value"
+    """
+    return acc2 if acc1 is None or (acc2 is not None and acc2 < acc1) else acc1
+
+#///////////////////////////////////////////////////////////////////////////////
+def _max(acc1, acc2):
+    """
+        _max : the greatest of <acc1> and <acc2>, None being "no value"
+    """
+    return acc2 if acc1 is None or (acc2 is not None and acc2 > acc1) else acc1
+
+COUNT = Reducer(int, lambda acc, value: acc + 1, operator.add)
+SUM = Reducer(int, operator.add, operator.add)
+MIN = Reducer(lambda: None, _min, _min)
+MAX = Reducer(lambda: None, _max, _max)
+COUNT_SUM = Reducer(lambda: (0, 0),
+                    lambda acc, value: (acc[0] + 1, acc[1] + value),
+                    lambda acc1, acc2: (acc1[0] + acc2[0], acc1[1] + acc2[1]))
+
+# number of (level, accumulator) items pickled at once in a temporary file :
+SPILL_BATCH = 4096
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_keys(pairs, formatstr=None, first_number=1):
+    """
+        iter_keys
+
+        pairs           : iterable of (level, value) pairs, see the documentation of
+                          the module
+        formatstr       : (str) format of the level strings; if None, the format of
+                          each string is guessed by HLevel.detect()
+        first_number    : (int) see HLevel.__init__()
+
+        Yield (tuple of int, value) pairs; a level string is read once if it is
+        repeated (consecutive occurrences).
+    """
+    previous_src = None
+    previous_key = None
+    for level, value in pairs:
+        if isinstance(level, str):
+            if level != previous_src:
+                previous_src = level
+                previous_key = tuple(HLevel(src=level,
+                                            formatstr=HLevel.detect(level) if formatstr is None
+                                            else formatstr,
+                                            first_number=first_number))
+            yield (previous_key, value)
+        else:
+            yield (tuple(level), value)
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_rollup(pairs, reducer=COUNT, formatstr=None, first_number=1, include_root=False):
+    """
+        iter_rollup
+
+        pairs           : sorted iterable of (level, value) pairs, see the
+                          documentation of the module
+        reducer         : Reducer object
+        formatstr       : (str) see iter_keys()
+        first_number    : (int) see HLevel.__init__()
+        include_root    : (bool) if True, the aggregate of all the values
+                          (prefix = ()) is yielded at the end
+
+        Yield the Aggregate objects, each subtree being yielded once closed. A
+        HLevelError is raised if <pairs> isn't sorted.
+    """
+    return _iter_sorted_rollup(iter_keys(pairs, formatstr, first_number),
+                               reducer, reducer.add, include_root)
+
+#///////////////////////////////////////////////////////////////////////////////
+def _iter_sorted_rollup(items, reducer, add, include_root):
+    """
+        _iter_sorted_rollup
+
+        items           : sorted iterable of (tuple of int, value) pairs
+        reducer         : Reducer object
+        add             : reducer.add (<value> is a value) or reducer.merge
+                          (<value> is an accumulator)
+        include_root    : (bool) see iter_rollup()
+
+        Yield the Aggregate objects.
+    """
+    initial = reducer.initial
+    merge = reducer.merge
+    finish = reducer.finish
+
+    # numbers of the open levels and their accumulators, accumulators[0] being the
+    # accumulator of the root :
+    path = []
+    accumulators = [initial()]
+    previous_key = ()
+
+    for key, value in items:
+        if key < previous_key:
+            msg = "(rollup.iter_rollup) the levels aren't sorted : {0} is after {1}."
+            raise HLevelError(msg, list(key), list(previous_key))
+        previous_key = key
+
+        common = 0
+        max_common = min(len(key), len(path))
+        while common < max_common and path[common] == key[common]:
+            common += 1
+
+        # the subtrees which are closed :
+        while len(path) > common:
+            accumulator = accumulators.pop()
+            yield Aggregate(tuple(path), accumulator if finish is None else finish(accumulator))
+            path.pop()
+            accumulators[-1] = merge(accumulators[-1], accumulator)
+
+        for number in key[common:]:
+            path.append(number)
+            accumulators.append(initial())
+        accumulators[-1] = add(accumulators[-1], value)
+
+    while path:
+        accumulator = accumulators.pop()
+        yield Aggregate(tuple(path), accumulator if finish is None else finish(accumulator))
+        path.pop()
+        accumulators[-1] = merge(accumulators[-1], accumulator)
+
+    if include_root:
+        yield Aggregate((), accumulators[0] if finish is None else finish(accumulators[0]))
+
+################################################################################
+class HashRollup(object):
+    """
+        class HashRollup
+
+        Aggregates of the subtrees of an unsorted stream, in bounded memory : see
+        the documentation of the module.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self,
+                 reducer=COUNT,
+                 formatstr=None,
+                 first_number=1,
+                 max_entries=1000000,
+                 tmpdir=None):
+        """
+                HashRollup.__init__
+
+                reducer         : Reducer object
+                formatstr       : (str) see iter_keys()
+                first_number    : (int) see HLevel.__init__()
+                max_entries     : (int) maximal number of levels kept in memory
+                tmpdir          : None or (str) directory of the temporary files
+        """
+        self.reducer = reducer
+        self.formatstr = formatstr
+        self.first_number = first_number
+        self.max_entries = max_entries
+        self.tmpdir = tmpdir
+
+        # {tuple of int : accumulator}
+        self.accumulators = {}
+
+        # temporary files (sorted (level, accumulator) items) :
+        self.runs = []
+        self.number_of_runs = 0
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __enter__(self):
+        """
+                HashRollup.__enter__
+        """
+        return self
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __exit__(self, *exc_info):
+        """
+                HashRollup.__exit__
+        """
+        self.close()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def close(self):
+        """
+                HashRollup.close
+
+                Remove the temporary files and forget the values.
+        """
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.accumulators = {}
+
+    #///////////////////////////////////////////////////////////////////////////
+    def feed(self, pairs):
+        """
+                HashRollup.feed
+
+                pairs   : iterable of (level, value) pairs, in any order
+
+                May be called several times before iterAggregates().
+        """
+        accumulators = self.accumulators
+        initial = self.reducer.initial
+        add = self.reducer.add
+        for key, value in iter_keys(pairs, self.formatstr, self.first_number):
+            try:
+                accumulator = accumulators[key]
+            except KeyError:
+                if len(accumulators) >= self.max_entries:
+                    self.spill()
+                    accumulators = self.accumulators
+                accumulator = initial()
+            accumulators[key] = add(accumulator, value)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterAggregates(self, include_root=False):
+        """
+                HashRollup.iterAggregates
+
+                include_root    : (bool) see iter_rollup()
+
+                Yield the Aggregate objects, like iter_rollup(); the temporary files
+                are removed at the end.
+        """
+        try:
+            items = sorted(self.accumulators.items(), key=operator.itemgetter(0))
+            self.accumulators = {}
+            if self.runs:
+                items = self._iterMerged(heapq.merge(items,
+                                                     *(self._iterRun(run) for run in self.runs),
+                                                     key=operator.itemgetter(0)))
+            yield from _iter_sorted_rollup(items, self.reducer, self.reducer.merge,
+                                           include_root)
+        finally:
+            self.close()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _iterMerged(self, items):
+        """
+                HashRollup._iterMerged
+
+                items   : sorted iterable of (level, accumulator) items
+
+                Yield the (level, accumulator) items, the accumulators of a level
+                found in several runs being merged.
+        """
+        merge = self.reducer.merge
+        current_key = None
+        current = None
+        for key, accumulator in items:
+            if key == current_key:
+                current = merge(current, accumulator)
+            else:
+                if current_key is not None:
+                    yield (current_key, current)
+                current_key, current = key, accumulator
+        if current_key is not None:
+            yield (current_key, current)
+
+    #///////////////////////////////////////////////////////////////////////////
+    @staticmethod
+    def _iterRun(run):
+        """
+                HashRollup._iterRun
+
+                run     : temporary file written by spill()
+
+                Yield the (level, accumulator) items of <run>.
+        """
+        run.seek(0)
+        while True:
+            try:
+                yield from pickle.load(run)
+            except EOFError:
+                return
+
+    #///////////////////////////////////////////////////////////////////////////
+    def spill(self):
+        """
+                HashRollup.spill
+
+                Write the levels kept in memory (sorted) in a new temporary file.
+        """
+        if not self.accumulators:
+            return
+        items = sorted(self.accumulators.items(), key=operator.itemgetter(0))
+        self.accumulators = {}
+
+        run = tempfile.TemporaryFile(prefix="hlevel-rollup-", dir=self.tmpdir)
+        for index in range(0, len(items), SPILL_BATCH):
+            pickle.dump(items[index:index+SPILL_BATCH], run, pickle.HIGHEST_PROTOCOL)
+        self.runs.append(run)
+        self.number_of_runs += 1
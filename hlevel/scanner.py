@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/scanner.py
+
+    * MultiFormatScanner class : search levels written with several formats in a
+      single pass over a text.
+
+    The search patterns of the formats (see HLevel.getSearchPattern()) are combined
+    in one compiled regex, an alternation without any group : the regex engine skips
+    the characters which can't begin a level and the text is read once, whatever
+    the number of formats. For each match, the format is found among the formats
+    whose first character fits, by trying their own (anchored) pattern.
+
+    At a given position, the formats are tried in the order they were given : put
+    the most specific ones (long prefix and suffix) first. The matches don't overlap.
+
+    How it works :
+        scanner = MultiFormatScanner((".(A.I.1)", ".§1.a", ".1.1.1"))
+        for match in scanner.finditer("see (B.IV.2) and §3.b, 1.2.3"):
+            print(match.start, match.formatstr, match.hlevel)
+"""
+
+import collections
+import re
+
+from hlevel.errors import FormatError
+from hlevel.hlevel import HLevel
+from hlevel import numberformat
+
+ScanMatch = collections.namedtuple("ScanMatch", ("start", "end", "formatstr", "hlevel"))
+
+################################################################################
+class MultiFormatScanner(object):
+    """
+        class MultiFormatScanner
+
+        Search in a text the levels written with several formats.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, formatstrs, first_number=1):
+        """
+                MultiFormatScanner.__init__
+
+                formatstrs      : iterable of (str) format strings, the first ones being
+                                  tried first
+                first_number    : (int) first_number of the HLevel objects
+        """
+        self.formatstrs = tuple(formatstrs)
+        self.first_number = first_number
+
+        if not self.formatstrs:
+            raise FormatError("(MultiFormatScanner.__init__) no format string.")
+
+        patterns = []
+        # {first character of a level : list of (format string, compiled pattern)}
+        self.candidates = {}
+        for formatstr in self.formatstrs:
+            hlevel = HLevel(formatstr=formatstr)
+            pattern = hlevel.getSearchPattern()
+            patterns.append(pattern)
+
+            if hlevel.prefix:
+                first_chars = hlevel.prefix[0]
+            else:
+                number_format = numberformat.get_format(hlevel.numbers_format[0])
+                first_chars = number_format.symbols + (("-",) if number_format.signed else ())
+            for char in first_chars:
+                self.candidates.setdefault(char, []).append((formatstr, re.compile(pattern)))
+
+        # named groups would prevent the regex engine from skipping quickly the
+        # characters which can't begin a level : no group at all.
+        self.regex = re.compile("|".join(patterns))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def findall(self, text, pos=0, endpos=None):
+        """
+                MultiFormatScanner.findall
+
+                Return the list of the ScanMatch objects, see finditer().
+        """
+        return list(self.finditer(text, pos, endpos))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def finditer(self, text, pos=0, endpos=None):
+        """
+                MultiFormatScanner.finditer
+
+                text            : (str)
+                pos, endpos     : (int) the search is limited to text[pos:endpos]
+
+                Yield a ScanMatch(start, end, formatstr, hlevel) object for each level
+                found in <text>; text[start:end] is the level string, read with
+                <formatstr>.
+
+                A string matching the search pattern of a format may not be a valid
+                level (e.g. "一一" for Japanese numbers, where "十一" is expected) : such
+                strings are skipped.
+        """
+        if endpos is None:
+            endpos = len(text)
+        candidates = self.candidates
+        first_number = self.first_number
+
+        for match in self.regex.finditer(text, pos, endpos):
+            start, end = match.span()
+
+            # the format is the first one matching at <start>, like the alternation :
+            for formatstr, regex in candidates[text[start]]:
+                format_match = regex.match(text, start, endpos)
+                if format_match is not None:
+                    break
+
+            if format_match.end() == end:
+                hlevel = HLevel.try_parse(match.group(), formatstr, first_number)
+                if hlevel is not None:
+                    yield ScanMatch(start, end, formatstr, hlevel)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def search(self, text, pos=0, endpos=None):
+        """
+                MultiFormatScanner.search
+
+                Return the first ScanMatch object (see finditer()) or None.
+        """
+        return next(self.finditer(text, pos, endpos), None)
@@ -0,0 +1,321 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/serialization.py
+
+    * compact binary serialization of sequences of HLevel objects
+
+    binary format :
+        header  = MAGIC
+                + varint(length of the format string) + format string (utf-8)
+                + zigzag varint(first_number)
+        then, for each level :
+                  varint(number of integers) + zigzag varint(integer) for each integer
+
+    varint : unsigned integer, 7 bits per byte, least significant group first, the
+             high bit of each byte being set if another byte follows.
+    zigzag : 0 -> 0, -1 -> 1, 1 -> 2, -2 -> 3, ... (small negative integers stay short)
+
+    How it works :
+        with open("levels.bin", "wb") as binfile:
+            write_levels(binfile, levels)
+
+        for hlevel in iter_levels_from_path("levels.bin"):   # memory-mapped file
+            ...
+"""
+
+import io
+import mmap
+
+from hlevel.errors import DecodeError
+from hlevel.hlevel import HLevel
+
+# first bytes of the binary format :
+MAGIC = b"HLV\x01"
+
+# size of the chunks read by iter_levels() when reading a file object :
+CHUNK_SIZE = 1 << 16
+
+#///////////////////////////////////////////////////////////////////////////////
+def encode_varint(number, res):
+    """
+        encode_varint
+
+        number  : (int) >= 0
+        res     : (bytearray) <number> is appended to <res>
+    """
+    while number > 0x7F:
+        res.append((number & 0x7F) | 0x80)
+        number >>= 7
+    res.append(number)
+
+#///////////////////////////////////////////////////////////////////////////////
+def encode_level(values, res):
+    """
+        encode_level
+
+        values  : iterable of (int)
+        res     : (bytearray) the encoded level is appended to <res>
+    """
+    values = tuple(values)
+    encode_varint(len(values), res)
+    for value in values:
+        encode_varint(value << 1 if value >= 0 else ((-value) << 1) - 1, res)
+
+#///////////////////////////////////////////////////////////////////////////////
+def encode_header(formatstr, first_number=1):
+    """
+        encode_header
+
+        formatstr       : (str)
+        first_number    : (int)
+
+        Return the (bytearray) header of the binary format.
+    """
+    res = bytearray(MAGIC)
+    encoded_formatstr = formatstr.encode("utf-8")
+    encode_varint(len(encoded_formatstr), res)
+    res.extend(encoded_formatstr)
+    encode_varint(first_number << 1 if first_number >= 0 else ((-first_number) << 1) - 1, res)
+    return res
+
+#///////////////////////////////////////////////////////////////////////////////
+def decode_varint(buffer, pos):
+    """
+        decode_varint
+
+        buffer  : object supporting the buffer protocol, indexed as bytes
+        pos     : (int) position of the first byte of the varint in <buffer>
+
+        Return ((int)number, (int)position of the first byte after the varint).
+        Raise an IndexError if <buffer> ends before the end of the varint.
+    """
+    byte = buffer[pos]
+    pos += 1
+    if byte < 0x80:
+        return (byte, pos)
+
+    number = byte & 0x7F
+    shift = 7
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return (number, pos)
+        shift += 7
+
+#///////////////////////////////////////////////////////////////////////////////
+def decode_level(buffer, pos):
+    """
+        decode_level
+
+        buffer  : object supporting the buffer protocol, indexed as bytes
+        pos     : (int) position of the level in <buffer>
+
+        Return ((list of int)values, (int)position of the first byte after the level).
+        Raise an IndexError if <buffer> ends before the end of the level.
+    """
+    length, pos = decode_varint(buffer, pos)
+    values = []
+    for _ in range(length):
+        byte = buffer[pos]
+        if byte < 0x80:
+            # most integers fit in one byte :
+            pos += 1
+            number = byte
+        else:
+            number, pos = decode_varint(buffer, pos)
+        values.append(number >> 1 if not number & 1 else -((number + 1) >> 1))
+    return (values, pos)
+
+#///////////////////////////////////////////////////////////////////////////////
+def decode_header(buffer):
+    """
+        decode_header
+
+        buffer  : object supporting the buffer protocol, indexed as bytes
+
+        Return ((str)format string, (int)first_number, (int)position of the first level).
+        Raise an IndexError if <buffer> is too short to contain the header.
+    """
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        if len(buffer) < len(MAGIC):
+            raise IndexError("(serialization.decode_header) truncated header")
+        msg = "(serialization.decode_header) not a HLevel binary file : " \
+              "wrong magic number {0}."
+        raise DecodeError(msg, bytes(buffer[:len(MAGIC)]))
+
+    length, pos = decode_varint(buffer, len(MAGIC))
+    if pos + length > len(buffer):
+        raise IndexError("(serialization.decode_header) truncated header")
+    formatstr = bytes(buffer[pos:pos+length]).decode("utf-8")
+    number, pos = decode_varint(buffer, pos+length)
+
+    return (formatstr,
+            number >> 1 if not number & 1 else -((number + 1) >> 1),
+            pos)
+
+#///////////////////////////////////////////////////////////////////////////////
+def encode_levels(levels, formatstr=None, first_number=None):
+    """
+        encode_levels
+
+        levels          : iterable of HLevel objects (or of iterables of int)
+        formatstr       : (str) format string written in the header; if None, the
+                          format of the first level (or HLevel.defaultformat).
+        first_number    : (int) written in the header; if None, the first_number of
+                          the first level (or 1)
+
+        Return the (bytes) binary representation of <levels>.
+    """
+    binfile = io.BytesIO()
+    write_levels(binfile, levels, formatstr, first_number)
+    return binfile.getvalue()
+
+#///////////////////////////////////////////////////////////////////////////////
+def write_levels(binfile, levels, formatstr=None, first_number=None, batch_size=4096):
+    """
+        write_levels
+
+        binfile         : binary file object
+        levels          : iterable of HLevel objects (or of iterables of int)
+        formatstr       : (str) see encode_levels()
+        first_number    : (int) see encode_levels()
+        batch_size      : (int) number of levels encoded before each write
+
+        Write <levels> in <binfile>, without loading <levels> in memory.
+        Return the (int)number of levels written.
+    """
+    levels = iter(levels)
+    first_level = next(levels, None)
+
+    if formatstr is None:
+        formatstr = first_level.getFormatStr() \
+                    if isinstance(first_level, HLevel) else HLevel.defaultformat
+    if first_number is None:
+        first_number = first_level.first_number if isinstance(first_level, HLevel) else 1
+
+    res = encode_header(formatstr, first_number)
+    if first_level is None:
+        binfile.write(res)
+        return 0
+
+    encode_level(first_level, res)
+    number_of_levels = 1
+    for level in levels:
+        encode_level(level, res)
+        number_of_levels += 1
+        if number_of_levels % batch_size == 0:
+            binfile.write(res)
+            res = bytearray()
+    binfile.write(res)
+
+    return number_of_levels
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_levels(source, values_only=False):
+    """
+        iter_levels
+
+        source          : object supporting the buffer protocol (bytes, bytearray,
+                          mmap.mmap, memoryview, ...) or binary file object
+        values_only     : (bool) if True, yield lists of int instead of HLevel objects
+
+        Yield the levels stored in <source>, one after the other : a buffer is read
+        through a memoryview (nothing is copied), a file object is read by chunks of
+        CHUNK_SIZE bytes.
+    """
+    if hasattr(source, "read"):
+        yield from _iter_levels_from_file(source, values_only)
+        return
+
+    with memoryview(source) as view:
+        formatstr, first_number, pos = decode_header(view)
+        end = len(view)
+        try:
+            while pos < end:
+                values, pos = decode_level(view, pos)
+                if values_only:
+                    yield values
+                else:
+                    yield HLevel.fromValues(values, formatstr, first_number)
+        except IndexError:
+            raise DecodeError("(serialization.iter_levels) truncated data at the end of "
+                              "the buffer.") from None
+
+#///////////////////////////////////////////////////////////////////////////////
+def _iter_levels_from_file(binfile, values_only):
+    """
+        _iter_levels_from_file
+
+        binfile         : binary file object
+        values_only     : (bool) see iter_levels()
+
+        Yield the levels stored in <binfile>, read by chunks of CHUNK_SIZE bytes.
+    """
+    buffer = b""
+    header = None
+    pos = 0
+    eof = False
+
+    while True:
+        try:
+            if header is None:
+                header = decode_header(buffer)
+                formatstr, first_number, pos = header
+
+            while pos < len(buffer):
+                values, newpos = decode_level(buffer, pos)
+                pos = newpos
+                if values_only:
+                    yield values
+                else:
+                    yield HLevel.fromValues(values, formatstr, first_number)
+
+        except IndexError:
+            # the last level (or the header) is incomplete :
+            if eof:
+                raise DecodeError("(serialization.iter_levels) truncated data at the end "
+                                  "of the file.") from None
+
+        if eof:
+            return
+
+        chunk = binfile.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+#///////////////////////////////////////////////////////////////////////////////
+def iter_levels_from_path(path, values_only=False):
+    """
+        iter_levels_from_path
+
+        path            : (str) path to a file written by write_levels()
+        values_only     : (bool) see iter_levels()
+
+        Yield the levels stored in the file <path>, which is memory-mapped : only the
+        pages being read are loaded by the operating system.
+    """
+    with open(path, "rb") as binfile:
+        with mmap.mmap(binfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter_levels(mapped, values_only)
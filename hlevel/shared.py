@@ -0,0 +1,355 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/shared.py
+
+    * SharedLevels class : levels stored in a shared memory block
+      (multiprocessing.shared_memory), read by other processes without any copy
+    * publish_levels() : a new shared memory block
+    * attach_levels() : read-only access to a block published by another process
+
+    A list of HLevel objects sent to the processes of a pool is pickled, and
+    copied in each process. SharedLevels objects are pickled as the name of their
+    block : each process maps the same memory.
+
+    shared memory block :
+        header          : HEADER_FORMAT (magic, version, type of the numbers,
+                          number of levels, depth, length of the format string,
+                          first number)
+        format string   : utf-8, padded to a multiple of 8 bytes
+        depths          : one uint16 per level, padded to a multiple of 8 bytes
+        values          : (number of levels) x (depth) integers, the missing numbers
+                          being -1 (see bulk.py); the smallest signed type among
+                          int8, int16, int32 and int64
+
+    The process which publishes the levels owns the block : close() (or the end
+    of the "with" block, or the deletion of the object) removes the block. The
+    other processes only detach themselves from it. The views (getValues(),
+    getArray()) must be deleted before close().
+
+    How it works :
+        with publish_levels(levels, ".(I.1.a)") as shared:
+            with multiprocessing.Pool() as pool:
+                pool.map(work, [(shared, start) for start in range(0, len(shared), 1000)])
+
+        def work(args):                 # in the worker, shared is attached
+            shared, start = args
+            values, depths = shared.getArray()  # read-only numpy arrays (NumPy is optional)
+            hlevel = shared[start]      # a new HLevel object
+"""
+
+import array
+import struct
+import sys
+import threading
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+from hlevel.errors import DecodeError, HLevelError
+from hlevel.hlevel import HLevel
+
+MAGIC = b"HLSM"
+VERSION = 1
+
+# magic, version, typecode of the values, number of levels, depth, length of the
+# format string, first number :
+HEADER_FORMAT = "<4sBc2xQIIq"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# resource_tracker.register is replaced while a block is attached to (Python < 3.13) :
+_ATTACH_LOCK = threading.Lock()
+
+# typecodes (array module) of the values, the smallest first :
+TYPECODES = ("b", "h", "i", "q")
+
+################################################################################
+class SharedLevels(object):
+    """
+        class SharedLevels
+
+        Levels stored in a shared memory block : see the documentation of the
+        module. Use publish_levels() and attach_levels() to create the objects.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, shm, owner):
+        """
+                SharedLevels.__init__
+
+                shm     : multiprocessing.shared_memory.SharedMemory object
+                owner   : (bool) True if the block is removed by close()
+        """
+        self.shm = shm
+        self.owner = owner
+        self.name = shm.name
+
+        magic, version, typecode, self.length, self.depth, formatstr_length, \
+            self.first_number = struct.unpack_from(HEADER_FORMAT, shm.buf)
+        if magic != MAGIC or version != VERSION:
+            shm.close()
+            raise DecodeError("(SharedLevels.__init__) {0} is not a block of levels "
+                              "(magic={1}, version={2})", shm.name, magic, version)
+        self.typecode = typecode.decode("ascii")
+
+        offset = HEADER_SIZE
+        self.formatstr = bytes(shm.buf[offset:offset+formatstr_length]).decode("utf-8")
+        offset = _align(offset + formatstr_length)
+
+        # read-only views, released by close() :
+        buf = shm.buf.toreadonly()
+        self.depths = buf[offset:offset+2*self.length].cast("H")
+        offset = _align(offset + 2*self.length)
+        itemsize = struct.calcsize(self.typecode)
+        self.values = buf[offset:offset+itemsize*self.length*self.depth].cast(self.typecode)
+        self._views = [buf, self.depths, self.values]
+
+        self._finalizer = weakref.finalize(self, _release, shm, self._views, owner)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __enter__(self):
+        """
+                SharedLevels.__enter__
+        """
+        return self
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __exit__(self, *exc_info):
+        """
+                SharedLevels.__exit__
+        """
+        self.close()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __getitem__(self, index):
+        """
+                SharedLevels.__getitem__
+
+                index   : (int) may be negative
+
+                Return a new HLevel object.
+        """
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("SharedLevels index out of range")
+        start = index * self.depth
+        return HLevel.fromValues(self.values[start:start+self.depths[index]],
+                                 self.formatstr, self.first_number)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __iter__(self):
+        """
+                SharedLevels.__iter__
+
+                Yield new HLevel objects.
+        """
+        for index in range(self.length):
+            yield self[index]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __len__(self):
+        """
+                SharedLevels.__len__
+        """
+        return self.length
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __reduce__(self):
+        """
+                SharedLevels.__reduce__
+
+                Only the name of the block is pickled : the block is attached to
+                when the object is unpickled.
+        """
+        return (attach_levels, (self.name,))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __repr__(self):
+        """
+                SharedLevels.__repr__
+        """
+        return "(SharedLevels) {0} : {1} levels, format '{2}'".format(self.name, self.length,
+                                                                       self.formatstr)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def close(self):
+        """
+                SharedLevels.close
+
+                Detach from the block; the block is removed if this object owns it.
+                A BufferError is raised if a view (getValues(), getArray()) still
+                exists : close() may be called again once the view is deleted.
+        """
+        try:
+            self._finalizer()
+        except BufferError:
+            # the finalizer is spent : a new one for what hasn't been released.
+            self._finalizer = weakref.finalize(self, _release, self.shm, self._views,
+                                               self.owner)
+            raise
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getArray(self):
+        """
+                SharedLevels.getArray
+
+                Return a read-only numpy array of shape (number of levels, depth),
+                without any copy (the missing numbers being -1), and the numpy.uint16
+                array of the depths. Require NumPy.
+        """
+        import numpy
+
+        values = numpy.frombuffer(self.values, dtype=numpy.dtype(self.typecode))
+        return (values.reshape(self.length, self.depth),
+                numpy.frombuffer(self.depths, dtype=numpy.uint16))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getValues(self):
+        """
+                SharedLevels.getValues
+
+                Return (values, depths), two read-only memoryview objects :
+                values[index*depth:(index+1)*depth] is the row of the level <index>.
+        """
+        return self.values, self.depths
+
+#///////////////////////////////////////////////////////////////////////////////
+def _align(offset):
+    """
+        _align : <offset> rounded up to a multiple of 8
+    """
+    return (offset + 7) & ~7
+
+#///////////////////////////////////////////////////////////////////////////////
+def _release(shm, views, owner):
+    """
+        _release
+
+        shm     : SharedMemory object
+        views   : list of memoryview objects, released (and emptied)
+        owner   : (bool) True if the block is removed
+
+        Called by SharedLevels.close() or when the SharedLevels object is deleted.
+        If a view is still used (BufferError), it is kept in <views> with the views
+        which haven't been released yet, and the block is neither closed nor
+        removed.
+    """
+    while views:
+        views[-1].release()
+        views.pop()
+    shm.close()
+    if owner:
+        shm.unlink()
+
+#///////////////////////////////////////////////////////////////////////////////
+def attach_levels(name):
+    """
+        attach_levels
+
+        name    : (str) name of the block, i.e. SharedLevels.name
+
+        Return a SharedLevels object (read-only) which doesn't own the block.
+    """
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        # before Python 3.13, the block would be registered in the resource
+        # tracker, which removes it when the process ends : only the owner may
+        # remove it. (The tracker may be shared with the owner : unregistering
+        # the block would forget the registration of the owner.)
+        register = resource_tracker.register
+
+        def register_others(resource_name, rtype):
+            """
+                register_others : resource_tracker.register(), except for <name>
+            """
+            if rtype != "shared_memory" or resource_name.lstrip("/") != name.lstrip("/"):
+                register(resource_name, rtype)
+
+        with _ATTACH_LOCK:
+            resource_tracker.register = register_others
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+    return SharedLevels(shm, owner=False)
+
+#///////////////////////////////////////////////////////////////////////////////
+def publish_levels(levels, formatstr=None, first_number=1, name=None):
+    """
+        publish_levels
+
+        levels          : sequence of levels (HLevel objects, lists of int...)
+        formatstr       : (str) format of the levels read from the block; None for
+                          HLevel.defaultformat
+        first_number    : (int) see HLevel.__init__()
+        name            : None or (str) name of the block
+
+        Return a SharedLevels object which owns the new block.
+    """
+    if formatstr is None:
+        formatstr = HLevel.defaultformat
+    HLevel.compileFormat(formatstr)     # a wrong <formatstr> raises a FormatError
+
+    depths = array.array("H")
+    try:
+        depths.extend(map(len, levels))
+    except OverflowError:
+        raise HLevelError("(shared.publish_levels) a level has more than 65535 numbers")
+    depth = max(depths, default=0)
+
+    values = array.array("q")
+    padding = [-1] * depth
+    try:
+        for level in levels:
+            values.extend(level)
+            values.extend(padding[len(level):])
+    except OverflowError:
+        raise HLevelError("(shared.publish_levels) a number is greater than 64 bits")
+
+    # the smallest type for all the numbers and -1 :
+    low = min(values, default=-1)
+    high = max(values, default=-1)
+    for typecode in TYPECODES:
+        limit = 1 << (8 * struct.calcsize(typecode) - 1)
+        if -limit <= low and high < limit:
+            break
+    if typecode != values.typecode:
+        values = array.array(typecode, values)
+
+    formatstr_bytes = formatstr.encode("utf-8")
+    values_offset = _align(_align(HEADER_SIZE + len(formatstr_bytes)) + 2*len(depths))
+    size = values_offset + len(values) * values.itemsize
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    try:
+        struct.pack_into(HEADER_FORMAT, shm.buf, 0, MAGIC, VERSION, typecode.encode("ascii"),
+                         len(depths), depth, len(formatstr_bytes), first_number)
+        offset = HEADER_SIZE
+        shm.buf[offset:offset+len(formatstr_bytes)] = formatstr_bytes
+        offset = _align(offset + len(formatstr_bytes))
+        shm.buf[offset:offset+2*len(depths)] = memoryview(depths).cast("B")
+        shm.buf[values_offset:size] = memoryview(values).cast("B")
+        return SharedLevels(shm, owner=True)
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
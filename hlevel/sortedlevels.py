@@ -0,0 +1,436 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/sortedlevels.py
+
+    * SortedLevels class : sorted collection of levels, with rank and select
+
+    A sorted list makes each insertion and each deletion O(n) (bisect.insort()
+    moves all the following items). SortedLevels is a list of sorted blocks of
+    <load> to 2*<load> levels :
+        - self.maxes (greatest level of each block) finds the block of a level
+          (binary search);
+        - a Fenwick tree over the lengths of the blocks gives the number of
+          levels before a block, and the block of the n-th level, in
+          O(log(number of blocks)).
+
+    Inserting or deleting a level costs O(log n) comparisons and moves at most
+    2*<load> items; the Fenwick tree is rebuilt (O(number of blocks)) only when a
+    block is split or removed. The same level may be added several times.
+
+    The levels are HLevel objects (the strings are read with <formatstr>) : they
+    mustn't be modified while they are in the collection. A level may be looked
+    for with a HLevel object, a level string or a list/tuple of integers.
+
+    How it works :
+        levels = SortedLevels(formatstr=".1.1.1")
+        levels.add("3.2.1")
+        levels.rank("3.2.1")            # number of levels before "3.2.1"
+        levels[10000]                   # the 10001st level
+        levels.countSubtree("3.2")      # number of levels "3.2", "3.2.x"...
+        levels.remove("3.2.1")
+"""
+
+import bisect
+import itertools
+
+from hlevel.hlevel import HLevel
+
+################################################################################
+class SortedLevels(object):
+    """
+        class SortedLevels
+
+        Sorted collection of HLevel objects : see the documentation of the
+        module.
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __init__(self, levels=(), formatstr=None, first_number=1, load=1000):
+        """
+                SortedLevels.__init__
+
+                levels          : iterable of levels (HLevel objects, level strings,
+                                  lists of integers), in any order
+                formatstr       : (str) format of the level strings and of the new
+                                  HLevel objects; None for HLevel.defaultformat
+                first_number    : (int) see HLevel.__init__()
+                load            : (int) length of the blocks
+        """
+        if formatstr is None:
+            formatstr = HLevel.defaultformat
+        HLevel.compileFormat(formatstr)     # a wrong <formatstr> raises a FormatError
+
+        self.formatstr = formatstr
+        self.first_number = first_number
+        self.load = max(load, 4)
+
+        levels = sorted(self.getHLevel(level) for level in levels)
+        self.blocks = [levels[index:index+self.load]
+                       for index in range(0, len(levels), self.load)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.length = len(levels)
+        self.tree = []
+        self._buildTree()
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __contains__(self, level):
+        """
+                SortedLevels.__contains__
+        """
+        key = self.getKey(level)
+        block_index = bisect.bisect_left(self.maxes, key)
+        if block_index == len(self.maxes):
+            return False
+        block = self.blocks[block_index]
+        return block[bisect.bisect_left(block, key)] == key
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __getitem__(self, index):
+        """
+                SortedLevels.__getitem__
+
+                index   : (int) may be negative
+
+                Return the HLevel object whose rank is <index> ("select").
+        """
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("SortedLevels index out of range")
+        block_index, position = self._findPosition(index)
+        return self.blocks[block_index][position]
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __iter__(self):
+        """
+                SortedLevels.__iter__
+        """
+        return itertools.chain.from_iterable(self.blocks)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __len__(self):
+        """
+                SortedLevels.__len__
+        """
+        return self.length
+
+    #///////////////////////////////////////////////////////////////////////////
+    def __repr__(self):
+        """
+                SortedLevels.__repr__
+        """
+        return "(SortedLevels) {0} levels".format(self.length)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _buildTree(self):
+        """
+                SortedLevels._buildTree
+
+                Build the Fenwick tree of the lengths of the blocks, in
+                O(number of blocks).
+        """
+        tree = [0]
+        tree.extend(len(block) for block in self.blocks)
+        for index in range(1, len(tree)):
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+        self.tree = tree
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _findPosition(self, index):
+        """
+                SortedLevels._findPosition
+
+                index   : (int) 0 <= index < len(self)
+
+                Return (index of the block, position in the block) of the level whose
+                rank is <index>.
+        """
+        tree = self.tree
+        block_index = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            next_index = block_index + step
+            if next_index < len(tree) and tree[next_index] <= index:
+                block_index = next_index
+                index -= tree[next_index]
+            step >>= 1
+        return block_index, index
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _getLevelsBefore(self, block_index):
+        """
+                SortedLevels._getLevelsBefore
+
+                block_index     : (int)
+
+                Return the number of levels in the blocks before <block_index>.
+        """
+        tree = self.tree
+        res = 0
+        while block_index:
+            res += tree[block_index]
+            block_index -= block_index & -block_index
+        return res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def _updateTree(self, block_index, delta):
+        """
+                SortedLevels._updateTree
+
+                block_index     : (int)
+                delta           : (int) new length - old length of the block
+        """
+        tree = self.tree
+        block_index += 1
+        while block_index < len(tree):
+            tree[block_index] += delta
+            block_index += block_index & -block_index
+
+    #///////////////////////////////////////////////////////////////////////////
+    def add(self, level):
+        """
+                SortedLevels.add
+
+                level   : HLevel object, level string or list of integers
+
+                Insert <level> (after the equal levels, if any).
+        """
+        hlevel = self.getHLevel(level)
+        blocks = self.blocks
+        maxes = self.maxes
+        self.length += 1
+
+        if not blocks:
+            blocks.append([hlevel])
+            maxes.append(hlevel)
+            self._buildTree()
+            return
+
+        block_index = bisect.bisect_right(maxes, hlevel)
+        if block_index == len(blocks):
+            block_index -= 1
+            block = blocks[block_index]
+            block.append(hlevel)
+            maxes[block_index] = hlevel
+        else:
+            block = blocks[block_index]
+            bisect.insort_right(block, hlevel)
+
+        if len(block) > 2 * self.load:
+            # the block is split :
+            blocks[block_index:block_index+1] = [block[:self.load], block[self.load:]]
+            maxes[block_index:block_index+1] = [block[self.load-1], block[-1]]
+            self._buildTree()
+        else:
+            self._updateTree(block_index, 1)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def bisectRight(self, level):
+        """
+                SortedLevels.bisectRight
+
+                level   : HLevel object, level string or list of integers
+
+                Return the number of levels lower than or equal to <level>.
+        """
+        key = self.getKey(level)
+        block_index = bisect.bisect_right(self.maxes, key)
+        if block_index == len(self.maxes):
+            return self.length
+        return self._getLevelsBefore(block_index) + \
+            bisect.bisect_right(self.blocks[block_index], key)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def countSubtree(self, level):
+        """
+                SortedLevels.countSubtree
+
+                level   : HLevel object, level string or list of integers
+
+                Return the number of levels equal to <level> or beginning with it
+                (its descendants).
+        """
+        start, end = self.getSubtreeBounds(level)
+        return end - start
+
+    #///////////////////////////////////////////////////////////////////////////
+    def discard(self, level):
+        """
+                SortedLevels.discard
+
+                level   : HLevel object, level string or list of integers
+
+                Remove one level equal to <level>; return False if there is none.
+        """
+        key = self.getKey(level)
+        block_index = bisect.bisect_left(self.maxes, key)
+        if block_index == len(self.maxes):
+            return False
+        block = self.blocks[block_index]
+        position = bisect.bisect_left(block, key)
+        if block[position] != key:
+            return False
+
+        del block[position]
+        self.length -= 1
+        if not block:
+            del self.blocks[block_index]
+            del self.maxes[block_index]
+            self._buildTree()
+            return True
+
+        self.maxes[block_index] = block[-1]
+        if len(block) < self.load // 2 and len(self.blocks) > 1:
+            # the block is merged with its neighbour (and split again if needed) :
+            if block_index == len(self.blocks) - 1:
+                block_index -= 1
+            block = self.blocks[block_index] + self.blocks[block_index+1]
+            if len(block) > 2 * self.load:
+                half = len(block) // 2
+                self.blocks[block_index:block_index+2] = [block[:half], block[half:]]
+                self.maxes[block_index:block_index+2] = [block[half-1], block[-1]]
+            else:
+                self.blocks[block_index:block_index+2] = [block]
+                self.maxes[block_index:block_index+2] = [block[-1]]
+            self._buildTree()
+        else:
+            self._updateTree(block_index, -1)
+        return True
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getHLevel(self, level):
+        """
+                SortedLevels.getHLevel
+
+                level   : HLevel object, level string or iterable of integers
+
+                Return the HLevel object stored for <level> : <level> itself if it
+                is a HLevel object.
+        """
+        if isinstance(level, HLevel):
+            return level
+        if isinstance(level, str):
+            return HLevel(src=level, formatstr=self.formatstr, first_number=self.first_number)
+        return HLevel.fromValues(level, self.formatstr, self.first_number)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getKey(self, level):
+        """
+                SortedLevels.getKey
+
+                level   : HLevel object, level string or iterable of integers
+
+                Return a list which can be compared with the HLevel objects.
+        """
+        if isinstance(level, list):
+            return level
+        if isinstance(level, str):
+            return HLevel(src=level, formatstr=self.formatstr, first_number=self.first_number)
+        return list(level)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def getSubtreeBounds(self, level):
+        """
+                SortedLevels.getSubtreeBounds
+
+                level   : HLevel object, level string or list of integers
+
+                Return (rank of the first level, rank after the last level) of the
+                levels equal to <level> or beginning with it.
+        """
+        key = self.getKey(level)
+        if not key:
+            return 0, self.length
+        # "3.2" <= "3.2", "3.2.1", "3.2.1.5"... < "3.3" :
+        end = list(key[:-1])
+        end.append(key[-1] + 1)
+        return self.rank(key), self.rank(end)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def index(self, level):
+        """
+                SortedLevels.index
+
+                level   : HLevel object, level string or list of integers
+
+                Return the rank of the first level equal to <level>; raise a
+                ValueError if there is none.
+        """
+        key = self.getKey(level)
+        res = self.rank(key)
+        if res == self.length or self[res] != key:
+            raise ValueError("{0} is not in the SortedLevels object".format(list(key)))
+        return res
+
+    #///////////////////////////////////////////////////////////////////////////
+    def iterSubtree(self, level):
+        """
+                SortedLevels.iterSubtree
+
+                level   : HLevel object, level string or list of integers
+
+                Yield the (sorted) levels equal to <level> or beginning with it.
+        """
+        start, end = self.getSubtreeBounds(level)
+        if start == end:
+            return
+        block_index, position = self._findPosition(start)
+        for block in itertools.islice(self.blocks, block_index, None):
+            for hlevel in itertools.islice(block, position, position + end - start):
+                yield hlevel
+            start += len(block) - position
+            if start >= end:
+                return
+            position = 0
+
+    #///////////////////////////////////////////////////////////////////////////
+    def rank(self, level):
+        """
+                SortedLevels.rank
+
+                level   : HLevel object, level string or list of integers
+
+                Return the number of levels lower than <level> (like
+                bisect.bisect_left() on a sorted list).
+        """
+        key = self.getKey(level)
+        block_index = bisect.bisect_left(self.maxes, key)
+        if block_index == len(self.maxes):
+            return self.length
+        return self._getLevelsBefore(block_index) + \
+            bisect.bisect_left(self.blocks[block_index], key)
+
+    #///////////////////////////////////////////////////////////////////////////
+    def remove(self, level):
+        """
+                SortedLevels.remove
+
+                level   : HLevel object, level string or list of integers
+
+                Remove one level equal to <level>; raise a ValueError if there is
+                none.
+        """
+        if not self.discard(level):
+            raise ValueError("{0} is not in the SortedLevels object".format(
+                list(self.getKey(level))))
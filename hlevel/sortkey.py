@@ -0,0 +1,322 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/sortkey.py
+
+    * order-preserving bytes representation of HLevel objects
+
+    Two levels compare like their sort keys compared byte after byte (memcmp) :
+        encode_sortkey(hl1) < encode_sortkey(hl2)  <=>  hl1 < hl2
+
+    Each integer is encoded by a header byte followed by <n> bytes (big-endian) :
+        integer >= 0 : header = 0x80 + n, bytes = integer
+        integer < 0  : header = 0x7F - n, bytes = integer + 256**n
+    <n> being as small as possible. A shorter level being a prefix of a longer one,
+    (1.2) sorts before (1.2.1), exactly like HLevel objects.
+
+    * packed keys : shallow levels packed into one 64-bit integer
+
+    A level of at most 64 // <bits> numbers, each of them between 0 and
+    2**<bits> - 2, is packed into one (int) key, the first number in the highest
+    bits; each number is stored as number + 1, 0 meaning "no number". With
+    bits = 8 : (1.2) -> 0x0203000000000000 < (1.2.1) -> 0x0203020000000000.
+    Sorting the keys (a single integer sort) sorts the levels.
+
+    pack_keys() and pack_array() detect if a collection fits and return None
+    otherwise : use then sorted() or the bytes keys. pack_array() and
+    unpack_array() read/write NumPy arrays (uint64) and require NumPy, which is
+    imported only by these functions.
+
+    How it works :
+        sorted_levels = sort_levels(levels)     # packed keys if possible
+        keys = pack_array(levels_to_array(levels))      # numpy.uint64 or None
+"""
+
+import itertools
+
+from hlevel.errors import HLevelError, DecodeError
+
+# default number of bits of each number of a packed key :
+PACKED_BITS = 8
+
+# bytes.translate() table : byte -> byte + 1
+_PLUS_ONE = bytes(range(1, 256)) + b"\0"
+
+#///////////////////////////////////////////////////////////////////////////////
+def encode_sortkey(values):
+    """
+        encode_sortkey
+
+        values  : iterable of (int), e.g. a HLevel object
+
+        Return the (bytes) sort key of <values>.
+    """
+    res = bytearray()
+    for value in values:
+        if value >= 0:
+            if value < 0x100:
+                res.append(0x80 if value == 0 else 0x81)
+                if value:
+                    res.append(value)
+            else:
+                length = (value.bit_length() + 7) // 8
+                res.append(0x80 + length)
+                res.extend(value.to_bytes(length, "big"))
+        else:
+            length = ((-value - 1).bit_length() + 7) // 8
+            res.append(0x7F - length)
+            res.extend((value + (1 << (8*length))).to_bytes(length, "big"))
+    return bytes(res)
+
+#///////////////////////////////////////////////////////////////////////////////
+def decode_sortkey(key):
+    """
+        decode_sortkey
+
+        key     : (bytes) a key returned by encode_sortkey()
+
+        Return the (list of int) integers encoded in <key>.
+    """
+    values = []
+    pos = 0
+    len_key = len(key)
+    while pos < len_key:
+        header = key[pos]
+        pos += 1
+        if header >= 0x80:
+            length = header - 0x80
+            values.append(int.from_bytes(key[pos:pos+length], "big"))
+        else:
+            length = 0x7F - header
+            values.append(int.from_bytes(key[pos:pos+length], "big") - (1 << (8*length)))
+        pos += length
+
+    if pos != len_key:
+        raise DecodeError("(sortkey.decode_sortkey) truncated sort key {0}", key)
+
+    return values
+
+#///////////////////////////////////////////////////////////////////////////////
+def subtree_bounds(values):
+    """
+        subtree_bounds
+
+        values  : non empty iterable of (int), e.g. a HLevel object
+
+        Return ((bytes)low, (bytes)high) : the sort keys of <values> and of its
+        descendants are the keys <key> such as low <= key < high.
+        E.g. (1.2) -> keys of (1.2) and (1.3)
+    """
+    values = list(values)
+    if not values:
+        raise HLevelError("(sortkey.subtree_bounds) an empty level has no subtree bounds.")
+
+    return (encode_sortkey(values),
+            encode_sortkey(values[:-1] + [values[-1] + 1]))
+
+#///////////////////////////////////////////////////////////////////////////////
+def get_packing_limits(bits=PACKED_BITS):
+    """
+        get_packing_limits
+
+        bits    : (int) number of bits of each number
+
+        Return ((int)maximal depth, (int)maximal number) of the levels packed with
+        <bits> bits per number.
+    """
+    if not 1 < bits <= 32:
+        raise HLevelError("(sortkey.get_packing_limits) wrong number of bits {0}", bits)
+    return (64 // bits, (1 << bits) - 2)
+
+#///////////////////////////////////////////////////////////////////////////////
+def levels_to_array(levels, depth=None):
+    """
+        levels_to_array
+
+        levels  : sequence of levels (HLevel objects, lists of int...)
+        depth   : (int) number of columns or None for the depth of the deepest
+                  level
+
+        Return a numpy.int64 array of shape (len(levels), <depth>), one row per
+        level, the missing numbers being -1 : see pack_array(). Require NumPy.
+    """
+    import numpy
+
+    lengths = numpy.fromiter(map(len, levels), dtype=numpy.int64, count=len(levels))
+    if depth is None:
+        depth = int(lengths.max()) if len(levels) else 0
+    elif len(levels) and lengths.max() > depth:
+        raise HLevelError("(sortkey.levels_to_array) a level is deeper than {0}", depth)
+
+    res = numpy.full((len(levels), depth), -1, dtype=numpy.int64)
+    values = numpy.fromiter(itertools.chain.from_iterable(levels), dtype=numpy.int64,
+                            count=int(lengths.sum()))
+    rows = numpy.repeat(numpy.arange(len(levels)), lengths)
+    starts = numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+    res[rows, numpy.arange(len(values)) - starts] = values
+    return res
+
+#///////////////////////////////////////////////////////////////////////////////
+def pack_array(array, bits=PACKED_BITS):
+    """
+        pack_array
+
+        array   : numpy array of integers, shape (number of levels, depth), the
+                  missing numbers (at the end of the rows) being -1; see
+                  levels_to_array()
+        bits    : (int) number of bits of each number
+
+        Return a numpy.uint64 array of packed keys, or None if a level is too deep
+        or one of its numbers is too great or negative. Require NumPy.
+    """
+    import numpy
+
+    max_depth, max_value = get_packing_limits(bits)
+    array = numpy.asarray(array)
+    if array.ndim != 2:
+        raise HLevelError("(sortkey.pack_array) expected a 2D array, not {0}D", array.ndim)
+    if ((array[:, 1:] >= 0) & (array[:, :-1] < 0)).any():
+        raise HLevelError("(sortkey.pack_array) a missing number (-1) is followed by a number")
+
+    # the last columns may be empty :
+    depth = array.shape[1]
+    while depth > max_depth and (array[:, depth-1] == -1).all():
+        depth -= 1
+    if depth > max_depth or (array.size and (array.min() < -1 or array.max() > max_value)):
+        return None
+
+    keys = numpy.zeros(len(array), dtype=numpy.uint64)
+    for column in range(depth):
+        keys |= (array[:, column] + 1).astype(numpy.uint64) << \
+                numpy.uint64(bits * (max_depth - 1 - column))
+    return keys
+
+#///////////////////////////////////////////////////////////////////////////////
+def pack_keys(levels, bits=PACKED_BITS):
+    """
+        pack_keys
+
+        levels  : iterable of levels (HLevel objects, lists of int...)
+        bits    : (int) number of bits of each number
+
+        Return the list of the (int) packed keys of <levels>, or None if one of
+        the levels can't be packed.
+    """
+    max_depth, max_value = get_packing_limits(bits)
+    keys = []
+
+    if bits == 8:
+        # bytes() checks 0 <= number <= 255, translate() adds 1 :
+        from_bytes = int.from_bytes
+        try:
+            for values in levels:
+                numbers = bytes(values)
+                if len(numbers) > 8 or b"\xff" in numbers:
+                    return None
+                keys.append(from_bytes(numbers.translate(_PLUS_ONE).ljust(8, b"\0"), "big"))
+        except ValueError:
+            return None
+        return keys
+
+    for values in levels:
+        if len(values) > max_depth:
+            return None
+        key = 0
+        for value in values:
+            if not 0 <= value <= max_value:
+                return None
+            key = (key << bits) | (value + 1)
+        keys.append(key << (bits * (max_depth - len(values))))
+    return keys
+
+#///////////////////////////////////////////////////////////////////////////////
+def pack_level(values, bits=PACKED_BITS):
+    """
+        pack_level
+
+        values  : iterable of (int), e.g. a HLevel object
+        bits    : (int) number of bits of each number
+
+        Return the (int) packed key of <values>; raise a HLevelError if <values>
+        can't be packed.
+    """
+    keys = pack_keys((list(values),), bits)
+    if keys is None:
+        raise HLevelError("(sortkey.pack_level) {0} can't be packed with {1} bits "
+                          "per number : {2} numbers between 0 and {3} at most",
+                          values, bits, *get_packing_limits(bits))
+    return keys[0]
+
+#///////////////////////////////////////////////////////////////////////////////
+def sort_levels(levels, bits=PACKED_BITS):
+    """
+        sort_levels
+
+        levels  : iterable of levels (HLevel objects, lists of int...)
+        bits    : (int) number of bits of each number
+
+        Return a new sorted list of <levels> (stable sort), the packed keys being
+        sorted if all the levels can be packed, the levels themselves otherwise.
+    """
+    levels = list(levels)
+    keys = pack_keys(levels, bits)
+    if keys is None:
+        return sorted(levels)
+    return [levels[index] for index in sorted(range(len(levels)), key=keys.__getitem__)]
+
+#///////////////////////////////////////////////////////////////////////////////
+def unpack_array(keys, bits=PACKED_BITS):
+    """
+        unpack_array
+
+        keys    : numpy array of packed keys, see pack_array()
+        bits    : (int) number of bits of each number
+
+        Return a numpy.int64 array of shape (len(keys), 64 // <bits>), the missing
+        numbers being -1. Require NumPy.
+    """
+    import numpy
+
+    max_depth = get_packing_limits(bits)[0]
+    shifts = numpy.arange(max_depth - 1, -1, -1, dtype=numpy.uint64) * numpy.uint64(bits)
+    values = (numpy.asarray(keys, dtype=numpy.uint64)[:, None] >> shifts) & \
+             numpy.uint64((1 << bits) - 1)
+    return values.astype(numpy.int64) - 1
+
+#///////////////////////////////////////////////////////////////////////////////
+def unpack_level(key, bits=PACKED_BITS):
+    """
+        unpack_level
+
+        key     : (int) packed key, see pack_level()
+        bits    : (int) number of bits of each number
+
+        Return the (list of int) numbers packed in <key>.
+    """
+    max_depth = get_packing_limits(bits)[0]
+    mask = (1 << bits) - 1
+    values = []
+    for shift in range(bits * (max_depth - 1), -1, -bits):
+        value = (key >> shift) & mask
+        if not value:
+            break
+        values.append(value - 1)
+    return values
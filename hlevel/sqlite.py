@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+################################################################################
+#    HLevel Copyright (C) 2012 Suizokukan
+#    Contact: suizokukan _A.T._ orange dot fr
+#
+#    This file is part of HLevel.
+#    HLevel is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    HLevel is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with HLevel.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+"""
+    ❏HLevel❏ : hlevel/sqlite.py
+
+    * sqlite3 support : HLevel objects are stored as BLOBs (see hlevel/sortkey.py)
+      sorted by sqlite exactly like HLevel objects : ORDER BY, indexes, <, BETWEEN...
+      follow the HLevel order.
+
+    * collation for legacy TEXT columns storing level strings.
+
+    How it works :
+        connection = sqlite3.connect("db.sqlite", detect_types=sqlite3.PARSE_DECLTYPES)
+        register_sqlite(connection, formatstr=".(1.1.1)")
+
+        connection.execute("CREATE TABLE sections (level HLEVEL, title TEXT)")
+        connection.execute("INSERT INTO sections VALUES (?, ?)",
+                           (HLevel(src="(10.1)", formatstr=".(1.1.1)"), "..."))
+        connection.execute("SELECT level FROM sections ORDER BY level")   # HLevel objects
+
+        # legacy column storing strings like "10.1" :
+        connection.execute("SELECT name FROM old_table ORDER BY name COLLATE HLEVEL")
+"""
+
+import functools
+import sqlite3
+
+from hlevel.hlevel import HLevel
+from hlevel.sortkey import encode_sortkey, decode_sortkey
+
+#///////////////////////////////////////////////////////////////////////////////
+def adapt_hlevel(hlevel):
+    """
+        adapt_hlevel
+
+        hlevel  : HLevel object
+
+        sqlite3 adapter : return the (bytes) sort key of <hlevel>.
+    """
+    return encode_sortkey(hlevel)
+
+#///////////////////////////////////////////////////////////////////////////////
+def make_converter(formatstr=None, first_number=1):
+    """
+        make_converter
+
+        formatstr       : (str) format of the HLevel objects returned by the converter
+        first_number    : (int)
+
+        Return a sqlite3 converter turning a (bytes) sort key into a HLevel object.
+    """
+    def convert_hlevel(key):
+        """
+            convert_hlevel
+
+            key     : (bytes) value stored by adapt_hlevel()
+        """
+        return HLevel.fromValues(decode_sortkey(key), formatstr, first_number)
+
+    return convert_hlevel
+
+#///////////////////////////////////////////////////////////////////////////////
+def make_collation(formatstr=None, cache_size=65536):
+    """
+        make_collation
+
+        formatstr       : (str) format of the strings stored in the column; if None,
+                          the format of each string is guessed by HLevel.detect()
+        cache_size      : (int) number of strings whose values are kept in memory
+
+        Return a sqlite3 collation function comparing two level strings like HLevel
+        objects ("9.2" < "10.1"). Strings that can't be read are sorted after the
+        others, in lexicographic order. Two different strings are never equal :
+        the strings of the same level ("V", "IIIII", "(5)"...) are sorted in
+        lexicographic order.
+    """
+    @functools.lru_cache(maxsize=cache_size)
+    def read(src):
+        """
+            read
+
+            src     : (str)
+
+            Return (0, (tuple of int)values, <src>) or, if <src> can't be read,
+            (1, <src>).
+        """
+        _formatstr = HLevel.detect(src) if formatstr is None else formatstr
+        if _formatstr is not None:
+            hlevel = HLevel(formatstr=_formatstr)
+            values = hlevel.tokenizeStr(src)[0]
+            if values is not None:
+                return (0, tuple(values), src)
+        return (1, src)
+
+    def collate_hlevel(src1, src2):
+        """
+            collate_hlevel
+
+            src1, src2  : (str)
+        """
+        key1 = read(src1)
+        key2 = read(src2)
+        return (key1 > key2) - (key1 < key2)
+
+    return collate_hlevel
+
+#///////////////////////////////////////////////////////////////////////////////
+def register_sqlite(connection,
+                    formatstr=None,
+                    first_number=1,
+                    typename="HLEVEL",
+                    collation="HLEVEL",
+                    text_formatstr=None):
+    """
+        register_sqlite
+
+        connection      : sqlite3.Connection object, opened with
+                          detect_types=sqlite3.PARSE_DECLTYPES to get HLevel objects
+                          back from the columns declared as <typename>.
+        formatstr       : (str) format of the HLevel objects read from the database
+        first_number    : (int) first_number of the HLevel objects read from the database
+        typename        : (str) declared type of the columns storing HLevel objects
+        collation       : (str) name of the collation for TEXT columns, or None
+        text_formatstr  : (str) format of the strings compared by the collation;
+                          if None, see make_collation()
+
+        Beware : adapters and converters are global in the sqlite3 module; the
+        collation is registered for <connection> only.
+    """
+    sqlite3.register_adapter(HLevel, adapt_hlevel)
+    sqlite3.register_converter(typename, make_converter(formatstr, first_number))
+
+    if collation is not None:
+        connection.create_collation(collation, make_collation(text_formatstr))
@@ -22,9 +22,44 @@
     ❏HLevel❏ : hlevel/tests.py
 """
 
+import bisect
+import collections
+import io
+import os
+import pickle
+import random
+import re
+import sqlite3
+import tempfile
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from hlevel.hlevel import HLevel
+from hlevel import numberformat
+from hlevel.errors import HLevelError, FormatError, ParseError, RenderError
+from hlevel.extsort import ExternalSorter, sort_file
+from hlevel import serialization
+from hlevel.diff import diff_levels
+from hlevel.scanner import MultiFormatScanner
+from hlevel.shared import attach_levels, publish_levels
+from hlevel.index import build_index, HeadingIndex, iter_headings
+from hlevel.merge import merge_levels
+from hlevel.compare import compare_strings, string_key
+from hlevel.node import LevelNode, LevelTree
+from hlevel import outline
+from hlevel import rollup
+from hlevel import corpus
+from hlevel.bulk import parse_positional
+from hlevel.cache import FrozenHLevel, InternPool, ParseCache
+from hlevel.sortedlevels import SortedLevels
+from hlevel.sortkey import encode_sortkey, decode_sortkey, subtree_bounds
+from hlevel.sortkey import pack_level, unpack_level, pack_keys, sort_levels
+from hlevel.sortkey import levels_to_array, pack_array, unpack_array
+from hlevel.sqlite import make_collation, register_sqlite
 
 ################################################################################
 class TESTHLevel(unittest.TestCase):
@@ -489,3 +524,1630 @@ class TESTHLevel(unittest.TestCase):
         hl = HLevel( formatstr = ".(1.1.1)" )
         self.assertEqual( hl.findHLevelStringFromAString("(1) \"encore\""),
                           (True, 0, "(1)") )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_cachedRepr(self):
+        """
+                TESTHLevel.test_cachedRepr
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # each mutating operation must give the same result as a fresh object :
+        operations = (lambda hl: hl.append(4),
+                      lambda hl: hl.extend([5, 6]),
+                      lambda hl: hl.insert(0, 7),
+                      lambda hl: hl.pop(),
+                      lambda hl: hl.pop(0),
+                      lambda hl: hl.remove(3),
+                      lambda hl: hl.clear(),
+                      lambda hl: hl.reverse(),
+                      lambda hl: hl.sort(reverse=True),
+                      lambda hl: hl.__setitem__(1, 8),
+                      lambda hl: hl.__setitem__(slice(0, 2), [9]),
+                      lambda hl: hl.__delitem__(0),
+                      lambda hl: hl.__iadd__([2]),
+                      lambda hl: hl.__imul__(2),
+                      lambda hl: hl.setFormat("|[I|I|I|I|I|I]"),
+                      lambda hl: setattr(hl, "prefix", "<"),
+                      lambda hl: setattr(hl, "suffix", ">"),
+                      lambda hl: setattr(hl, "separator", "-"),
+                      lambda hl: setattr(hl, "numbers_format", ['A', 'A', 'A', 'A', 'A']),
+                      lambda hl: hl.initFromStr("(5.4)"),)
+
+        for operation in operations:
+            hlevel = HLevel( src="(1.2.3)",
+                             formatstr = ".(1.1.1.1.1.1)" )
+            self.assertEqual( str(hlevel), "(1.2.3)" )
+            operation(hlevel)
+
+            fresh = HLevel( formatstr = ".(1.1.1.1.1.1)" )
+            fresh.setFormat(hlevel.separator + hlevel.prefix + \
+                            hlevel.separator.join(hlevel.numbers_format) + \
+                            hlevel.suffix)
+            fresh.extend(hlevel)
+            self.assertEqual( str(hlevel), fresh.getRepr() )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        hlevel = HLevel( src="(1.2)",
+                         formatstr = ".(1.1.1)" )
+        self.assertEqual( str(hlevel), "(1.2)" )
+        hlevel[0] += 1
+        self.assertEqual( str(hlevel), "(2.2)" )
+        hlevel += [3]
+        self.assertEqual( str(hlevel), "(2.2.3)" )
+        del hlevel[1:]
+        self.assertEqual( str(hlevel), "(2)" )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # the list is partly modified before the exception : no stale string
+        def values():
+            """
+                values : 3, then an exception
+            """
+            yield 3
+            raise ValueError
+
+        hlevel = HLevel( src="(1.2)",
+                         formatstr = ".(1.1.1.1)" )
+        self.assertEqual( str(hlevel), "(1.2)" )
+        with self.assertRaises(ValueError):
+            hlevel.extend(values())
+        self.assertEqual( list(hlevel), [1, 2, 3] )
+        self.assertEqual( str(hlevel), "(1.2.3)" )
+        with self.assertRaises(ValueError):
+            hlevel += values()
+        self.assertEqual( str(hlevel), "(1.2.3.3)" )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_detect(self):
+        """
+                TESTHLevel.test_detect
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        self.assertEqual( HLevel.detect("IV.b.3"), ".I.a.1" )
+        self.assertEqual( HLevel.detect("(A.2)"), ".(A.1)" )
+        self.assertEqual( HLevel.detect("①.α"), ".①.α" )
+        self.assertEqual( HLevel.detect("<<②|99|z>>"), "|<<①|1|a>>" )
+        self.assertEqual( HLevel.detect("(¹.⁴²⁴.₄₀₉.４０５.ΑΒ.一)"), ".(¹.¹.₁.１.Α.一)" )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # ambiguous components :
+        self.assertEqual( HLevel.detect("(I)"), ".(I)" )
+        self.assertEqual( HLevel.detect("(i)"), ".(i)" )
+        self.assertEqual( HLevel.detect("(C.IX.3)"), ".(A.I.1)" )
+        self.assertEqual( HLevel.detect("(c.cd.ib)"), ".(a.i.a)" )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # no format available :
+        self.assertEqual( HLevel.detect("(1.2-3)"), None )
+        self.assertEqual( HLevel.detect("(a1.2)"), None )
+        self.assertEqual( HLevel.detect("()"), None )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # the detected format can be used to read the string :
+        for src in ("(C.IX.3)", "{ii.α}", "[十二|⑳]"):
+            formatstr = HLevel.detect(src)
+            self.assertEqual( str(HLevel(src=src, formatstr=formatstr)), src )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_tokenizeStr(self):
+        """
+                TESTHLevel.test_tokenizeStr
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # empty prefix and/or suffix :
+        self.assertEqual( HLevel(src="IV.b.3", formatstr=".I.a.1"), [4, 2, 3] )
+        self.assertEqual( HLevel(src="(IV.b.3", formatstr=".(I.a.1"), [4, 2, 3] )
+        self.assertEqual( HLevel(src="IV.b.3)", formatstr=".I.a.1)"), [4, 2, 3] )
+        self.assertEqual( HLevel(src="()", formatstr=".(1.1)"), [] )
+        self.assertEqual( str(HLevel(src="()", formatstr=".(1.1)")), "()" )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        self.assertEqual( HLevel(src="(MCMXCIV.二千二十五.σ.-₁₂)",
+                                 formatstr=".(I.一.α.₁)"),
+                          [1994, 2025, 18, -12] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # offset of the errors :
+        hlevel = HLevel(formatstr=".(1.1)")
+        self.assertEqual( hlevel.tokenizeStr("(1.2)"), ([1, 2], None, None) )
+        self.assertEqual( hlevel.tokenizeStr("[1.2)")[:2], (None, 0) )
+        self.assertEqual( hlevel.tokenizeStr("(1x2)")[:2], (None, 2) )
+        self.assertEqual( hlevel.tokenizeStr("(1.)")[:2], (None, 3) )
+        self.assertEqual( hlevel.tokenizeStr("(1.2")[:2], (None, 4) )
+        self.assertEqual( hlevel.tokenizeStr("(1.2.3)")[:2], (None, 5) )
+
+        hlevel = HLevel(formatstr=".(①.①)")
+        self.assertEqual( hlevel.tokenizeStr("(⑩.⑬③)")[:2], (None, 4) )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # an object is left untouched if the string can't be read :
+        hlevel = HLevel(src="(1.2)", formatstr=".(1.1)")
+        with self.assertRaises(Exception):
+            hlevel.initFromStr("(3.4.5)")
+        self.assertEqual( hlevel, [1, 2] )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_try_parse(self):
+        """
+                TESTHLevel.test_try_parse
+        """
+        hlevel = HLevel.try_parse("(C.IX.3)", ".(A.I.1)")
+        self.assertEqual( hlevel, [3, 9, 3] )
+        self.assertEqual( str(hlevel), "(C.IX.3)" )
+        self.assertEqual( HLevel.try_parse("(A.1)", ".(A.1)", first_number=0), [0, 1] )
+        self.assertEqual( HLevel.try_parse("(1.2.3)"), [1, 2, 3] )
+
+        for src in ("(C.IX.3", "(C.9.3)", "C.IX.3)", "(C..3)", "(C.IX.3.4)"):
+            self.assertEqual( HLevel.try_parse(src, ".(A.I.1)"), None )
+            self.assertFalse( HLevel.is_valid(src, ".(A.I.1)") )
+        self.assertTrue( HLevel.is_valid("(C.IX.3)", ".(A.I.1)") )
+
+        # the empty level, only read if allow_empty is True :
+        for src, formatstr in (("", ".1.1"), ("()", ".(1.1)")):
+            self.assertEqual( HLevel.try_parse(src, formatstr), None )
+            self.assertFalse( HLevel.is_valid(src, formatstr) )
+            self.assertEqual( HLevel.try_parse(src, formatstr, allow_empty=True), [] )
+            self.assertTrue( HLevel.is_valid(src, formatstr, allow_empty=True) )
+            self.assertEqual( HLevel(src=src, formatstr=formatstr), [] )
+
+        # a wrong format string is not dirty data :
+        with self.assertRaises(FormatError):
+            HLevel.try_parse("(1)", "")
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # errors :
+        with self.assertRaises(ParseError) as context:
+            HLevel(src="(1.x)", formatstr=".(1.1)")
+        self.assertEqual( (context.exception.src,
+                           context.exception.formatstr,
+                           context.exception.offset,
+                           context.exception.reason),
+                          ("(1.x)", ".(1.1)", 3, "unexpected character 'x'") )
+        self.assertEqual( str(context.exception),
+                          "(HLevel.initFromStr) can't read '(1.x)' with the format string "
+                          "'.(1.1)' : error at offset 3 : unexpected character 'x'." )
+        self.assertIsInstance( context.exception, HLevelError )
+
+        for src, offset, reason in (("(x)", 1, "unexpected character 'x'"),
+                                    ("(1..2)", 3, "empty number"),
+                                    ("(1.)", 3, "empty number")):
+            with self.assertRaises(ParseError) as context:
+                HLevel(src=src, formatstr=".(1.1)")
+            self.assertEqual( (context.exception.offset, context.exception.reason),
+                              (offset, reason) )
+
+        with self.assertRaises(ParseError) as context:
+            numberformat.get_format("¹").parse("¹x")
+        self.assertEqual( context.exception.offset, 1 )
+
+        hlevel = HLevel(src="(①)", formatstr=".(①.①)")
+        hlevel.append(21)
+        with self.assertRaises(RenderError):
+            str(hlevel)
+        with self.assertRaises(FormatError):
+            HLevel(formatstr=".(1.1)2")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_iter_range(self):
+        """
+                TESTHLevel.test_iter_range
+        """
+        levels = [str(hlevel) for hlevel in HLevel.iter_range("A.I.1", "C.V.9", (3, 5, 9),
+                                                              ".A.I.1")]
+        self.assertEqual( levels[:11], ["A.I.1", "A.I.2", "A.I.3", "A.I.4", "A.I.5", "A.I.6",
+                                        "A.I.7", "A.I.8", "A.I.9", "A.II", "A.II.1"] )
+        self.assertEqual( levels[-2:], ["C.V.8", "C.V.9"] )
+        self.assertEqual( len(levels), 3*5*9 + 3*5 + 3 - 2 )    # without "A" and "A.I"
+        self.assertEqual( levels, list(HLevel.iter_range("A.I.1", "C.V.9", (3, 5, 9),
+                                                         ".A.I.1", strings=True)) )
+        self.assertEqual( levels, sorted(levels, key=lambda src: HLevel(src, ".A.I.1")) )
+
+        leaves = list(HLevel.iter_range("A.I.1", "C.V.9", (3, 5, 9), ".A.I.1",
+                                        leaves_only=True, strings=True))
+        self.assertEqual( len(leaves), 3*5*9 )
+        self.assertEqual( len(set(leaves)), 3*5*9 )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # one cursor, modified in place :
+        cursors = list(HLevel.iter_range([1], [2, 1], 2, ".1.1"))
+        self.assertEqual( len(set(map(id, cursors))), 1 )
+        self.assertEqual( [list(hlevel) for hlevel in HLevel.iter_range([1], [2, 1], 2, ".1.1")],
+                          [[1], [1, 1], [1, 2], [2], [2, 1]] )
+        self.assertEqual( list(HLevel.iter_range([1, 2], [9], 2, ".1.1", strings=True)),
+                          ["1.2", "2", "2.1", "2.2"] )
+        self.assertEqual( list(HLevel.iter_range("(0)", "(0.1)", (3, 2), ".(1.1)",
+                                                 first_number=0, first_value=0,
+                                                 strings=True)),
+                          ["(0)", "(0.0)", "(0.1)"] )
+        self.assertEqual( list(HLevel.iter_range([2], [1], 3)), [] )
+
+        with self.assertRaises(HLevelError):
+            next(HLevel.iter_range([4], [5], 3))
+        with self.assertRaises(HLevelError):
+            next(HLevel.iter_range([1, 1, 1], [2], (3, 3)))
+        with self.assertRaises(RenderError):
+            list(HLevel.iter_range([1], [30], (30, 2), ".①.1", strings=True))
+
+################################################################################
+class TESTSerialization(unittest.TestCase):
+    """
+        class TESTSerialization
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_pickle(self):
+        """
+                TESTSerialization.test_pickle
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        hlevels = [HLevel( src="(C.IX.{0})".format(i),
+                           formatstr = ".(A.I.1)" ) for i in range(1, 100)]
+        hlevels.append(HLevel( src="(一.二千二十五.〇)",
+                               formatstr = ".(一.一.一)",
+                               first_number = 0))
+
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL+1):
+            data = pickle.dumps(hlevels, protocol=protocol)
+            # the format string is stored once :
+            self.assertEqual( data.count(b".(A.I.1)"), 1 )
+
+            res = pickle.loads(data)
+            self.assertEqual( res, hlevels )
+            self.assertEqual( [str(hlevel) for hlevel in res],
+                              [str(hlevel) for hlevel in hlevels] )
+            self.assertEqual( res[-1].first_number, 0 )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_binary(self):
+        """
+                TESTSerialization.test_binary
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        hlevels = [HLevel.fromValues((i, 127, 128, 2**70), ".(1.1.1.1)") \
+                   for i in range(1, 500)]
+        hlevels.append(HLevel( formatstr = ".(1.1.1.1)" ))
+        data = serialization.encode_levels(hlevels)
+
+        self.assertEqual( list(serialization.iter_levels(data)), hlevels )
+        self.assertEqual( str(next(serialization.iter_levels(data))),
+                          "(1.127.128.{0})".format(2**70) )
+
+        # file object read by (very) small chunks :
+        chunk_size = serialization.CHUNK_SIZE
+        serialization.CHUNK_SIZE = 3
+        try:
+            self.assertEqual( list(serialization.iter_levels(io.BytesIO(data))), hlevels )
+        finally:
+            serialization.CHUNK_SIZE = chunk_size
+
+        # memory-mapped file :
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with open(path, "wb") as binfile:
+                self.assertEqual( serialization.write_levels(binfile, hlevels, batch_size=7),
+                                  len(hlevels) )
+            self.assertEqual( list(serialization.iter_levels_from_path(path,
+                                                                       values_only=True)),
+                              [list(hlevel) for hlevel in hlevels] )
+        finally:
+            os.remove(path)
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        data = serialization.encode_levels([[-1, 0, 1]], formatstr=".[1.1.1]", first_number=-1)
+        res = list(serialization.iter_levels(data))
+        self.assertEqual( res, [[-1, 0, 1]] )
+        self.assertEqual( (res[0].first_number, str(res[0])), (-1, "[-1.0.1]") )
+
+        self.assertEqual( list(serialization.iter_levels(serialization.encode_levels([]))),
+                          [] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        with self.assertRaises(Exception):
+            list(serialization.iter_levels(data[:-1]))
+        with self.assertRaises(Exception):
+            list(serialization.iter_levels(io.BytesIO(data[:-1])))
+        with self.assertRaises(Exception):
+            list(serialization.iter_levels(b"not a HLevel file"))
+
+################################################################################
+class TESTSqlite(unittest.TestCase):
+    """
+        class TESTSqlite
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_register_sqlite(self):
+        """
+                TESTSqlite.test_register_sqlite
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        connection = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+        register_sqlite(connection, formatstr=".[1.1.1]")
+        connection.execute("CREATE TABLE sections (level HLEVEL, name TEXT)")
+
+        for src in ("(10.1)", "(9.2)", "(9.10)", "(9)", "(1.1.1)"):
+            connection.execute("INSERT INTO sections VALUES (?, ?)",
+                               (HLevel(src=src, formatstr=".(1.1.1)"), src[1:-1]))
+
+        self.assertEqual( [str(row[0]) for row in
+                           connection.execute("SELECT level FROM sections ORDER BY level")],
+                          ["[1.1.1]", "[9]", "[9.2]", "[9.10]", "[10.1]"] )
+
+        self.assertEqual( [str(row[0]) for row in
+                           connection.execute("SELECT level FROM sections WHERE level > ? "
+                                              "ORDER BY level DESC",
+                                              (HLevel(src="(9.2)", formatstr=".(1.1.1)"),))],
+                          ["[10.1]", "[9.10]"] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # legacy TEXT column :
+        connection.execute("INSERT INTO sections VALUES (NULL, 'not a level')")
+        self.assertEqual( [row[0] for row in
+                           connection.execute("SELECT name FROM sections "
+                                              "ORDER BY name COLLATE HLEVEL")],
+                          ["1.1.1", "9", "9.2", "9.10", "10.1", "not a level"] )
+        connection.close()
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # different strings of the same level are never equal :
+        collate = make_collation()
+        strings = ("1", "A", "I", "a", "E", "V", "IIIII", "(1.2)", "1.2", "x", "y")
+        for src1 in strings:
+            for src2 in strings:
+                self.assertEqual( collate(src1, src2) == 0, src1 == src2 )
+                self.assertEqual( collate(src1, src2), -collate(src2, src1) )
+
+        connection = sqlite3.connect(":memory:")
+        register_sqlite(connection)
+        connection.execute("CREATE TABLE names (name TEXT)")
+        connection.executemany("INSERT INTO names VALUES (?)",
+                               [(src,) for src in strings + ("V",)])
+        self.assertEqual( len(connection.execute("SELECT DISTINCT name COLLATE HLEVEL "
+                                                 "FROM names").fetchall()), len(strings) )
+        self.assertEqual( connection.execute("SELECT COUNT(*) FROM names "
+                                             "WHERE name = 'V' COLLATE HLEVEL").fetchone(), (2,) )
+        self.assertEqual( [row[0] for row in
+                           connection.execute("SELECT name FROM names WHERE name < 'x' "
+                                              "ORDER BY name COLLATE HLEVEL")][:4],
+                          ["1", "A", "I", "a"] )
+        connection.close()
+
+################################################################################
+class TESTSortKey(unittest.TestCase):
+    """
+        class TESTSortKey
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_sortkey(self):
+        """
+                TESTSortKey.test_sortkey
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        rand = random.Random(0)
+        levels = [[], [0], [1], [1, 0], [1, -1], [-1], [-256], [-257], [255], [256],
+                  [2**70], [-2**70]]
+        for _ in range(1000):
+            levels.append([rand.choice((rand.randint(-300, 300),
+                                        rand.randint(-2**40, 2**40)))
+                           for _ in range(rand.randint(0, 4))])
+
+        self.assertEqual( sorted(levels, key=encode_sortkey), sorted(levels) )
+        for level in levels:
+            self.assertEqual( decode_sortkey(encode_sortkey(level)), level )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        low, high = subtree_bounds([1, 2])
+        self.assertTrue( low <= encode_sortkey([1, 2]) < high )
+        self.assertTrue( low <= encode_sortkey([1, 2, 99, 3]) < high )
+        self.assertFalse( low <= encode_sortkey([1, 3]) < high )
+        self.assertFalse( low <= encode_sortkey([1, 1, 99]) < high )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_packed_keys(self):
+        """
+                TESTSortKey.test_packed_keys
+        """
+        self.assertEqual( pack_level([1, 2]), 0x0203000000000000 )
+        self.assertEqual( pack_level([254]*8), 2**64 - 1 )
+        self.assertEqual( pack_level([]), 0 )
+        self.assertEqual( pack_level([3, 0, 1], bits=16), 0x0004000100020000 )
+        for values in ([255], [-1], [1]*9):
+            self.assertIsNone( pack_keys([[1], values]) )
+            with self.assertRaises(HLevelError):
+                pack_level(values)
+        self.assertIsNone( pack_keys([[1023]], bits=10) )
+        with self.assertRaises(HLevelError):
+            pack_level([1], bits=64)
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        rand = random.Random(0)
+        levels = [[], [0], [1, 0], [254]] + \
+                 [[rand.randint(0, 20) for _ in range(rand.randint(0, 6))] for _ in range(2000)]
+        levels.append(HLevel(src="(IV.2)", formatstr=".(I.1)"))
+        for bits in (8, 9, 10):
+            keys = pack_keys(levels, bits)
+            self.assertEqual( [unpack_level(key, bits) for key in keys], levels )
+            self.assertEqual( sort_levels(levels, bits), sorted(levels) )
+
+        # fallback :
+        levels.append([1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertIsNone( pack_keys(levels) )
+        self.assertEqual( sort_levels(levels), sorted(levels) )
+
+    #///////////////////////////////////////////////////////////////////////////
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_packed_array(self):
+        """
+                TESTSortKey.test_packed_array
+        """
+        levels = [[1, 2], [3], [], [1, 2, 1], HLevel(src="2.10", formatstr=".1.1")]
+        array = levels_to_array(levels)
+        self.assertEqual( array.tolist(), [[1, 2, -1], [3, -1, -1], [-1, -1, -1],
+                                           [1, 2, 1], [2, 10, -1]] )
+        self.assertEqual( levels_to_array(levels, depth=4).shape, (5, 4) )
+        with self.assertRaises(HLevelError):
+            levels_to_array(levels, depth=2)
+
+        keys = pack_array(array)
+        self.assertEqual( keys.dtype, numpy.uint64 )
+        self.assertEqual( keys.tolist(), pack_keys(levels) )
+        self.assertEqual( [row[:len(level)] for row, level in
+                           zip(unpack_array(keys).tolist(), levels)], levels )
+        self.assertEqual( [levels[index] for index in numpy.argsort(keys, kind="stable")],
+                          sorted(levels) )
+
+        # fallback :
+        self.assertIsNone( pack_array(levels_to_array([[1], [255]])) )
+        self.assertIsNone( pack_array(levels_to_array([[1], [-2]])) )
+        self.assertIsNone( pack_array(levels_to_array([[1]*9])) )
+        self.assertEqual( pack_array(levels_to_array([[1]], depth=12)).tolist(),
+                          [pack_level([1])] )
+        with self.assertRaises(HLevelError):
+            pack_array(numpy.array([[-1, 2]]))
+
+        rand = random.Random(0)
+        levels = [[rand.randint(0, 1000) for _ in range(rand.randint(0, 6))]
+                  for _ in range(2000)]
+        keys = pack_array(levels_to_array(levels), bits=10)
+        self.assertEqual( keys.tolist(), pack_keys(levels, bits=10) )
+        self.assertEqual( unpack_array(keys, bits=10).shape, (2000, 6) )
+
+################################################################################
+class TESTDiff(unittest.TestCase):
+    """
+        class TESTDiff
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_diff_levels(self):
+        """
+                TESTDiff.test_diff_levels
+        """
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # a section inserted at 2 : the following ones are renumbered.
+        old = [("1", "a"), ("2", "b"), ("3", "c"), ("4", "d"), ("5", "e")]
+        new = {"1" : "a", "2" : "x", "3" : "b", "4" : "c", "5" : "E", "6" : "f"}
+
+        res = sorted((edit.operation,
+                      None if edit.old_level is None else str(edit.old_level),
+                      None if edit.new_level is None else str(edit.new_level))
+                     for edit in diff_levels(old, new, formatstr=".1.1"))
+        self.assertEqual( res,
+                          [("added", None, "2"),
+                           ("added", None, "6"),
+                           ("changed", "5", "5"),
+                           ("removed", "4", None),
+                           ("renumbered", "2", "3"),
+                           ("renumbered", "3", "4")] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # without any text :
+        res = [(edit.operation, edit.old_level, edit.new_level)
+               for edit in diff_levels(["1", "1.1", "2"],
+                                       (HLevel(src=src, formatstr=".(1.1)")
+                                        for src in ("(1)", "(1.2)", "(2)", "(3)")),
+                                       include_equal=True)]
+        self.assertEqual( res,
+                          [("equal", [1], [1]),
+                           ("removed", [1, 1], None),
+                           ("added", None, [1, 2]),
+                           ("equal", [2], [2]),
+                           ("added", None, [3])] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # window=0 : no renumbering
+        res = [edit.operation
+               for edit in diff_levels([("1", "a"), ("2", "b")],
+                                       [("1", "b"), ("2", "c")],
+                                       formatstr=".1", window=0)]
+        self.assertEqual( res, ["changed", "changed"] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # long outlines, read from generators :
+        old = (("{0}.{1}".format(i, j), "text {0}".format(i*100+j))
+               for i in range(1, 200) for j in range(1, 50))
+        new = (("{0}.{1}".format(i, j if i != 100 else j+1), "text {0}".format(i*100+j))
+               for i in range(1, 200) for j in range(1, 50))
+        res = collections.Counter(edit.operation
+                                  for edit in diff_levels(old, new, formatstr=".1.1"))
+        self.assertEqual( res, {"renumbered" : 49} )
+
+        with self.assertRaises(Exception):
+            list(diff_levels(["2", "1"], [], formatstr=".1"))
+
+################################################################################
+class TESTNumberFormat(unittest.TestCase):
+    """
+        TESTNumberFormat class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_builtin_formats(self):
+        """
+                TESTNumberFormat.test_builtin_formats
+        """
+        for symbol in HLevel.reprnum:
+            number_format = numberformat.get_format(symbol)
+            first_value = 21 if symbol == "㉑" else 1
+            last_value = first_value + 19 if number_format.rule == "enumerated" else 3000
+            for value in range(first_value, last_value+1):
+                strnumber = number_format.render(value)
+                self.assertEqual( number_format.parse(strnumber), value )
+
+                hlevel = HLevel(formatstr="."+symbol)
+                self.assertEqual( hlevel.tokenizeStr(strnumber)[0], [value] )
+
+        self.assertEqual( numberformat.get_format("I").render(1994), "MCMXCIV" )
+        self.assertEqual( numberformat.get_format("一").render(2020), "二千二十" )
+        self.assertEqual( numberformat.get_format("¹").render(-42), "-⁴²" )
+        self.assertEqual( numberformat.get_format("a").render(27), "aa" )
+
+        with self.assertRaises(Exception):
+            numberformat.get_format("?")
+        with self.assertRaises(Exception):
+            numberformat.get_format("①").render(21)
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # formats added to the built-in ones :
+        hlevel = HLevel(src="(१२.٣٤.㉑.㊿)", formatstr=".(१.١.㉑.㉑)")
+        self.assertEqual( hlevel, [12, 34, 21, 50] )
+        self.assertEqual( str(hlevel), "(१२.٣٤.㉑.㊿)" )
+        self.assertEqual( HLevel.detect("(१२.٣٤.㉑)"), ".(१.١.㉑)" )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_register_format(self):
+        """
+                TESTNumberFormat.test_register_format
+        """
+        numberformat.register_format(numberformat.NumberFormat(symbol="๑",
+                                                               symbols="๐๑๒๓๔๕๖๗๘๙",
+                                                               rule="positional",
+                                                               name="Thai digits"),
+                                     replace=True)
+
+        self.assertIn( "๑", HLevel.reprnum )
+        self.assertIn( "๒", HLevel.invalid_chars_in_pre_suffix )
+
+        hlevel = HLevel(src="[๑๒.IV]", formatstr=".[๑.I]")
+        self.assertEqual( hlevel, [12, 4] )
+        hlevel.append(5)
+        hlevel.numbers_format.append("๑")
+        self.assertEqual( hlevel.getRepr(), "[๑๒.IV.๕]" )
+
+        self.assertEqual( HLevel.detect("[๑๒.๓]"), ".[๑.๑]" )
+        self.assertEqual( HLevel(formatstr=".[๑.๑]").findHLevelStringFromAString("a [๑.๒] b"),
+                          (True, 2, "[๑.๒]") )
+
+        with self.assertRaises(Exception):
+            numberformat.register_format(numberformat.NumberFormat(symbol="๑",
+                                                                   symbols="๐๑",
+                                                                   rule="positional"))
+        with self.assertRaises(Exception):
+            numberformat.NumberFormat(symbol="x", symbols="abc", rule="positional")
+        with self.assertRaises(Exception):
+            numberformat.NumberFormat(symbol="a", symbols="abc", rule="unknown")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_translate(self):
+        """
+                TESTNumberFormat.test_translate
+        """
+        superscript = numberformat.get_format("¹")
+        subscript = numberformat.get_format("₁")
+        fullwidth = numberformat.get_format("１")
+
+        self.assertEqual( superscript.render(-1024), "-¹⁰²⁴" )
+        self.assertEqual( superscript.parse("-¹⁰²⁴"), -1024 )
+        self.assertEqual( subscript.render(1789), "₁₇₈₉" )
+        self.assertEqual( subscript.parse("₁₇₈₉"), 1789 )
+        self.assertEqual( fullwidth.render(2025), "２０２５" )
+        self.assertEqual( fullwidth.parse("２０２５"), 2025 )
+
+        # int() would accept these strings once translated :
+        for src in ("¹2", "¹ ", " ¹", "¹_²", "", "-", "¹-²", "-²"):
+            with self.assertRaises(Exception):
+                fullwidth.parse(src)
+        for src in ("¹2", "¹ ", "¹_²", "", "-", "¹-²", "¹\n²"):
+            with self.assertRaises(Exception):
+                superscript.parse(src)
+
+        # batch variants :
+        numbers = list(range(-20, 300))
+        strnumbers = superscript.renderMany(numbers)
+        self.assertEqual( strnumbers, [superscript.render(number) for number in numbers] )
+        self.assertEqual( superscript.parseMany(strnumbers), numbers )
+        self.assertEqual( superscript.renderMany([]), [] )
+        self.assertEqual( superscript.parseMany([]), [] )
+        self.assertEqual( numberformat.get_format("A").renderMany([1, 27]), ["A", "AA"] )
+        self.assertEqual( numberformat.get_format("A").parseMany(["A", "AA"]), [1, 27] )
+
+        for strnumbers in (["¹", "2"], ["¹", ""], ["¹\n²"], ["¹", "²-"]):
+            with self.assertRaises(Exception):
+                superscript.parseMany(strnumbers)
+
+################################################################################
+class TESTScanner(unittest.TestCase):
+    """
+        TESTScanner class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_finditer(self):
+        """
+                TESTScanner.test_finditer
+        """
+        scanner = MultiFormatScanner((".(A.I.1)", ".§1.a", ".1.1.1"))
+        text = "see (B.IV.2) and §3.b, 1.2.3 (C) or §4"
+        res = [(match.start, match.end, match.formatstr, match.hlevel)
+               for match in scanner.finditer(text)]
+        self.assertEqual( res,
+                          [(4, 12, ".(A.I.1)", [2, 4, 2]),
+                           (17, 21, ".§1.a", [3, 2]),
+                           (23, 28, ".1.1.1", [1, 2, 3]),
+                           (29, 32, ".(A.I.1)", [3]),
+                           (36, 38, ".§1.a", [4])] )
+        for start, end, formatstr, hlevel in res:
+            self.assertEqual( str(hlevel), text[start:end] )
+            self.assertEqual( hlevel.getFormatStr(), formatstr )
+
+        self.assertEqual( scanner.search(text, 12).hlevel, [3, 2] )
+        self.assertEqual( len(scanner.findall(text, 0, 22)), 2 )
+        self.assertEqual( scanner.search("nothing"), None )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # same result as one search per format, for levels which don't overlap :
+        rand = random.Random(0)
+        formatstrs = (".(A.I.1)", ".{1.1}", ".[i.1]", ".<一.a>")
+        words = []
+        for _ in range(2000):
+            hlevel = HLevel(formatstr=rand.choice(formatstrs))
+            hlevel.extend(rand.randint(1, 30) for _ in range(rand.randint(1, 2)))
+            words.append(str(hlevel) if rand.random() < 0.3 else "word")
+        text = " ".join(words)
+
+        expected = []
+        for formatstr in formatstrs:
+            regex = re.compile(HLevel(formatstr=formatstr).getSearchPattern())
+            expected.extend((match.start(), formatstr) for match in regex.finditer(text))
+        self.assertEqual( [(match.start, match.formatstr)
+                           for match in MultiFormatScanner(formatstrs).finditer(text)],
+                          sorted(expected) )
+
+        # a string matching the pattern but which can't be read is skipped :
+        self.assertEqual( MultiFormatScanner([".<一>"]).findall("<二二> <二>")[0].start, 5 )
+
+################################################################################
+class TESTHeadingIndex(unittest.TestCase):
+    """
+        TESTHeadingIndex class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_index(self):
+        """
+                TESTHeadingIndex.test_index
+        """
+        lines = ["Foreword",
+                 "II Second part",
+                 "II.2 Penalties",
+                 "I First part",
+                 "I.1.a Scope, see II.2",
+                 "I.10 Tenth section\r",
+                 "I.2 Definitions",
+                 "I.x is not a heading",
+                 "I.2",
+                 "I.2 Definitions again"]
+        document = "\n".join(lines).encode("utf-8")
+
+        self.assertEqual( [(values, document[offset:offset+length].decode("utf-8"))
+                           for values, offset, length in iter_headings(document, ".I.1.a")],
+                          [([2], "II Second part"),
+                           ([2, 2], "II.2 Penalties"),
+                           ([1], "I First part"),
+                           ([1, 1, 1], "I.1.a Scope, see II.2"),
+                           ([1, 10], "I.10 Tenth section"),
+                           ([1, 2], "I.2 Definitions"),
+                           ([1, 2], "I.2"),
+                           ([1, 2], "I.2 Definitions again")] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with open(path, "wb") as document_file:
+                document_file.write(document)
+            self.assertEqual( build_index(path, formatstr=".I.1.a"), 8 )
+
+            with HeadingIndex(path + ".hli") as index:
+                self.assertEqual( len(index), 8 )
+                self.assertEqual( index.formatstr, ".I.1.a" )
+                self.assertEqual( [values for values, _, _ in index],
+                                  [[1], [1, 1, 1], [1, 2], [1, 2], [1, 2], [1, 10], [2], [2, 2]] )
+
+                self.assertEqual( index.heading("I.10"), "I.10 Tenth section" )
+                self.assertEqual( index.heading([2, 2]), "II.2 Penalties" )
+                self.assertEqual( index.heading(HLevel.fromValues([1], ".I.1.a")),
+                                  "I First part" )
+                self.assertEqual( index.heading("III"), None )
+                self.assertEqual( index.seek("IV"), None )
+
+                offset = index.seek("I.2")
+                self.assertEqual( offset, document.index(b"I.2 Definitions") )
+                self.assertEqual( index.document.read(3), b"I.2" )
+                self.assertEqual( [document[offset:offset+length]
+                                   for offset, length in index.lookup("I.2")],
+                                  [b"I.2 Definitions", b"I.2", b"I.2 Definitions again"] )
+
+                self.assertEqual( [values for values, _, _ in index.subtree("I")],
+                                  [[1], [1, 1, 1], [1, 2], [1, 2], [1, 2], [1, 10]] )
+                self.assertEqual( [values for values, _, _ in index.subtree("I.2")],
+                                  [[1, 2]]*3 )
+                self.assertEqual( list(index.subtree("I.3")), [] )
+
+            # the key size is too small :
+            with self.assertRaises(HLevelError):
+                build_index(path, formatstr=".I.1.a", key_size=4)
+
+            # the document has been modified :
+            with open(path, "ab") as document_file:
+                document_file.write(b"\nIII Third part")
+            with HeadingIndex(path + ".hli") as index:
+                with self.assertRaises(HLevelError):
+                    index.seek("I")
+
+            # not an index file :
+            with self.assertRaises(HLevelError):
+                HeadingIndex(path)
+        finally:
+            os.remove(path)
+            os.remove(path + ".hli")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_update(self):
+        """
+                TESTHeadingIndex.test_update
+        """
+        def rescan(document):
+            """
+                rescan : what a full rescan of <document> finds, sorted by level
+            """
+            return sorted(iter_headings(document, ".I.1"),
+                          key=lambda heading: (heading[0], heading[1]))
+
+        rand = random.Random(0)
+        pieces = ["I", "II.3", "IV.12", "x", "I.2.", " ", " title", "\n", "\n", "\n", "é"]
+        document = "".join(rand.choice(pieces) for _ in range(600)).encode("utf-8")
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with open(path, "wb") as document_file:
+                document_file.write(document)
+            build_index(path, formatstr=".I.1")
+
+            with HeadingIndex(path + ".hli") as index:
+                for edit_number in range(300):
+                    start = rand.randint(0, len(document))
+                    old_length = rand.randint(0, min(8, len(document)-start))
+                    new_text = "".join(rand.choice(pieces)
+                                       for _ in range(rand.randint(0, 3))).encode("utf-8")
+                    document = document[:start] + new_text + document[start+old_length:]
+                    with open(path, "wb") as document_file:
+                        document_file.write(document)
+
+                    index.update(start, old_length, new_text)
+                    expected = rescan(document)
+                    self.assertEqual( list(index), expected )
+                    self.assertEqual( len(index), len(expected) )
+                    self.assertEqual( index.lookup([2, 3]),
+                                      [heading[1:] for heading in expected
+                                       if heading[0] == [2, 3]] )
+                    self.assertEqual( list(index.subtree("IV")),
+                                      [heading for heading in expected if heading[0][0] == 4] )
+
+                    if edit_number % 50 == 49:
+                        index.compact()
+                        self.assertEqual( list(index), expected )
+                        self.assertEqual( len(index), len(expected) )
+
+                # the edit isn't in the document :
+                with self.assertRaises(HLevelError):
+                    index.update(0, 0, "not in the document")
+                with self.assertRaises(HLevelError):
+                    index.update(0, 3, "zzz")
+                self.assertEqual( list(index), rescan(document) )
+                index.compact()
+
+            with HeadingIndex(path + ".hli") as index:
+                self.assertEqual( list(index), rescan(document) )
+        finally:
+            os.remove(path)
+            os.remove(path + ".hli")
+
+################################################################################
+class TESTCompare(unittest.TestCase):
+    """
+        TESTCompare class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_compare_strings(self):
+        """
+                TESTCompare.test_compare_strings
+        """
+        self.assertEqual( compare_strings("1.2.10", "1.2.9", ".1.1.1"), 1 )
+        self.assertEqual( compare_strings("1.2", "1.2.1", ".1.1.1"), -1 )
+        self.assertEqual( compare_strings("(IX.b)", "(X.a)", ".(I.a)"), -1 )
+        self.assertEqual( compare_strings("(IX.b)", "(IX.b)", ".(I.a)"), 0 )
+        self.assertEqual( compare_strings("¹.-²", "¹.-¹⁰", ".¹.¹"), 1 )
+        self.assertEqual( compare_strings("1.007", "1.10", ".1.1"), -1 )
+        self.assertEqual( compare_strings("1.2", "1.3.#", ".1.1.1"), -1 )
+
+        for src1, src2, formatstr in (("1.2", "(1.3)", ".(1.1)"),
+                                      ("(1.2", "(1.3)", ".(1.1)"),
+                                      ("1.#", "1.2", ".1.1"),
+                                      ("1..2", "1.1.2", ".1.1.1"),
+                                      ("1.2.3", "1.2.4", ".1.1")):
+            with self.assertRaises(ParseError):
+                compare_strings(src1, src2, formatstr)
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # same result as HLevel objects :
+        rand = random.Random(0)
+        for formatstr, first_number, maximum in ((".1.1.1.1", 1, 120),
+                                                 (".(I.A.a.i)", 1, 60),
+                                                 (".¹.₁.一.①", 1, 20),
+                                                 ("|<α|Α|a>", 0, 800),
+                                                 (".१.㉑.١", 1, 30)):
+            hlevels = []
+            for _ in range(300):
+                hlevel = HLevel(formatstr=formatstr, first_number=first_number)
+                if hlevels and rand.random() < 0.5:
+                    hlevel.extend(rand.choice(hlevels)[:rand.randint(0, 3)])
+                while len(hlevel) < len(hlevel.numbers_format) and rand.random() < 0.8:
+                    if formatstr == ".१.㉑.١" and len(hlevel) == 1:
+                        hlevel.append(rand.randint(21, 50))
+                    else:
+                        hlevel.append(rand.randint(first_number, maximum))
+                hlevels.append(hlevel)
+
+            strings = [str(hlevel) for hlevel in hlevels]
+            for hlevel1, src1 in zip(hlevels, strings):
+                hlevel2 = rand.choice(hlevels)
+                self.assertEqual( compare_strings(src1, str(hlevel2), formatstr, first_number),
+                                  (hlevel1 > hlevel2) - (hlevel1 < hlevel2) )
+            self.assertEqual( sorted(strings, key=string_key(formatstr, first_number)),
+                              [str(hlevel) for hlevel in sorted(hlevels)] )
+
+################################################################################
+class TESTLevelNode(unittest.TestCase):
+    """
+        TESTLevelNode class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_node(self):
+        """
+                TESTLevelNode.test_node
+        """
+        tree = LevelTree()
+        hlevel = HLevel(src="IV.3.b", formatstr=".I.1.a")
+        node = tree.node(hlevel)
+
+        self.assertEqual( node.values(), (4, 3, 2) )
+        self.assertEqual( list(node), [4, 3, 2] )
+        self.assertEqual( (node.depth, len(node), node.value), (3, 3, 2) )
+        self.assertIs( node, tree.node([4, 3, 2]) )
+        self.assertIs( node.parent(), tree.node([4, 3]) )
+        self.assertIs( node.parent().child(2), node )
+        self.assertEqual( [ancestor.values() for ancestor in node.ancestors()],
+                          [(4, 3), (4,)] )
+        self.assertIs( tree.node([4]).parent(), tree.root )
+        self.assertEqual( tree.root.parent(), None )
+        self.assertEqual( tree.root.values(), () )
+        self.assertEqual( list(tree.root.ancestors()), [] )
+
+        self.assertEqual( str(node.toHLevel(".I.1.a")), "IV.3.b" )
+        self.assertEqual( node.toHLevel(".I.1.a"), hlevel )
+        self.assertEqual( repr(node), "(LevelNode) 4.3.2" )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # equality, hash and order : like the HLevel objects
+        self.assertTrue( node == hlevel and hlevel == node and not node != hlevel )
+        self.assertTrue( node == LevelTree().node([4, 3, 2]) )
+        self.assertEqual( hash(node), hash(LevelTree().node([4, 3, 2])) )
+        self.assertTrue( node != tree.node([4, 3]) )
+        self.assertFalse( node == (4, 3, 2) )
+
+        rand = random.Random(0)
+        hlevels = [HLevel.fromValues([rand.randint(1, 3) for _ in range(rand.randint(0, 4))])
+                   for _ in range(200)]
+        nodes = [tree.node(hlevel) for hlevel in hlevels]
+        self.assertEqual( [node.values() for node in sorted(nodes)],
+                          [tuple(hlevel) for hlevel in sorted(hlevels)] )
+        for node1, hlevel1 in zip(nodes, hlevels):
+            node2 = rand.choice(nodes)
+            hlevel2 = HLevel.fromValues(node2.values())
+            for operator in ("__lt__", "__le__", "__eq__", "__ne__", "__gt__", "__ge__"):
+                expected = getattr(hlevel1, operator)(hlevel2)
+                self.assertEqual( getattr(node1, operator)(node2), expected )
+                self.assertEqual( getattr(node1, operator)(hlevel2), expected )
+            self.assertEqual( hlevel1 < node2, hlevel1 < hlevel2 )
+            self.assertEqual( node1 is node2, hlevel1 == hlevel2 )
+        self.assertEqual( len(set(nodes)), len(set(tuple(hlevel) for hlevel in hlevels)) )
+
+        with self.assertRaises(TypeError):
+            node < (4, 3)
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # LevelNode objects, the children being interned in a list then in a dict :
+        root = LevelNode(None, None)
+        self.assertEqual( (root.depth, root.parent(), root.children), (0, None, None) )
+        first = root.child(1)
+        self.assertEqual( (first.depth, first.value, first.values()), (1, 1, (1,)) )
+        self.assertIs( first.parent(), root )
+        self.assertEqual( first, LevelNode(root, 1) )
+
+        children = [first.child(value)
+                    for value in range(1, LevelNode.max_listed_children + 1)]
+        self.assertIsInstance( first.children, list )
+        self.assertEqual( [first.child(value) is child for value, child in
+                           enumerate(children, 1)], [True] * len(children) )
+        children.append(first.child(LevelNode.max_listed_children + 1))
+        self.assertIsInstance( first.children, dict )
+        self.assertEqual( [first.child(value) is child for value, child in
+                           enumerate(children, 1)], [True] * len(children) )
+        self.assertTrue( all(child.parent() is first for child in children) )
+        self.assertEqual( children[-1].values(), (1, LevelNode.max_listed_children + 1) )
+
+################################################################################
+class TESTOutline(unittest.TestCase):
+    """
+        TESTOutline class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_events(self):
+        """
+                TESTOutline.test_events
+        """
+        lines = ["Foreword\n",
+                 "I First part\n",
+                 "I.1 Scope\n",
+                 "text of I.1\n",
+                 "I.2 Definitions\r\n",
+                 "II Second part\n",
+                 "II.1.a Skipped level\n",
+                 "II.3 Skipped number\n",
+                 "II.2 Out of order\n",
+                 "II.2.a\n"]
+        events = [(event.kind, str(event.hlevel) if event.hlevel is not None else None,
+                   event.line_number, event.data)
+                  for event in outline.OutlineBuilder(".I.1.a").iterEvents(lines)]
+        self.assertEqual( events,
+                          [("open", "I", 2, "I First part"),
+                           ("open", "I.1", 3, "I.1 Scope"),
+                           ("close", "I.1", 5, None),
+                           ("open", "I.2", 5, "I.2 Definitions"),
+                           ("close", "I.2", 6, None),
+                           ("close", "I", 6, None),
+                           ("open", "II", 6, "II Second part"),
+                           ("anomaly", "II.1.a", 7, outline.SKIPPED_LEVEL),
+                           ("open", "II.1", 7, None),
+                           ("open", "II.1.a", 7, "II.1.a Skipped level"),
+                           ("close", "II.1.a", 8, None),
+                           ("close", "II.1", 8, None),
+                           ("anomaly", "II.3", 8, outline.SKIPPED_NUMBER),
+                           ("open", "II.3", 8, "II.3 Skipped number"),
+                           ("close", "II.3", 9, None),
+                           ("anomaly", "II.2", 9, outline.OUT_OF_ORDER),
+                           ("open", "II.2", 9, "II.2 Out of order"),
+                           ("open", "II.2.a", 10, "II.2.a"),
+                           ("close", "II.2.a", 11, None),
+                           ("close", "II.2", 11, None),
+                           ("close", "II", 11, None)] )
+
+        # the numbers of the missing sections :
+        events = [(event.kind, str(event.hlevel), event.data)
+                  for event in outline.OutlineBuilder(".I.1.a").iterEvents(["I\n", "II\n",
+                                                                            "I.3.a\n",
+                                                                            "V.1.c\n"])]
+        self.assertEqual( events,
+                          [("open", "I", "I"),
+                           ("close", "I", None),
+                           ("open", "II", "II"),
+                           ("close", "II", None),
+                           ("anomaly", "I.3.a", outline.SKIPPED_LEVEL),
+                           ("anomaly", "I.3.a", outline.OUT_OF_ORDER),
+                           ("anomaly", "I.3.a", outline.SKIPPED_NUMBER),
+                           ("open", "I", None),
+                           ("open", "I.3", None),
+                           ("open", "I.3.a", "I.3.a"),
+                           ("close", "I.3.a", None),
+                           ("close", "I.3", None),
+                           ("close", "I", None),
+                           ("anomaly", "V.1.c", outline.SKIPPED_LEVEL),
+                           ("anomaly", "V.1.c", outline.SKIPPED_NUMBER),
+                           ("anomaly", "V.1.c", outline.SKIPPED_NUMBER),
+                           ("open", "V", None),
+                           ("open", "V.1", None),
+                           ("open", "V.1.c", "V.1.c"),
+                           ("close", "V.1.c", None),
+                           ("close", "V.1", None),
+                           ("close", "V", None)] )
+
+        events = list(outline.OutlineBuilder(".I.1.a", text=True).iterEvents(lines))
+        self.assertEqual( [(event.line_number, event.data) for event in events
+                           if event.kind == outline.TEXT],
+                          [(1, "Foreword\n"), (4, "text of I.1\n")] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        root = outline.build_tree(outline.OutlineBuilder(".I.1.a").iterEvents(lines))
+        self.assertEqual( [(str(section.hlevel), section.heading, section.start, section.end)
+                           for section in root.walk()][1:6],
+                          [("I", "I First part", 2, 6),
+                           ("I.1", "I.1 Scope", 3, 5),
+                           ("I.2", "I.2 Definitions", 5, 6),
+                           ("II", "II Second part", 6, 11),
+                           ("II.1", None, 7, 8)] )
+        self.assertEqual( [len(section.children) for section in root.children], [2, 3] )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # headings found by a scanner; constant memory on a long document :
+        builder = outline.OutlineBuilder(".1.1")
+        text = "see 1, 1.1 and 1.2 then 2"
+        kinds = [event.kind
+                 for match in MultiFormatScanner([".1.1"]).finditer(text)
+                 for event in builder.feedHeading(match.hlevel, match.start)]
+        kinds.extend(event.kind for event in builder.close())
+        self.assertEqual( kinds, ["open", "open", "close", "open", "close", "close",
+                                  "open", "close"] )
+
+        def long_document():
+            """
+                long_document : 10000 sections
+            """
+            for part in range(1, 101):
+                yield "{0} part\n".format(part)
+                for section in range(1, 101):
+                    yield "{0}.{1} section\ntext\n".format(part, section)
+        builder = outline.OutlineBuilder(".1.1")
+        number_of_events = 0
+        for event in builder.iterEvents(long_document()):
+            self.assertTrue( len(builder.stack) <= 3 )
+            self.assertNotEqual( event.kind, outline.ANOMALY )
+            number_of_events += 1
+        self.assertEqual( number_of_events, 2*(100 + 100*100) )
+
+################################################################################
+class TESTCorpus(unittest.TestCase):
+    """
+        TESTCorpus class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_corpus(self):
+        """
+                TESTCorpus.test_corpus
+        """
+        self.assertEqual( corpus.make_formatstr("I", 3, prefix="(", suffix=")"), ".(I.I.I)" )
+        self.assertEqual( corpus.make_formatstr("I1a", 2, separator="-"), "-I-1" )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # the same seed, the same corpus :
+        formatstr = corpus.make_formatstr("I", 4, prefix="§")
+        self.assertEqual( list(corpus.iter_document(formatstr, 10000, seed=3, noise=0.1)),
+                          list(corpus.iter_document(formatstr, 10000, seed=3, noise=0.1)) )
+        self.assertNotEqual( list(corpus.iter_references(formatstr, 100, seed=3)),
+                             list(corpus.iter_references(formatstr, 100, seed=4)) )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        levels = list(corpus.iter_levels(5000, max_depth=3, fanout=4, seed=1))
+        self.assertEqual( len(levels), 5000 )
+        self.assertTrue( all(1 <= len(level) <= 3 and max(level) <= 4 for level in levels) )
+
+        # without noise, all the strings are valid, even with the enumerated formats :
+        for symbol in corpus.CLASSIC_SYMBOLS:
+            formatstr = corpus.make_formatstr(symbol, 3)
+            for src in corpus.iter_references(formatstr, 500, fanout=None):
+                self.assertIsNotNone( HLevel.try_parse(src, formatstr) )
+
+            # heading lines : "<level> <Title>" :
+            headings = [line.split(" ")[0]
+                        for line in corpus.iter_document(formatstr, 20000, seed=2)
+                        if line.count(" ") == 1 and line.split(" ")[1][0].isupper()]
+            self.assertTrue( headings )
+            for src in headings:
+                self.assertIsNotNone( HLevel.try_parse(src, formatstr) )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        references = list(corpus.iter_references(".1.1", 1000, noise=0.5, seed=5))
+        invalid = [src for src in references if HLevel.try_parse(src, ".1.1") is None]
+        self.assertTrue( 200 < len(invalid) < 500 )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "document.txt")
+            size = corpus.write_document(path, ".I.1", 50000, seed=1)
+            self.assertEqual( size, os.path.getsize(path) )
+            with open(path, encoding="utf-8") as document:
+                self.assertEqual( document.read(),
+                                  "".join(corpus.iter_document(".I.1", 50000, seed=1)) )
+
+################################################################################
+class TESTExternalSort(unittest.TestCase):
+    """
+        TESTExternalSort class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_external_sorter(self):
+        """
+                TESTExternalSort.test_external_sorter
+        """
+        formatstr = ".(I.1.a)"
+        lines = ["{0}\t{1}".format(src, line_number)
+                 for line_number, src in enumerate(corpus.iter_references(formatstr, 5000,
+                                                                          noise=0.05, seed=3))]
+        # stable sort :
+        expected = sorted((line for line in lines
+                           if HLevel.is_valid(line.split("\t")[0], formatstr)),
+                          key=lambda line: HLevel(line.split("\t")[0], formatstr))
+
+        # in memory, several runs, several passes (fan_in=3) :
+        for memory_limit, fan_in, runs in ((10**9, 128, 0),
+                                           (20000, 128, 2),
+                                           (20000, 3, 2)):
+            rejects = io.StringIO()
+            with ExternalSorter(formatstr, delimiter="\t", memory_limit=memory_limit,
+                                fan_in=fan_in, rejects=rejects) as sorter:
+                sorter.feed(line + "\n" for line in lines)
+                self.assertEqual( list(sorter.iterSorted()), expected )
+                self.assertIsNone( sorter.directory )
+                stats = sorter.getStats()
+            self.assertEqual( stats.lines, len(lines) )
+            self.assertEqual( stats.invalid, len(lines) - len(expected) )
+            self.assertEqual( len(rejects.getvalue().splitlines()), stats.invalid )
+            self.assertGreaterEqual( stats.runs, runs )
+            self.assertEqual( stats.bytes_read, stats.bytes_written )
+
+        self.assertEqual( list(ExternalSorter().iterSorted()), [] )
+        with ExternalSorter(".1.1", memory_limit=1) as sorter:
+            sorter.feed(["10\n", "9\r\n", "9.1", "x"])
+            self.assertEqual( list(sorter.iterLevels()), [[9], [9, 1], [10]] )
+        with self.assertRaises(FormatError):
+            ExternalSorter("")
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_sort_file(self):
+        """
+                TESTExternalSort.test_sort_file
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            src_path = os.path.join(directory, "levels.txt")
+            with open(src_path, "w", encoding="utf-8") as src:
+                src.write("II.b Title 1\nI Title 2\n?\nII.a Title 3\nI Title 4\n")
+
+            dest_path = os.path.join(directory, "sorted.txt")
+            rejects_path = os.path.join(directory, "rejects.txt")
+            stats = sort_file(src_path, dest_path, ".I.a", delimiter=" ", memory_limit=1,
+                              fan_in=2, tmpdir=directory, rejects_path=rejects_path)
+            self.assertEqual( stats[:3], (5, 1, 6) )     # 4 runs, then 2 runs (fan_in=2)
+            with open(dest_path, encoding="utf-8") as dest:
+                self.assertEqual( dest.read(),
+                                  "I Title 2\nI Title 4\nII.a Title 3\nII.b Title 1\n" )
+            with open(rejects_path, encoding="utf-8") as rejects:
+                self.assertEqual( rejects.read(), "?\n" )
+            # the temporary files have been removed :
+            self.assertEqual( sorted(os.listdir(directory)),
+                              ["levels.txt", "rejects.txt", "sorted.txt"] )
+
+            dest_path = os.path.join(directory, "sorted.bin")
+            sort_file(src_path, dest_path, ".I.a", binary=True, delimiter=" ")
+            self.assertEqual( [str(hlevel)
+                               for hlevel in serialization.iter_levels_from_path(dest_path)],
+                              ["I", "I", "II.a", "II.b"] )
+
+################################################################################
+class TESTMerge(unittest.TestCase):
+    """
+        TESTMerge class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_merge_levels(self):
+        """
+                TESTMerge.test_merge_levels
+        """
+        streams = (["1.1", "1.2", "1.2", "3"],
+                   ["(A)", "(A.II)", "(C.I)"],
+                   [HLevel("1.2", ".1.1"), FrozenHLevel([2]), HLevel("4", ".1.1")],
+                   [],
+                   ["1.3", "b)"])
+        formats = (".1.1", ".(A.I)", None, ".1", None)
+        res = list(merge_levels(streams, formats, with_stream=True))
+        self.assertEqual( [(list(level), index) for level, index in res],
+                          [([1], 1), ([1, 1], 0), ([1, 2], 0), ([1, 2], 0), ([1, 2], 1),
+                           ([1, 2], 2), ([1, 3], 4), ([2], 2), ([2], 4), ([3], 0), ([3, 1], 1),
+                           ([4], 2)] )
+        self.assertEqual( [str(level) for level, _ in res],
+                          ["(A)", "1.1", "1.2", "1.2", "(A.II)", "1.2", "1.3", "(2)", "b)", "3",
+                           "(C.I)", "4"] )
+        # the HLevel and FrozenHLevel objects are yielded as is :
+        self.assertIs( res[5][0], streams[2][0] )
+        self.assertIs( res[7][0], streams[2][1] )
+
+        self.assertEqual( [list(level) for level in merge_levels(streams, formats, dedup=True)],
+                          [[1], [1, 1], [1, 2], [1, 3], [2], [3], [3, 1], [4]] )
+        self.assertEqual( list(merge_levels([])), [] )
+        self.assertEqual( list(merge_levels([iter(["IV", "X"])], ".I")), [[4], [10]] )
+
+        with self.assertRaises(HLevelError):
+            list(merge_levels((["1", "2"], ["3", "2"]), ".1"))
+        with self.assertRaises(HLevelError):
+            merge_levels((["1"], ["2"]), (".1",)).__next__()
+        with self.assertRaises(ParseError):
+            list(merge_levels((["1", "2"], ["x"]), ".1"))
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # a stable merge, the same as sorted() :
+        formats = (".1.1.1.1.1.1", ".(A.I.1.a.1.1)", ".I.I.I.I.I.I")
+        shards = [sorted(corpus.iter_levels(300, seed=index, fanout=5)) for index in range(7)]
+        streams = [[HLevel.fromValues(level, formats[index % 3]).getRepr() for level in shard]
+                   for index, shard in enumerate(shards)]
+        expected = sorted((level, index) for index, shard in enumerate(shards) for level in shard)
+        self.assertEqual( [(list(level), index)
+                           for level, index in merge_levels(streams,
+                                                            [formats[index % 3]
+                                                             for index in range(7)],
+                                                            with_stream=True)],
+                          expected )
+
+################################################################################
+class TESTRollup(unittest.TestCase):
+    """
+        TESTRollup class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_iter_rollup(self):
+        """
+                TESTRollup.test_iter_rollup
+        """
+        pairs = [("I", 1), ("I.1", 2), ("I.1", 3), ("I.3", 4), ("II.2", 5), ("III", 6)]
+        res = list(rollup.iter_rollup(pairs, rollup.SUM, formatstr=".I.1", include_root=True))
+        # the children before their parent :
+        self.assertEqual( res, [((1, 1), 5), ((1, 3), 4), ((1,), 10), ((2, 2), 5), ((2,), 5),
+                                ((3,), 6), ((), 21)] )
+        self.assertEqual( list(rollup.iter_rollup(pairs, rollup.COUNT, ".I.1"))[:3],
+                          [((1, 1), 2), ((1, 3), 1), ((1,), 4)] )
+        self.assertEqual( dict(rollup.iter_rollup(pairs, rollup.MIN, ".I.1"))[(1,)], 1 )
+        self.assertEqual( dict(rollup.iter_rollup(pairs, rollup.MAX, ".I.1"))[(1,)], 4 )
+        self.assertEqual( list(rollup.iter_rollup([(HLevel("1.2", ".1.1"), 3), ([1, 2, 1], 4)],
+                                                  rollup.COUNT_SUM)),
+                          [((1, 2, 1), (1, 4)), ((1, 2), (2, 7)), ((1,), (2, 7))] )
+        mean = rollup.Reducer(rollup.COUNT_SUM.initial, rollup.COUNT_SUM.add,
+                              rollup.COUNT_SUM.merge, lambda acc: acc[1] / acc[0])
+        self.assertEqual( list(rollup.iter_rollup([([1], 1), ([1], 2)], mean)),
+                          [((1,), 1.5)] )
+        self.assertEqual( list(rollup.iter_rollup([], include_root=True)), [((), 0)] )
+
+        with self.assertRaises(HLevelError):
+            list(rollup.iter_rollup([([1, 2], 0), ([1], 0)]))
+        with self.assertRaises(ParseError):
+            list(rollup.iter_rollup([("1.x", 0)], formatstr=".1.1"))
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_hash_rollup(self):
+        """
+                TESTRollup.test_hash_rollup
+        """
+        rand = random.Random(0)
+        pairs = sorted((tuple(level), rand.randrange(10))
+                       for level in corpus.iter_levels(3000, fanout=4))
+        expected = list(rollup.iter_rollup(pairs, rollup.COUNT_SUM, include_root=True))
+        self.assertEqual( len(expected), len(set(prefix for prefix, _ in expected)) )
+
+        rand.shuffle(pairs)
+        # in memory, several temporary files, one level per file :
+        for max_entries, runs in ((10**6, 0), (100, 10), (1, 1000)):
+            with rollup.HashRollup(rollup.COUNT_SUM, max_entries=max_entries) as hash_rollup:
+                hash_rollup.feed(pairs[:1000])
+                hash_rollup.feed(pairs[1000:])
+                self.assertEqual( list(hash_rollup.iterAggregates(include_root=True)),
+                                  expected )
+                self.assertGreaterEqual( hash_rollup.number_of_runs, runs )
+                self.assertEqual( hash_rollup.runs, [] )
+
+        with rollup.HashRollup(rollup.MIN, formatstr=".I.1", max_entries=1) as hash_rollup:
+            hash_rollup.feed([("II", 5), ("I.2", 3), ("II", 1), ("I", 4)])
+            self.assertEqual( list(hash_rollup.iterAggregates()),
+                              [((1, 2), 3), ((1,), 3), ((2,), 1)] )
+
+################################################################################
+class TESTSortedLevels(unittest.TestCase):
+    """
+        TESTSortedLevels class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_sorted_levels(self):
+        """
+                TESTSortedLevels.test_sorted_levels
+        """
+        levels = SortedLevels(["3.2", "1", "3.2.1"], formatstr=".1.1.1", load=4)
+        levels.add("3")
+        levels.add([3, 2, 1])
+        levels.add(HLevel("10", ".1"))
+        self.assertEqual( [str(level) for level in levels],
+                          ["1", "3", "3.2", "3.2.1", "3.2.1", "10"] )
+        self.assertEqual( len(levels), 6 )
+        self.assertEqual( levels.rank("3.2.1"), 3 )
+        self.assertEqual( levels.bisectRight((3, 2, 1)), 5 )
+        self.assertEqual( levels.index([3, 2, 1]), 3 )
+        self.assertEqual( str(levels[-1]), "10" )
+        self.assertEqual( levels.countSubtree("3"), 4 )
+        self.assertEqual( levels.countSubtree([3, 2, 1]), 2 )
+        self.assertEqual( levels.countSubtree([]), 6 )
+        self.assertEqual( [list(level) for level in levels.iterSubtree([3, 2])],
+                          [[3, 2], [3, 2, 1], [3, 2, 1]] )
+        self.assertTrue( "3.2" in levels )
+        self.assertFalse( "2" in levels )
+
+        levels.remove("3.2.1")
+        self.assertEqual( levels.countSubtree("3.2"), 2 )
+        self.assertFalse( levels.discard("4") )
+        with self.assertRaises(ValueError):
+            levels.remove("4")
+        with self.assertRaises(ValueError):
+            levels.index("4")
+        with self.assertRaises(IndexError):
+            levels[5]
+        with self.assertRaises(ParseError):
+            levels.add("x")
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # the same results as a sorted list, the blocks being split and merged :
+        rand = random.Random(1)
+        pool = [list(level) for level in corpus.iter_levels(2000, max_depth=4, fanout=5)]
+        expected = sorted(pool[:300])
+        levels = SortedLevels(pool[:300], load=8)
+        for step in range(3000):
+            level = rand.choice(pool)
+            if rand.random() < 0.55:
+                levels.add(level)
+                expected.insert(bisect.bisect_right(expected, level), level)
+            else:
+                self.assertEqual( levels.discard(level), level in expected )
+                if level in expected:
+                    expected.remove(level)
+
+            if step % 300 == 0:
+                self.assertEqual( [list(level) for level in levels], expected )
+                self.assertLessEqual( max(len(block) for block in levels.blocks), 16 )
+                for level in rand.sample(pool, 20):
+                    self.assertEqual( levels.rank(level), bisect.bisect_left(expected, level) )
+                    prefix = level[:2]
+                    self.assertEqual( levels.countSubtree(prefix),
+                                      sum(1 for item in expected
+                                          if item[:len(prefix)] == prefix) )
+                for index in rand.sample(range(len(expected)), 20):
+                    self.assertEqual( list(levels[index]), expected[index] )
+
+################################################################################
+class TESTSharedLevels(unittest.TestCase):
+    """
+        TESTSharedLevels class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_shared_levels(self):
+        """
+                TESTSharedLevels.test_shared_levels
+        """
+        levels = [HLevel("(IV.2.c)", ".(I.1.a)"), HLevel("(I)", ".(I.1.a)"), [300, 1], []]
+        with publish_levels(levels, ".(I.1.a)") as shared:
+            self.assertEqual( (len(shared), shared.depth, shared.typecode), (4, 3, "h") )
+            self.assertEqual( [str(hlevel) for hlevel in shared],
+                              ["(IV.2.c)", "(I)", "(CCC.1)", "()"] )
+            self.assertEqual( str(shared[-3]), "(I)" )
+            with self.assertRaises(IndexError):
+                shared[4]
+
+            values, depths = shared.getValues()
+            self.assertEqual( values.tolist(), [4, 2, 3, 1, -1, -1, 300, 1, -1, -1, -1, -1] )
+            self.assertEqual( depths.tolist(), [3, 1, 2, 0] )
+            with self.assertRaises(TypeError):
+                values[0] = 5       # read-only
+            del values, depths
+
+            # another SharedLevels object, not the owner : the same memory
+            attached = pickle.loads(pickle.dumps(shared))
+            self.assertLess( len(pickle.dumps(shared)), 100 )
+            self.assertEqual( [list(hlevel) for hlevel in attached], [[4, 2, 3], [1], [300, 1], []] )
+            self.assertEqual( attached.formatstr, ".(I.1.a)" )
+            attached.close()
+            self.assertEqual( str(shared[0]), "(IV.2.c)" )
+            name = shared.name
+
+        # the owner has removed the block :
+        with self.assertRaises(FileNotFoundError):
+            attach_levels(name)
+
+        with publish_levels([[1, 2**40], [-1]]) as shared:
+            self.assertEqual( shared.typecode, "q" )
+            self.assertEqual( list(shared[0]), [1, 2**40] )
+        with publish_levels([]) as shared:
+            self.assertEqual( (len(shared), list(shared)), (0, []) )
+        with self.assertRaises(HLevelError):
+            publish_levels([[2**70]])
+
+    #///////////////////////////////////////////////////////////////////////////
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_shared_array(self):
+        """
+                TESTSharedLevels.test_shared_array
+        """
+        levels = list(corpus.iter_levels(1000, fanout=100))
+        with publish_levels(levels) as shared:
+            values, depths = shared.getArray()
+            self.assertEqual( values.shape, (1000, 6) )
+            self.assertEqual( values.dtype, numpy.int8 )
+            self.assertFalse( values.flags.writeable )
+            self.assertEqual( [list(row[:depth]) for row, depth in zip(values, depths)], levels )
+            # a view still exists :
+            with self.assertRaises(BufferError):
+                shared.close()
+            del values, depths
+            # ... and may be closed again :
+            shared.close()
+        with self.assertRaises(FileNotFoundError):
+            attach_levels(shared.name)
+
+################################################################################
+class TESTParseCache(unittest.TestCase):
+    """
+        TESTParseCache class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_frozen(self):
+        """
+                TESTParseCache.test_frozen
+        """
+        level = FrozenHLevel([4, 1], ".(I.a)")
+        self.assertEqual( str(level), "(IV.a)" )
+        self.assertEqual( level, HLevel(src="IV.a", formatstr=".I.a") )
+        self.assertEqual( HLevel(src="IV.a", formatstr=".I.a"), level )
+        self.assertTrue( level < HLevel(src="IV.b", formatstr=".I.a") )
+        self.assertTrue( HLevel(src="III", formatstr=".I.a") < level )
+        self.assertEqual( len({level, FrozenHLevel((4, 1)), FrozenHLevel((4, 2))}), 2 )
+        self.assertEqual( list(level), [4, 1] )
+        self.assertEqual( level[-1], 1 )
+        self.assertEqual( pickle.loads(pickle.dumps(level)), level )
+        with self.assertRaises(AttributeError):
+            level.values = (1,)
+
+        hlevel = level.toHLevel()
+        hlevel.append(2)
+        self.assertEqual( level.values, (4, 1) )
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        pool = InternPool()
+        level = pool.intern([1, 2], ".1.1")
+        self.assertIs( pool.intern(HLevel(src="1.2", formatstr=".1.1"), ".1.1"), level )
+        self.assertIsNot( pool.intern([1, 2], ".I.1"), level )
+        self.assertEqual( len(pool), 1 )        # no reference to the ".I.1" level
+        del level
+        self.assertEqual( len(pool), 0 )
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_parse_cache(self):
+        """
+                TESTParseCache.test_parse_cache
+        """
+        cache = ParseCache(".I.1", maxsize=3)
+        level = cache.tryParseFrozen("II.3")
+        self.assertEqual( level, [2, 3] )
+        self.assertIs( cache.tryParseFrozen("II.3"), level )
+        self.assertIsNone( cache.tryParseFrozen("II.x") )
+        self.assertIsNone( cache.tryParseFrozen("II.x") )
+        self.assertEqual( cache.info(), (2, 2, 3, 2) )
+        self.assertEqual( cache.getHitRate(), 0.5 )
+
+        hlevel1, hlevel2 = cache.tryParse("IV"), cache.tryParse("IV")
+        self.assertEqual( hlevel1, HLevel(src="IV", formatstr=".I.1") )
+        self.assertIsNot( hlevel1, hlevel2 )
+        self.assertEqual( str(hlevel1), "IV" )
+
+        # the least recently used string is forgotten :
+        cache.tryParse("I")
+        self.assertEqual( list(cache.levels), ["II.x", "IV", "I"] )
+        self.assertIs( cache.tryParseFrozen("II.3"), level )    # same pool
+
+        with self.assertRaises(FormatError):
+            ParseCache("")
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # the same results as HLevel.try_parse(), two caches sharing their pool :
+        pool = InternPool()
+        cache1 = ParseCache(".1.1.1", maxsize=50, pool=pool)
+        cache2 = ParseCache(".1.1.1", maxsize=500, pool=pool)
+        strings = list(corpus.iter_references(".1.1.1", 300, noise=0.1, seed=1))
+        strings = list(corpus.iter_zipf(strings, 3000, seed=1))
+        for src in strings:
+            hlevel = HLevel.try_parse(src, ".1.1.1")
+            level1 = cache1.tryParseFrozen(src)
+            level2 = cache2.tryParseFrozen(src)
+            self.assertEqual( level1, hlevel )
+            self.assertIs( level1, level2 )
+        self.assertTrue( cache1.getHitRate() < cache2.getHitRate() )
+
+        cache1.clear()
+        self.assertEqual( cache1.info(), (0, 0, 50, 0) )
+
+################################################################################
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TESTBulk(unittest.TestCase):
+    """
+        TESTBulk class
+    """
+
+    #///////////////////////////////////////////////////////////////////////////
+    def test_parse_positional(self):
+        """
+                TESTBulk.test_parse_positional
+        """
+        res = parse_positional("(1.2.3)\n(10)\n()\n(1..2)\n(1.x)\n1.2\n(1.2.3.4)\r\n(4.5)\r\n",
+                               ".(1.1.1)")
+        self.assertEqual( res.values.tolist(), [[1, 2, 3], [10, -1, -1], [-1, -1, -1],
+                                                [-1, -1, -1], [-1, -1, -1], [-1, -1, -1],
+                                                [-1, -1, -1], [4, 5, -1]] )
+        self.assertEqual( res.depths.tolist(), [3, 1, 0, 0, 0, 0, 0, 2] )
+        self.assertEqual( res.valid.tolist(), [True, True, True, False, False, False,
+                                               False, True] )
+
+        res = parse_positional("¹.-₂\n₁\n-".encode("utf-16"), ".¹.₁", encoding="utf-16")
+        self.assertEqual( res.values.tolist(), [[1, -2], [-1, -1], [-1, -1]] )
+        self.assertEqual( res.valid.tolist(), [True, False, False] )
+
+        self.assertEqual( parse_positional(b"", ".1").values.shape, (0, 0) )
+        self.assertEqual( parse_positional(b"1" * 18 + b"\n" + b"1" * 19, ".1").valid.tolist(),
+                          [True, False] )
+        with self.assertRaises(FormatError):
+            parse_positional(b"I.1", ".I.1")
+
+        #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # the same results as HLevel.try_parse(allow_empty=True), the buffer being
+        # read by chunks :
+        for formatstr in (".(1.¹.1)", ".１.１.１", "-§1-1"):
+            lines = list(corpus.iter_references(formatstr, 3000, noise=0.3, seed=2,
+                                                fanout=2000)) + ["-1", "x"]
+            for buffer in ("\n".join(lines), "\n".join(lines).encode("utf-8")):
+                res = parse_positional(buffer, formatstr, chunk_size=1000)
+                self.assertEqual( len(res.valid), len(lines) )
+                for src, row, depth, valid in zip(lines, res.values, res.depths, res.valid):
+                    hlevel = HLevel.try_parse(src, formatstr, allow_empty=True)
+                    self.assertEqual( list(row[:depth]) if valid else None,
+                                      None if hlevel is None else list(hlevel) )